@@ -3,12 +3,16 @@ Exploitation Agent - Ethical exploitation simulation and impact assessment
 """
 import asyncio
 import json
-import subprocess
-import functools
+import zlib
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 from .base_agent import BaseAgent
+from utils.tool_timing import run_tool
+from utils.exploit_simulation import exploit_simulator
+from utils.attack_graph import attack_paths
+from utils.attack_vectors import vector_rules
+from utils.exploit_modules import exploit_modules
 
 _TOOL_DIR = Path(__file__).resolve().parent.parent / "tools"
 _REDSTORM_TOOLS = _TOOL_DIR / "redstorm-tools"
@@ -39,6 +43,8 @@ class ExploitationAgent(BaseAgent):
             "attack_vectors": [],
             "impact_assessment": {},
             "post_exploitation": {},
+            "simulation_summary": {},
+            "attack_graph": {},
             "ethical_disclaimer": "All exploitation activities are simulated for security assessment purposes only"
         }
 
@@ -52,12 +58,21 @@ class ExploitationAgent(BaseAgent):
             results["exploits"] = raw.get("exploits", [])
             results["payloads"] = raw.get("payloads", [])
             results["simulation"] = raw.get("simulation", {})
+            results["module_selection"] = raw.get("module_selection", {})
+
+            # attack paths over hosts/services/vulns/credentials from the earlier phases
+            loop = asyncio.get_event_loop()
+            results["attack_graph"] = await loop.run_in_executor(
+                None, attack_paths, target, options.get("previous_results") or {}, options.get("attack_paths_k", 5))
 
             # 2. keep your original pure-python simulations as **fallback** when wrapper returns empty
             if not results["exploits"]:
                 await self.send_update(ws, cid, {"status": "simulating_exploits", "message": "Running pure-python fallback simulation…"})
                 results["attack_vectors"] = await self.analyze_attack_vectors(target, options)
-                results["simulated_exploits"] = await self.simulate_exploits(results["attack_vectors"])
+                # seeded per target so repeated runs report the same numbers
+                seed = options.get("simulation_seed", zlib.crc32(target.encode()))
+                results["simulated_exploits"], results["simulation_summary"] = \
+                    await self.simulate_exploits(results["attack_vectors"], seed)
                 results["impact_assessment"] = await self.assess_impact(results["simulated_exploits"])
                 results["post_exploitation"] = await self.simulate_post_exploitation(results["simulated_exploits"])
 
@@ -75,10 +90,15 @@ class ExploitationAgent(BaseAgent):
     async def _exec_exploit(self, target: str, options: Dict[str, Any]) -> Dict[str, Any]:
         service = options.get("service", "http")          # <-- new flag
         cmd = [_REDSTORM_TOOLS, "exploit", "-t", target, "-s", service]
-        proc = await asyncio.create_subprocess_exec(
-            *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL
-        )
-        stdout, _ = await proc.communicate()
+
+        # exact candidate modules from the offline index; the broad
+        # per-service msfconsole search only runs when nothing matched
+        candidates = await self._select_modules(options.get("previous_results") or {})
+        for module in candidates:
+            cmd += ["-m", module["module"]]
+
+        run = await run_tool(cmd, "exploit", target, default_timeout=300)
+        stdout = run.stdout
 
         # strip banners / colours
         json_start = stdout.find(b'{')
@@ -86,168 +106,67 @@ class ExploitationAgent(BaseAgent):
             return {"error": "No JSON object returned from exploitation wrapper"}
 
         try:
-            return json.loads(stdout[json_start:])
+            raw = json.loads(stdout[json_start:])
         except Exception as e:
             return {"error": f"Bad JSON from wrapper: {e}"}
 
-    # ------------------------------------------------------------------
-    #  ALL ORIGINAL SIMULATION METHODS UNTOUCHED BELOW
-    # ------------------------------------------------------------------
+        by_name = {m["module"]: m for m in candidates}
+        for exploit in raw.get("exploits") or []:
+            meta = by_name.get(exploit.get("name"))
+            if meta:
+                exploit.update({"rank": meta["rank"], "cve": exploit.get("cve") or ",".join(meta["cves"]),
+                                "description": meta["title"], "matched_by": meta["matched_by"],
+                                "finding": meta["finding"]})
+        raw["module_selection"] = {"indexed": len(exploit_modules.modules),
+                                   "mode": "index" if candidates else "service_search",
+                                   "selected": len(candidates)}
+        return raw
+
+    async def _select_modules(self, previous_results: Dict[str, Any]) -> List[Dict[str, Any]]:
+        vulnerability = previous_results.get("vulnerability") or {}
+        findings = (vulnerability.get("vulnerabilities") or []) + (vulnerability.get("cve_matches") or [])
+        services = (previous_results.get("scanning") or {}).get("services") or []
+        try:
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(None, exploit_modules.select, findings, services)
+        except Exception as e:
+            self.log_activity(f"Exploit module selection failed, using service search: {e}", "warning")
+            return []
+
     async def analyze_attack_vectors(self, target: str, options: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Analyze potential attack vectors based on previous findings"""
-        attack_vectors = []
+        """Analyze potential attack vectors based on previous findings (see utils.attack_vectors)"""
         previous_results = options.get("previous_results", {})
         vulnerabilities = previous_results.get("vulnerability", {}).get("vulnerabilities", [])
         open_ports = previous_results.get("scanning", {}).get("open_ports", [])
+        return vector_rules.vectors(open_ports, vulnerabilities)
 
-        web_ports = [port for port in open_ports if port.get("port") in [80, 443, 8080, 8443]]
-        if web_ports:
-            attack_vectors.extend(await self.analyze_web_vectors(target, vulnerabilities))
-
-        network_vectors = await self.analyze_network_vectors(open_ports, vulnerabilities)
-        attack_vectors.extend(network_vectors)
-
-        social_vectors = await self.analyze_social_vectors(target)
-        attack_vectors.extend(social_vectors)
-        return attack_vectors
-
-    async def analyze_web_vectors(self, target: str, vulnerabilities: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Analyze web application attack vectors"""
-        web_vectors = []
-        web_vulns = [v for v in vulnerabilities if any(web_type in v.get("name", "").lower()
-                    for web_type in ["xss", "sql", "csrf", "lfi", "rfi", "ssrf"])]
-        for vuln in web_vulns:
-            web_vectors.append({
-                "type": "web_application",
-                "name": vuln.get("name", "Unknown Web Vulnerability"),
-                "severity": vuln.get("severity", "medium"),
-                "description": vuln.get("description", ""),
-                "attack_complexity": self.assess_attack_complexity(vuln),
-                "success_probability": self.calculate_success_probability(vuln),
-                "required_skills": self.determine_required_skills(vuln),
-                "detection_likelihood": self.assess_detection_likelihood(vuln)
-            })
-
-        common_web_vectors = [
-            {
-                "type": "web_application",
-                "name": "Brute Force Authentication",
-                "severity": "medium",
-                "description": "Attempt to brute force login credentials",
-                "attack_complexity": "low",
-                "success_probability": 0.3,
-                "required_skills": "beginner",
-                "detection_likelihood": "high"
-            },
-            {
-                "type": "web_application",
-                "name": "Directory Traversal",
-                "severity": "medium",
-                "description": "Attempt to access files outside web root",
-                "attack_complexity": "low",
-                "success_probability": 0.4,
-                "required_skills": "beginner",
-                "detection_likelihood": "medium"
-            }
-        ]
-        web_vectors.extend(common_web_vectors)
-        return web_vectors
-
-    async def analyze_network_vectors(self, open_ports: List[Dict[str, Any]], vulnerabilities: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Analyze network service attack vectors"""
-        network_vectors = []
-        for port in open_ports:
-            if port.get("state") == "open":
-                service = port.get("service", "unknown")
-                port_num = port.get("port")
-
-                if service.lower() == "ssh" or port_num == 22:
-                    network_vectors.append({
-                        "type": "network_service",
-                        "name": "SSH Brute Force",
-                        "severity": "high",
-                        "description": f"Brute force attack against SSH service on port {port_num}",
-                        "attack_complexity": "medium",
-                        "success_probability": 0.2,
-                        "required_skills": "intermediate",
-                        "detection_likelihood": "high"
-                    })
-
-                if service.lower() == "ftp" or port_num == 21:
-                    network_vectors.append({
-                        "type": "network_service",
-                        "name": "FTP Anonymous Access",
-                        "severity": "medium",
-                        "description": f"Check for anonymous FTP access on port {port_num}",
-                        "attack_complexity": "low",
-                        "success_probability": 0.6,
-                        "required_skills": "beginner",
-                        "detection_likelihood": "low"
-                    })
-
-                if any(db in service.lower() for db in ["mysql", "postgresql", "mongodb"]):
-                    network_vectors.append({
-                        "type": "network_service",
-                        "name": "Database Brute Force",
-                        "severity": "high",
-                        "description": f"Brute force attack against {service} database",
-                        "attack_complexity": "medium",
-                        "success_probability": 0.3,
-                        "required_skills": "intermediate",
-                        "detection_likelihood": "high"
-                    })
-        return network_vectors
-
-    async def analyze_social_vectors(self, target: str) -> List[Dict[str, Any]]:
-        """Analyze social engineering attack vectors"""
-        return [
-            {
-                "type": "social_engineering",
-                "name": "Phishing Campaign",
-                "severity": "high",
-                "description": "Targeted phishing emails to employees",
-                "attack_complexity": "medium",
-                "success_probability": 0.7,
-                "required_skills": "intermediate",
-                "detection_likelihood": "medium"
-            },
-            {
-                "type": "social_engineering",
-                "name": "Pretexting",
-                "severity": "medium",
-                "description": "Phone-based social engineering attacks",
-                "attack_complexity": "high",
-                "success_probability": 0.5,
-                "required_skills": "advanced",
-                "detection_likelihood": "low"
-            }
-        ]
-
-    async def simulate_exploits(self, attack_vectors: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Simulate exploitation attempts (ethical simulation only)"""
+    async def simulate_exploits(self, attack_vectors: List[Dict[str, Any]],
+                                seed: Optional[int] = None) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Simulate exploitation attempts (ethical simulation only) -> (per vector, summary)"""
+        loop = asyncio.get_event_loop()
+        stats, summary = await loop.run_in_executor(None, exploit_simulator.run, attack_vectors, seed)
         simulated_exploits = []
-        for vector in attack_vectors:
+        for vector, vstats in zip(attack_vectors, stats):
             simulated_exploits.append({
                 "vector": vector["name"],
                 "type": vector["type"],
                 "severity": vector["severity"],
                 "simulation_status": "simulated",
                 "success_probability": vector.get("success_probability", 0.5),
-                "simulated_outcome": self.simulate_exploit_outcome(vector),
+                "simulation": vstats,
+                "simulated_outcome": self.simulate_exploit_outcome(vector, vstats),
                 "time_to_exploit": self.estimate_time_to_exploit(vector),
                 "tools_required": self.identify_required_tools(vector),
                 "countermeasures": self.suggest_countermeasures(vector)
             })
-            await asyncio.sleep(0.5)
-        return simulated_exploits
+        return simulated_exploits, summary
 
-    def simulate_exploit_outcome(self, vector: Dict[str, Any]) -> Dict[str, Any]:
-        import random
-        success_prob = vector.get("success_probability", 0.5)
-        success = random.random() < success_prob
+    def simulate_exploit_outcome(self, vector: Dict[str, Any], stats: Dict[str, Any]) -> Dict[str, Any]:
+        # a vector counts as exploited when it succeeds in most simulated trials
+        success = stats["success_rate"] >= 0.5
         outcome = {
             "success": success,
-            "confidence": "simulation",
+            "confidence": "monte_carlo",
             "impact_level": vector.get("severity", "medium"),
             "access_gained": [],
             "data_at_risk": [],
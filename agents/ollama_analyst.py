@@ -1,50 +1,225 @@
 """
 Generic Ollama client for RedStorm.
 Pass any JSON + any prompt → get answer.
+Async callers use `aquery` / `aquery_json`: one pooled httpx connection,
+streamed generation, optional per-token callback (e.g. to a WebSocket).
+Answers are cached on disk by (model, prompt, input, temperature), see
+utils.llm_cache; pass cache=False to force a fresh generation.
+Generations are queued by priority and bounded to what the model host
+sustains, see utils.llm_scheduler (INTERACTIVE before BATCH).
+Model readiness is tracked in memory by a background monitor (started with
+the API), which also warms the model and keeps it loaded via keep_alive, so
+calls do not pay for a server probe, an `ollama list` fork or a cold load.
 """
+import os
 import json
+import time
+import asyncio
+import logging
 import requests
 import pathlib
-import subprocess
-from typing import Any, Optional
+from typing import Any, Optional, Callable, Awaitable
+
+import httpx
+
+from utils.prompt_compaction import dumps
+from utils.llm_cache import llm_cache, cache_key
+from utils.llm_scheduler import llm_scheduler, BATCH
 
 _BIN   = pathlib.Path(__file__).parent.parent / "ollama" / "ollama"
 _DATA  = pathlib.Path(__file__).parent.parent / "ollama" / "ollama-data"
-_URL   = "http://127.0.0.1:11434"
+_URL   = os.environ.get("OLLAMA_URL", "http://127.0.0.1:11434").rstrip("/")
 _MODEL = "llama3.1:8b"
 _TIMEOUT = 300
+_KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE", "30m")
+_READY_TTL = 120          # trust a successful check this long without re-probing
+_MONITOR_INTERVAL = 60
+
+logger = logging.getLogger("redstorm.ollama")
+
+TokenCallback = Callable[[str], Awaitable[None]]
+_client: Optional[httpx.AsyncClient] = None
+
+# readiness, updated by ensure_ready() and the background monitor
+_ready = {"server": False, "present": False, "loaded": False, "checked": 0.0, "error": ""}
+_ready_lock: Optional[asyncio.Lock] = None
+_monitor_task: Optional[asyncio.Task] = None
 
 
 # ---------- public ----------
-def query(data: Any, prompt: Optional[str] = None, temperature: float = 0.3) -> str:
+def query(data: Any, prompt: Optional[str] = None, temperature: float = 0.3, cache: bool = True) -> str:
     """
     Send any Python object (dict, list, str, int …) to Llama-3.1-8B and return raw text.
     If no prompt is supplied we use a generic red-team summary template.
     """
-    if not _server_up():
-        raise RuntimeError("Ollama server not running at " + _URL)
+    key = cache_key(_MODEL, prompt or "", data, temperature)
+    cached = llm_cache.get(key) if cache else None
+    if cached is not None:
+        return cached
+    if not _is_ready():
+        if not _server_up():
+            raise RuntimeError("Ollama server not running at " + _URL)
+        _ensure_model()
+    answer = _ask(_build_prompt(data, prompt), temperature)
+    if cache:
+        llm_cache.put(key, answer)
+    return answer
+
+
+def query_json(data: Any, system: str, temperature: float = 0.0, cache: bool = True) -> Any:
+    """
+    Same as `query` but **forces valid JSON** output (set temp=0).
+    system = instructions like "Return only JSON with keys: risk, tip"
+    """
+    key = cache_key(_MODEL, "json:" + system, data, temperature)
+    raw = llm_cache.get(key) if cache else None
+    if raw is None:
+        raw = _ask(_build_json_prompt(data, system), temperature)
+        parsed = _parse_json(raw)       # only answers that parse are cached
+        if cache:
+            llm_cache.put(key, raw)
+        return parsed
+    return _parse_json(raw)
+
+
+# ---------- public (async) ----------
+async def aquery(data: Any, prompt: Optional[str] = None, temperature: float = 0.3,
+                 on_token: Optional[TokenCallback] = None, cache: bool = True,
+                 priority: int = BATCH) -> str:
+    """
+    Async `query`: never blocks the event loop. With `on_token` every
+    generated chunk is awaited through the callback as it arrives; a cached
+    or shared answer is delivered through it in one piece.
+    """
+    key = cache_key(_MODEL, prompt or "", data, temperature)
+    streamed = False
+
+    async def forward(token: str):
+        nonlocal streamed
+        streamed = True
+        await on_token(token)
+
+    async def generate() -> str:
+        await ensure_ready()
+        return await _aask(_build_prompt(data, prompt), temperature, forward if on_token else None)
+
+    async def scheduled() -> str:
+        return await llm_scheduler.run(generate, priority, key)
+
+    answer = (await llm_cache.get_or_generate(key, scheduled))[0] if cache else await scheduled()
+    if on_token is not None and not streamed:
+        await on_token(answer)
+    return answer
+
+
+async def aquery_json(data: Any, system: str, temperature: float = 0.0, cache: bool = True,
+                      priority: int = BATCH) -> Any:
+    """Async `query_json`."""
+    key = cache_key(_MODEL, "json:" + system, data, temperature)
+
+    async def generate() -> str:
+        await ensure_ready()
+        raw = await _aask(_build_json_prompt(data, system), temperature)
+        _parse_json(raw)                # raise before an unparsable answer is cached
+        return raw
+
+    async def scheduled() -> str:
+        return await llm_scheduler.run(generate, priority, key)
+
+    raw = (await llm_cache.get_or_generate(key, scheduled))[0] if cache else await scheduled()
+    return _parse_json(raw)
+
+
+async def ensure_ready(force: bool = False) -> None:
+    """
+    Raise unless the server is up and the model present. Answered from memory
+    while the last check is fresh; otherwise one /api/tags request (and a
+    pull through the API if the model is missing). Concurrent callers share
+    one check.
+    """
+    global _ready_lock
+    if not force and _is_ready():
+        return
+    if _ready_lock is None:
+        _ready_lock = asyncio.Lock()
+    async with _ready_lock:
+        if not force and _is_ready():
+            return
+        client = _get_client()
+        try:
+            resp = await client.get("/api/tags", timeout=5)
+            resp.raise_for_status()
+            names = {m.get("name") for m in resp.json().get("models", [])}
+            _ready.update(server=True, error="")
+            if _MODEL not in names:
+                logger.info(f"Pulling {_MODEL}")
+                pull = await client.post("/api/pull", json={"model": _MODEL, "stream": False}, timeout=None)
+                pull.raise_for_status()
+            _ready.update(present=True, checked=time.time())
+        except httpx.HTTPError as e:
+            _ready.update(server=False, present=False, loaded=False, checked=0.0, error=str(e))
+            raise RuntimeError("Ollama server not running at " + _URL)
 
-    _ensure_model()
 
+async def warm_up() -> bool:
+    """Load the model into memory (empty prompt) and pin it there for keep_alive."""
+    try:
+        await ensure_ready()
+        resp = await _get_client().post("/api/generate", json={"model": _MODEL, "prompt": "", "keep_alive": _KEEP_ALIVE})
+        resp.raise_for_status()
+        _ready["loaded"] = True
+        return True
+    except Exception as e:
+        _ready.update(loaded=False, error=str(e))
+        logger.warning(f"Ollama warm-up failed: {e}")
+        return False
+
+
+def start_monitor() -> None:
+    """Warm the model now and re-check readiness periodically (API startup)."""
+    global _monitor_task
+    if _monitor_task is None or _monitor_task.done():
+        _monitor_task = asyncio.get_running_loop().create_task(_monitor())
+
+
+def status() -> dict:
+    return {"model": _MODEL, "keep_alive": _KEEP_ALIVE, **_ready}
+
+
+async def aclose() -> None:
+    """Stop the monitor and close the pooled connection (API shutdown)."""
+    global _client, _monitor_task
+    if _monitor_task is not None:
+        _monitor_task.cancel()
+        try:
+            await _monitor_task
+        except asyncio.CancelledError:
+            pass
+        _monitor_task = None
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+# ---------- internal ----------
+def _build_prompt(data: Any, prompt: Optional[str]) -> str:
     if prompt is None:
-        prompt = f"""You are a senior red-team operator.
+        return f"""You are a senior red-team operator.
 Summarise the following JSON in ≤15 lines.
 Flag any secrets, emails, buckets, git exposures, backup files, tech versions.
 Give a 0-10 risk score and one short remediation tip.
 JSON:
-{json.dumps(data, indent=2)}
+{dumps(data)}
 """
+    # custom prompts refer to "the JSON above"
+    return f"JSON:\n{dumps(data)}\n\n{prompt}"
 
-    return _ask(prompt, temperature)
 
+def _build_json_prompt(data: Any, system: str) -> str:
+    return f"{system}\n\nInput:\n{dumps(data)}\n\nOutput (valid JSON only):"
 
-def query_json(data: Any, system: str, temperature: float = 0.0) -> Any:
-    """
-    Same as `query` but **forces valid JSON** output (set temp=0).
-    system = instructions like "Return only JSON with keys: risk, tip"
-    """
-    prompt = f"{system}\n\nInput:\n{json.dumps(data, indent=2)}\n\nOutput (valid JSON only):"
-    raw = _ask(prompt, temperature)
+
+def _parse_json(raw: str) -> Any:
     try:
         return json.loads(raw)
     except json.JSONDecodeError:
@@ -53,7 +228,39 @@ def query_json(data: Any, system: str, temperature: float = 0.0) -> Any:
         return json.loads(raw)
 
 
-# ---------- internal ----------
+def _is_ready() -> bool:
+    return _ready["present"] and time.time() - _ready["checked"] < _READY_TTL
+
+
+async def _monitor() -> None:
+    while True:
+        if not _ready["loaded"]:
+            await warm_up()
+        else:
+            try:
+                await ensure_ready(force=True)
+                # reload if the server evicted the model despite keep_alive
+                ps = await _get_client().get("/api/ps", timeout=5)
+                if ps.status_code == 200 and _MODEL not in {m.get("name") for m in ps.json().get("models", [])}:
+                    _ready["loaded"] = False
+                    continue
+            except Exception as e:
+                logger.debug(f"Ollama readiness check failed: {e}")
+        await asyncio.sleep(_MONITOR_INTERVAL)
+
+
+def _get_client() -> httpx.AsyncClient:
+    # one keep-alive pool per process; generation can take minutes, connecting must not
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            base_url=_URL,
+            timeout=httpx.Timeout(_TIMEOUT, connect=5.0),
+            limits=httpx.Limits(max_connections=8, max_keepalive_connections=8),
+        )
+    return _client
+
+
 def _server_up() -> bool:
     try:
         return requests.head(_URL, timeout=2).status_code == 200
@@ -62,16 +269,46 @@ def _server_up() -> bool:
 
 
 def _ensure_model() -> None:
-    lst = subprocess.run([str(_BIN), "list"], capture_output=True, text=True).stdout
-    if _MODEL not in lst:
-        subprocess.run([str(_BIN), "pull", _MODEL], check=True)
+    # through the API, not the bundled binary: the server may be elsewhere (OLLAMA_URL)
+    resp = requests.get(f"{_URL}/api/tags", timeout=5)
+    resp.raise_for_status()
+    if _MODEL not in {m.get("name") for m in resp.json().get("models", [])}:
+        requests.post(f"{_URL}/api/pull", json={"model": _MODEL, "stream": False}, timeout=None).raise_for_status()
+    _ready.update(server=True, present=True, checked=time.time(), error="")
 
 
 def _ask(prompt: str, temperature: float) -> str:
     resp = requests.post(
         f"{_URL}/api/generate",
-        json={"model": _MODEL, "prompt": prompt, "stream": False, "options": {"temperature": temperature}},
+        json={"model": _MODEL, "prompt": prompt, "stream": False, "keep_alive": _KEEP_ALIVE,
+              "options": {"temperature": temperature}},
         timeout=_TIMEOUT,
     )
     resp.raise_for_status()
-    return resp.json()["response"].strip()
\ No newline at end of file
+    return resp.json()["response"].strip()
+
+
+async def _aask(prompt: str, temperature: float, on_token: Optional[TokenCallback] = None) -> str:
+    body = {"model": _MODEL, "prompt": prompt, "stream": True, "keep_alive": _KEEP_ALIVE,
+            "options": {"temperature": temperature}}
+    parts = []
+    try:
+        async with _get_client().stream("POST", "/api/generate", json=body) as resp:
+            resp.raise_for_status()
+            async for line in resp.aiter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise RuntimeError(f"Ollama error: {chunk['error']}")
+                token = chunk.get("response", "")
+                if token:
+                    parts.append(token)
+                    if on_token is not None:
+                        await on_token(token)
+                if chunk.get("done"):
+                    break
+    except (httpx.ConnectError, httpx.RemoteProtocolError):
+        _ready.update(checked=0.0, loaded=False)       # re-check on the next call
+        raise
+    return "".join(parts).strip()
@@ -5,7 +5,7 @@ AI service selector + final report via Ollama
 """
 import asyncio
 import json
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 from datetime import datetime
 
 from .reconnaissance_agent import ReconnaissanceAgent
@@ -13,7 +13,12 @@ from .scanning_agent import ScanningAgent
 from .vulnerability_agent import VulnerabilityAgent
 from .exploitation_agent import ExploitationAgent
 from .preengagement_agent import PreEngagementAgent
-from .ollama_analyst import query, query_json
+from .ollama_analyst import aquery
+from utils.scan_jobs import scan_jobs
+from utils.file_storage import file_storage
+from utils.prompt_compaction import compact
+from utils.llm_scheduler import INTERACTIVE
+from utils.service_classifier import service_classifier
 
 
 class AgentOrchestrator:
@@ -43,6 +48,35 @@ class AgentOrchestrator:
         "parquet", "orc"
     }
 
+    # token budgets for the prompt input (see utils.prompt_compaction)
+    HINT_PROMPT_BUDGET = 1500
+    REPORT_PROMPT_BUDGET = 4000
+    PHASE_SUMMARY_BUDGET = 2000     # per map step of an oversized report
+    PHASE_FALLBACK_BUDGET = 300     # phase data the reduce step gets when its summary failed
+
+    REPORT_PROMPT = """You are a senior red-team operator writing for a CISO.
+Write a concise executive summary (≤20 lines) that includes:
+- Overall risk score (0-10)
+- Top 3 critical findings
+- One actionable remediation recommendation
+Focus on business impact, not technical details. Do not repeat raw JSON keys."""
+
+    PHASE_SUMMARY_PROMPT = """You are a senior red-team operator.
+The JSON above holds the results of the {phase} phase of an assessment.
+Summarise them in ≤8 lines: the most severe findings with their affected
+host/port/component, exposed services or data, and anything that enables
+exploitation. Plain text, no JSON keys, no introduction."""
+
+    # Phases still run concurrently, but each one waits for the phases whose
+    # results it consumes (pre-engagement gate, fingerprints, exploit inputs)
+    PHASE_DEPENDENCIES = {
+        "preengagement": (),
+        "reconnaissance": ("preengagement",),
+        "scanning": ("preengagement",),
+        "vulnerability": ("preengagement", "reconnaissance", "scanning"),
+        "exploitation": ("preengagement", "scanning", "vulnerability"),
+    }
+
     def __init__(self):
         """Initialize the orchestrator with all agent instances."""
         self.agents = {
@@ -53,6 +87,8 @@ class AgentOrchestrator:
             "exploitation": ExploitationAgent()
         }
         self.active_assessments: Dict[str, Dict[str, Any]] = {}
+        self._phase_done: Dict[str, Dict[str, asyncio.Event]] = {}
+        scan_jobs.on_ingest(self._ingest_scan_job)
 
     # ----------------------------------------------------------
     # Public API Methods
@@ -81,6 +117,7 @@ class AgentOrchestrator:
             "results": {},
             "ai_service_hint": "http",  # default
             "ai_final_report": "",
+            "ai_prompt_stats": {},
             "start_time": datetime.now(),
             "cancelled": False
         }
@@ -92,8 +129,9 @@ class AgentOrchestrator:
             "phases": list(self.agents.keys())
         })
 
-        # Execute all phases in parallel
+        # Execute all phases in parallel (dependency-ordered)
         phases = list(self.agents.keys())
+        self._phase_done[assessment_id] = {phase: asyncio.Event() for phase in phases}
         error_occurred = False
         
         try:
@@ -128,6 +166,9 @@ class AgentOrchestrator:
                 })
             error_occurred = True
 
+        finally:
+            self._phase_done.pop(assessment_id, None)
+
         if error_occurred:
             return assessment_id
 
@@ -151,6 +192,35 @@ class AgentOrchestrator:
     # Private Helper Methods
     # ----------------------------------------------------------
 
+    async def _ingest_scan_job(self, job, findings) -> None:
+        """Fold a finished long-running scan into its assessment (in memory and on disk)."""
+        agent: VulnerabilityAgent = self.agents["vulnerability"]
+
+        def _patch(results: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+            vuln = results.get("vulnerability") if isinstance(results, dict) else None
+            if not isinstance(vuln, dict) or "error" in vuln:
+                return None
+            for entry in vuln.get("scan_jobs", []):
+                if entry.get("job_id") == job.job_id:
+                    entry.update(state="ingested", findings=len(findings))
+            return vuln
+
+        active = self.active_assessments.get(job.assessment_id)
+        vuln = _patch(active["results"]) if active else None
+        if vuln is not None:
+            await agent.ingest_job_findings(vuln, job.tool, findings)
+
+        stored = await file_storage.get_assessment(job.assessment_id) if job.assessment_id else None
+        section = "results" if stored and "results" in stored else "phases"
+        stored_vuln = _patch(stored.get(section) or {}) if stored else None
+        if stored_vuln is not None:
+            merged = vuln if vuln is not None else await agent.ingest_job_findings(stored_vuln, job.tool, findings)
+            # re-read right before writing: the assessment may have been updated meanwhile
+            current = await file_storage.get_assessment(job.assessment_id)
+            if current and isinstance(current.get(section), dict):
+                current[section]["vulnerability"] = merged
+                await file_storage.save_assessment(job.assessment_id, current)
+
     async def _send_message(self, client_id: str, websocket_manager, msg_type: str, payload: Dict[str, Any]) -> None:
         """Send a message to the client via WebSocket."""
         try:
@@ -160,6 +230,20 @@ class AgentOrchestrator:
             print(f"Failed to send message to client {client_id}: {e}")
 
     async def _run_phase(self, phase: str, target: str, client_id: str, websocket_manager, assessment_id: str) -> Dict[str, Any]:
+        """Execute a single assessment phase and publish its result for dependent phases."""
+        done = self._phase_done.get(assessment_id, {})
+        try:
+            for dependency in self.PHASE_DEPENDENCIES.get(phase, ()):
+                if dependency in done:
+                    await done[dependency].wait()
+            result = await self._execute_phase(phase, target, client_id, websocket_manager, assessment_id)
+            self.active_assessments[assessment_id]["results"][phase] = result
+            return result
+        finally:
+            if phase in done:
+                done[phase].set()
+
+    async def _execute_phase(self, phase: str, target: str, client_id: str, websocket_manager, assessment_id: str) -> Dict[str, Any]:
         """Execute a single assessment phase."""
         # Check if assessment was cancelled
         if self.active_assessments[assessment_id].get("cancelled"):
@@ -189,7 +273,8 @@ class AgentOrchestrator:
         options = {
             "websocket_manager": websocket_manager,
             "client_id": client_id,
-            "assessment_id": assessment_id
+            "assessment_id": assessment_id,
+            "previous_results": self.active_assessments[assessment_id]["results"]
         }
 
         try:
@@ -211,20 +296,36 @@ class AgentOrchestrator:
         return result
 
     async def _select_ai_service(self, assessment_id: str) -> None:
-        """Select the appropriate service for exploitation using AI."""
-        # Build summary of previous phases for Ollama
+        """
+        Select the service for exploitation: from the fingerprints when they
+        are conclusive, otherwise by asking the LLM.
+        """
+        assessment = self.active_assessments[assessment_id]
         previous_results = {
-            k: v for k, v in self.active_assessments[assessment_id]["results"].items()
+            k: v for k, v in assessment["results"].items()
             if k != "exploitation"
         }
 
+        decision = service_classifier.classify(previous_results, self.VALID_SERVICE_HINTS)
+        assessment["service_hint_decision"] = {
+            k: decision[k] for k in ("hint", "confidence", "scores")
+        }
+        if decision["confident"]:
+            assessment["ai_service_hint"] = decision["hint"]
+            assessment["service_hint_decision"]["source"] = "fingerprint"
+            return
+        assessment["service_hint_decision"]["source"] = "llm"
+
         try:
+            data, stats = compact(previous_results, self.HINT_PROMPT_BUDGET)
+            self.active_assessments[assessment_id]["ai_prompt_stats"]["service_hint"] = stats
             ai_prompt = """You are a red-team operator.
 Based on the JSON above, return ONLY the **single word** service name that exploitation should target.
 Choose the most appropriate option from the available services based on the reconnaissance and vulnerability data.
 Return only one word - no explanations or additional text."""
 
-            hint = query(previous_results, prompt=ai_prompt)
+            # exploitation waits on this answer: jump ahead of queued reports
+            hint = await aquery(data, prompt=ai_prompt, priority=INTERACTIVE)
             
             # Sanitize and validate the AI response
             hint = hint.strip().strip('"').lower()
@@ -232,40 +333,85 @@ Return only one word - no explanations or additional text."""
             if hint in self.VALID_SERVICE_HINTS:
                 self.active_assessments[assessment_id]["ai_service_hint"] = hint
             else:
-                # Fallback to default if AI returns invalid service
-                self.active_assessments[assessment_id]["ai_service_hint"] = "http"
+                # Fallback to the best deterministic guess, then the default
+                self.active_assessments[assessment_id]["ai_service_hint"] = decision["hint"] or "http"
                 print(f"AI returned invalid service hint '{hint}', using default 'http'")
                 
         except Exception as e:
             # Fallback on any error
-            self.active_assessments[assessment_id]["ai_service_hint"] = "http"
+            self.active_assessments[assessment_id]["ai_service_hint"] = decision["hint"] or "http"
             print(f"AI service hint selection failed: {e}")
 
     async def _generate_final_report(self, assessment_id: str, client_id: str, websocket_manager) -> None:
-        """Generate and send the final AI-powered assessment report."""
+        """
+        Generate and send the final AI-powered assessment report.
+        Results that fit the report budget go out in one prompt; larger ones
+        are summarised per phase concurrently (map) and the executive summary
+        is written from those summaries (reduce). Every step goes through the
+        response cache, so after one phase changes only its summary and the
+        reduce step are generated again.
+        """
         if assessment_id not in self.active_assessments:
             return
             
-        full_results = self.active_assessments[assessment_id]["results"]
+        assessment = self.active_assessments[assessment_id]
+        full_results = assessment["results"]
         
         try:
-            ai_prompt = """You are a senior red-team operator writing for a CISO.
-Write a concise executive summary (≤20 lines) that includes:
-- Overall risk score (0-10)
-- Top 3 critical findings
-- One actionable remediation recommendation
-Focus on business impact, not technical details. Do not repeat raw JSON keys."""
+            # stream the report to the client while it is generated
+            async def forward(token: str):
+                await self._send_message(client_id, websocket_manager, "report_token", {
+                    "assessment_id": assessment_id,
+                    "token": token
+                })
 
-            report = query(full_results, prompt=ai_prompt)
-            self.active_assessments[assessment_id]["ai_final_report"] = report
+            data, stats = compact(full_results, self.REPORT_PROMPT_BUDGET)
+            if stats["within_budget"] and not stats["truncated"]:
+                assessment["ai_prompt_stats"]["final_report"] = {"mode": "single", **stats}
+                report = await aquery(data, prompt=self.REPORT_PROMPT, on_token=forward)
+            else:
+                summaries, phase_stats = await self._summarise_phases(full_results)
+                assessment["ai_phase_summaries"] = summaries
+                data, stats = compact({"target": assessment["target"], "phase_summaries": summaries},
+                                      self.REPORT_PROMPT_BUDGET)
+                assessment["ai_prompt_stats"]["final_report"] = {
+                    "mode": "map_reduce", "phases": phase_stats, "reduce": stats}
+                report = await aquery(data, prompt=self.REPORT_PROMPT, on_token=forward)
+            assessment["ai_final_report"] = report
             
         except Exception as e:
-            self.active_assessments[assessment_id]["ai_final_report"] = f"AI report generation failed: {e}"
+            assessment["ai_final_report"] = f"AI report generation failed: {e}"
 
         # Mark assessment as completed and send final results
         self.active_assessments[assessment_id]["status"] = "completed"
         await self._send_message(client_id, websocket_manager, "assessment_completed", {
             "assessment_id": assessment_id,
             "results": full_results,
-            "ai_final_report": self.active_assessments[assessment_id]["ai_final_report"]
-        })
\ No newline at end of file
+            "ai_final_report": self.active_assessments[assessment_id]["ai_final_report"],
+            "ai_prompt_stats": self.active_assessments[assessment_id]["ai_prompt_stats"],
+            "ai_phase_summaries": self.active_assessments[assessment_id].get("ai_phase_summaries", {}),
+            "ai_service_hint": self.active_assessments[assessment_id]["ai_service_hint"],
+            "service_hint_decision": self.active_assessments[assessment_id].get("service_hint_decision", {})
+        })
+
+    async def _summarise_phases(self, full_results: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Map step: one summary per phase, all requested at once; the LLM
+        scheduler bounds how many generate concurrently. A phase whose
+        summary fails is passed on as a small compacted excerpt instead.
+        """
+        phases = [p for p, r in full_results.items() if isinstance(r, dict) and r and not r.get("skipped")]
+        compacted = {p: compact(full_results[p], self.PHASE_SUMMARY_BUDGET) for p in phases}
+        answers = await asyncio.gather(
+            *(aquery(compacted[p][0], prompt=self.PHASE_SUMMARY_PROMPT.format(phase=p)) for p in phases),
+            return_exceptions=True,
+        )
+        summaries, stats = {}, {}
+        for phase, answer in zip(phases, answers):
+            stats[phase] = compacted[phase][1]
+            if isinstance(answer, Exception):
+                summaries[phase] = compact(full_results[phase], self.PHASE_FALLBACK_BUDGET)[0]
+                stats[phase] = {**stats[phase], "error": str(answer)}
+            else:
+                summaries[phase] = answer
+        return summaries, stats
@@ -7,6 +7,7 @@ import subprocess
 from pathlib import Path
 from typing import Dict, Any
 from .base_agent import BaseAgent
+from utils.tool_timing import run_tool
 
 _TOOL_DIR = Path(__file__).resolve().parent.parent / "tools"
 _REDSTORM_TOOLS = _TOOL_DIR / "redstorm-tools"
@@ -33,20 +34,16 @@ class PreEngagementAgent(BaseAgent):
 
         try:
             cmd = [_REDSTORM_TOOLS, "preengagement", "-t", target, "-T", "25"]
-            proc = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
+            # 35 s (> 25 s probe window) until enough runs are recorded to learn a p95
+            run = await run_tool(cmd, "preengagement", target, default_timeout=35, capture_stderr=True)
+            if run.outcome == "killed":
+                self.status = "error"
+                self.log_activity(f"Pre-engagement probe killed after {run.duration:.0f} s", "error")
+                return {"error": f"Pre-engagement probe timed out after {run.duration:.0f} s"}
 
-            # give the wrapper plenty of head-room
-            stdout, stderr = await asyncio.wait_for(
-                proc.communicate(),
-                timeout=35          # 35 s > 15 s probe window
-            )
-
-            if proc.returncode != 0:
-                return {"error": f"Probe exited {proc.returncode}: {stderr.decode()}"}
+            stdout, stderr = run.stdout, run.stderr
+            if run.returncode != 0:
+                return {"error": f"Probe exited {run.returncode}: {stderr.decode()}"}
 
             # strip banners / colours / progress text
             json_start = stdout.find(b'{')
@@ -57,13 +54,6 @@ class PreEngagementAgent(BaseAgent):
             self.status = "completed"
             return data
 
-        except asyncio.TimeoutError:
-            proc.kill()
-            await proc.communicate()
-            self.status = "error"
-            self.log_activity("Pre-engagement probe timed out after 35 s", "error")
-            return {"error": "Pre-engagement probe timed out after 35 s"}
-
         except Exception as e:
             self.status = "error"
             self.log_activity(f"Pre-engagement error: {str(e)}", "error")
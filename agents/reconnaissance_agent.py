@@ -13,6 +13,7 @@ from pathlib import Path
 from dataclasses import dataclass
 from typing import Dict, Any, List
 from .base_agent import BaseAgent
+from utils.tool_timing import run_tool
 
 urllib3.disable_warnings()
 
@@ -123,13 +124,11 @@ class ReconnaissanceAgent(BaseAgent):
             await self.send_update(ws, cid, {"status": cfg.name, "message": f"Running {cfg.name}…"})
 
         cmd = [str(self.TOOL_DIR / "redstorm-tools"), cfg.name, "-d", target, *cfg.args]
-        proc = await asyncio.create_subprocess_exec(
-            *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
-        )
-        stdout, stderr = await proc.communicate()
+        run = await run_tool(cmd, cfg.name, target, default_timeout=900, capture_stderr=True)
+        stdout, stderr = run.stdout, run.stderr
 
-        if proc.returncode != 0 and not stdout:
-            self.log_activity(f"{cfg.name} failed: {stderr.decode()}", "error")
+        if run.returncode != 0 and not stdout:
+            self.log_activity(f"{cfg.name} failed ({run.outcome}): {stderr.decode()}", "error")
             return key, {}
 
         try:
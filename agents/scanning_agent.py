@@ -10,6 +10,7 @@ import logging
 import os
 from typing import Dict, Any, List
 from .base_agent import BaseAgent
+from utils.tool_timing import run_tool
 
 class ScanningAgent(BaseAgent):
     def __init__(self):
@@ -120,16 +121,11 @@ class ScanningAgent(BaseAgent):
             current_dir = os.path.dirname(os.path.abspath(__file__))
             backend_dir = os.path.join(current_dir, '..')
             
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                cwd=backend_dir
-            )
-            
-            stdout, stderr = await process.communicate()
+            run = await run_tool(cmd, "scan", target, default_timeout=600,
+                                 cwd=backend_dir, capture_stderr=True)
+            stdout, stderr = run.stdout, run.stderr
             
-            if process.returncode == 0:
+            if run.returncode == 0:
                 # Parse the JSON output from Go tools
                 result = json.loads(stdout.decode())
                 self.log_activity(f"Go tools found {len(result.get('ports', []))} open ports")
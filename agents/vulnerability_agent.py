@@ -4,14 +4,37 @@ Vulnerability Agent – parallel launcher for Nuclei, OpenVAS, WPScan, ZAP
 """
 import asyncio
 import json
-import subprocess
+import os
+import tempfile
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Sequence
 from datetime import datetime
 from .base_agent import BaseAgent
+from utils.template_index import template_index, collect_fingerprints
+from utils.exploit_intel import exploit_intel
+from utils.finding_dedup import deduplicate, FindingDeduplicator
+from utils.risk_scoring import risk_model, finding_signals
+from utils.header_audit import header_auditor, live_hosts
+from utils.tool_timing import run_tool, tool_timings, target_class
+from utils.scan_jobs import scan_jobs
 
 _TOOL_DIR = Path(__file__).resolve().parent.parent / "tools"
 _REDSTORM_TOOLS = _TOOL_DIR / "redstorm-tools"
+# persistent, content-hashed extraction of the embedded nuclei templates
+_NUCLEI_TEMPLATE_CACHE = _TOOL_DIR / ".cache" / "nuclei-templates"
+# hour-long scanners run as persisted jobs instead of inside the phase; opt-in
+# (REDSTORM_ASYNC_SCANNERS=openvas or options["async_scanners"]) since they need
+# a GVM container; "fake" exercises the job pipeline without one
+_ASYNC_SCANNERS = tuple(s for s in os.environ.get("REDSTORM_ASYNC_SCANNERS", "").split(",") if s)
+# deadlines until enough runs are recorded to learn them (see utils.tool_timing)
+_DEFAULT_TIMEOUTS = {"nuclei": 180, "wpscan": 180, "zap": 900, "openvas": 3600}
+# nuclei shards: one worker per core, within the box-wide subprocess budget
+# (the other scanners of the phase hold a slot each); per-target rate limit
+# and concurrency are split between the shards so the target sees the same load
+_SUBPROCESS_BUDGET = int(os.environ.get("REDSTORM_SUBPROCESS_BUDGET", os.cpu_count() or 1))
+_MIN_SHARD_TEMPLATES = 200
+_NUCLEI_RATE_LIMIT = 150
+_NUCLEI_CONCURRENCY = 25
 
 
 class VulnerabilityAgent(BaseAgent):
@@ -41,35 +64,49 @@ class VulnerabilityAgent(BaseAgent):
             "cve_matches": [],
             "security_issues": [],
             "risk_assessment": {},
-            "recommendations": []
+            "recommendations": [],
+            "template_selection": {},
+            "scan_jobs": []
         }
 
         try:
+            # 0. technology-aware nuclei template selection
+            fingerprints = collect_fingerprints(options.get("previous_results") or {})
+            selected = await self._select_templates(fingerprints)
+            results["template_selection"] = {
+                "fingerprints": fingerprints,
+                "mode": "full" if selected is None else "selected",
+                "selected": None if selected is None else len(selected),
+                "indexed": len(template_index.templates),
+            }
+
             # 1. parallel tools
-            raw = await self._run_all_tools(target, ws, cid)
-
-            # 2. merge vulnerabilities (same pattern as recon)
-            seen = set()
-            for tool, payload in raw.items():
-                if not isinstance(payload, dict):
-                    continue
-                vulns = payload.get("vulnerabilities", [])
-                for v in (vulns if isinstance(vulns, list) else []):
-                    uid = f"{tool}::{v.get('template_id','')}::{v.get('matched_at','')}"
-                    if uid in seen:
-                        continue
-                    seen.add(uid)
-                    # ensure required keys exist
-                    v.setdefault("severity", "info")
-                    v.setdefault("name", v.get("template_id", "unknown"))
-                    results["vulnerabilities"].append(v)
-
-            # 3. post-process exactly like legacy agent
+            raw = await self._run_all_tools(target, ws, cid, selected)
+            nuclei = raw.get("nuclei") or {}
+            results["template_selection"]["shards"] = nuclei.get("shards", 0)
+            results["template_selection"]["failed_shards"] = nuclei.get("failed_shards", 0)
+
+            # 2. header audit over every live host
+            issues, results["header_audit"] = await self._security_config(
+                target, options.get("previous_results") or {})
+
+            # 3. cross-tool merge (canonical issue + normalised location);
+            #    header issues a scanner already reported are merged, not listed twice
+            dedup = deduplicate(raw)
+            results["security_issues"] = dedup.absorb("header_audit", issues)
+            results["vulnerabilities"] = dedup.findings()
+            results["deduplication"] = dedup.stats()
+
+            # 4. post-process exactly like legacy agent
             results["cve_matches"] = await self._analyze_cves(results["vulnerabilities"])
-            results["security_issues"] = await self._security_config(target)
             results["risk_assessment"] = await self._risk_assessment(results)
             results["recommendations"] = await self._generate_recommendations(results)
 
+            # 5. long-running scanners report back later through the job poller
+            for tool in options.get("async_scanners", _ASYNC_SCANNERS):
+                job = await scan_jobs.submit(tool, target, options.get("assessment_id"))
+                results["scan_jobs"].append(job.summary())
+
             self.status = "completed"
             return results
 
@@ -81,30 +118,89 @@ class VulnerabilityAgent(BaseAgent):
     # ----------------------------------------------------------
     # 1. parallel tool launcher (crash-safe)
     # ----------------------------------------------------------
-    async def _run_all_tools(self, target: str, ws, cid) -> Dict[str, Any]:
-        configs = [
-            ("nuclei",   ["nuclei",   "-t", target]),
-            ("wpscan",   ["wpscan",   "-t", target]),
-            ("zap",      ["zap",      "-t", target]),
-            # ("openvas", ["openvas", "-t", target]),  # enable when ready
-        ]
-        tasks = [
-            asyncio.create_task(self._exec_tool(name, target, ws, cid))
-            for name, _ in configs
-        ]
-        gathered = await asyncio.gather(*tasks, return_exceptions=True)
-        return {name: (payload if not isinstance(payload, Exception) else {})
-                for name, payload in zip([c[0] for c in configs], gathered)}
-
-    async def _exec_tool(self, name: str, target: str, ws, cid):
+    async def _select_templates(self, fingerprints: List[str]) -> Optional[List[str]]:
+        """Relative template paths for the fingerprinted stack, None = full corpus."""
+        if not fingerprints:
+            return None
+        try:
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(None, template_index.select, fingerprints)
+        except Exception as e:
+            self.log_activity(f"Template selection failed, using full set: {e}", "warning")
+            return None
+
+    def _shard_count(self, templates: int, other_tools: int) -> int:
+        budget = _SUBPROCESS_BUDGET - other_tools
+        return max(1, min(os.cpu_count() or 1, budget, templates // _MIN_SHARD_TEMPLATES))
+
+    async def _run_all_tools(self, target: str, ws, cid, selected: Optional[List[str]] = None) -> Dict[str, Any]:
+        _NUCLEI_TEMPLATE_CACHE.mkdir(parents=True, exist_ok=True)
+        others = ["wpscan", "zap"]
+
+        # split the templates into cost-balanced shards, one nuclei process each
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, template_index.load)
+        total = len(selected) if selected is not None else len(template_index.runnable)
+        shards = await loop.run_in_executor(
+            None, template_index.shard, selected, self._shard_count(total, len(others)))
+
+        # nuclei's own cap sits below the learned soft deadline: it stops and
+        # returns partial results (status "timeout") well before the launcher's
+        # hard limit would kill the wrapper and lose them
+        limits = tool_timings.limits("nuclei", target_class(target), _DEFAULT_TIMEOUTS["nuclei"])
+        base_args = ["--templates-cache", str(_NUCLEI_TEMPLATE_CACHE),
+                     "--timeout", f"{max(1, int(limits.deadline * 0.9))}s",
+                     "--rate-limit", str(max(1, _NUCLEI_RATE_LIMIT // max(1, len(shards)))),
+                     "--concurrency", str(max(1, _NUCLEI_CONCURRENCY // max(1, len(shards))))]
+        list_files = []
+        for shard in shards:
+            fd, list_file = tempfile.mkstemp(prefix="nuclei-shard-", suffix=".txt")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write("\n".join(shard))
+            list_files.append(list_file)
+        nuclei_runs = [base_args + ["--template-list", f] for f in list_files] or [base_args]
+
+        tasks = [asyncio.create_task(self._exec_tool("nuclei", target, ws, cid, extra)) for extra in nuclei_runs]
+        tasks += [asyncio.create_task(self._exec_tool(name, target, ws, cid)) for name in others]
+        try:
+            gathered = await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            for list_file in list_files:
+                os.unlink(list_file)
+        gathered = [payload if not isinstance(payload, Exception) else {} for payload in gathered]
+        raw = dict(zip(others, gathered[len(nuclei_runs):]))
+        raw["nuclei"] = self._merge_shards(gathered[:len(nuclei_runs)])
+        return raw
+
+    @staticmethod
+    def _merge_shards(payloads: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """One nuclei result from the per-shard payloads (worst status wins)."""
+        done = [p for p in payloads if p]
+        if not done:
+            return {}
+        rank = {"completed": 0, "timeout": 1, "error": 2}
+        summary: Dict[str, int] = {}
+        for p in done:
+            for key, value in (p.get("summary") or {}).items():
+                summary[key] = summary.get(key, 0) + int(value or 0)
+        return {
+            "target": done[0].get("target"),
+            "vulnerabilities": [v for p in done for v in p.get("vulnerabilities") or []],
+            "summary": summary,
+            "status": max((p.get("status") or "error" for p in done), key=lambda st: rank.get(st, 2)),
+            "shards": len(payloads),
+            "failed_shards": len(payloads) - len(done),
+        }
+
+    async def _exec_tool(self, name: str, target: str, ws, cid, extra: Sequence[str] = ()):
         key = f"vuln_{name}"
         await self.send_update(ws, cid, {"status": key, "message": f"Running {name}…"})
 
-        cmd = [_REDSTORM_TOOLS, name, "-t", target]
-        proc = await asyncio.create_subprocess_exec(
-            *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL
-        )
-        stdout, _ = await proc.communicate()
+        cmd = [_REDSTORM_TOOLS, name, "-t", target, *extra]
+        run = await run_tool(cmd, name, target, default_timeout=_DEFAULT_TIMEOUTS.get(name, 900))
+        stdout = run.stdout
+        if run.outcome == "killed":
+            self.log_activity(f"{name} killed after {run.duration:.0f}s without progress", "warning")
 
         # strip everything before first '{' (progress text, banners, colours)
         json_start = stdout.find(b'{')
@@ -121,61 +217,77 @@ class VulnerabilityAgent(BaseAgent):
     # 2. post-processing helpers (same logic as legacy agent)
     # ----------------------------------------------------------
     async def _analyze_cves(self, vulns: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, template_index.load)
+        exploit_intel.open()      # one stat(); remaps if the store was rebuilt
+
         cve_matches = []
         for v in vulns:
             tid = v.get("template_id", "").upper()
             if "CVE-" in tid:
-                cve_id = tid.split("_")[0]
+                meta = template_index.lookup(tid) or {}
+                cve_id = (meta.get("cve_ids") or [tid.split("_")[0]])[0]
+                # offline EPSS/KEV store is fresher than the template metadata
+                intel = exploit_intel.lookup(cve_id) or {
+                    "epss_score": meta.get("epss_score", 0.0),
+                    "epss_percentile": meta.get("epss_percentile", 0.0),
+                    "kev": bool({"kev", "vkev"} & set(meta.get("tags", ()))),
+                }
                 cve_matches.append({
                     "cve_id": cve_id,
-                    "cvss_score": 0.0,
+                    "cvss_score": meta.get("cvss_score", 0.0),
+                    "cvss_metrics": meta.get("cvss_metrics", ""),
+                    "cwe_ids": meta.get("cwe_ids", []),
+                    "epss_score": intel["epss_score"],
+                    "epss_percentile": intel["epss_percentile"],
+                    "kev": intel["kev"],
                     "severity": v.get("severity", "info"),
-                    "description": "",
+                    "description": meta.get("description", ""),
                     "published_date": "",
-                    "references": [],
+                    "references": meta.get("references", []),
                     "affected_template": tid
                 })
         return cve_matches
 
-    async def _security_config(self, target: str) -> List[Dict[str, Any]]:
-        issues = []
+    async def _security_config(self, target: str, previous_results: Dict[str, Any]) -> tuple:
+        """Header audit over the apex and every live recon host (async, pooled)."""
         try:
-            import requests
-            resp = requests.get(f"https://{target}", timeout=8, verify=False)
-            if "https" not in resp.url:
-                issues.append({"type": "ssl_config", "issue": "No HTTPS redirect",
-                               "severity": "medium", "description": "Site does not redirect HTTP to HTTPS"})
-            if not resp.headers.get("X-Frame-Options"):
-                issues.append({"type": "missing_header", "issue": "Missing X-Frame-Options",
-                               "severity": "medium", "description": "Click-jacking protection absent"})
-        except Exception:
-            pass
-        return issues
+            return await header_auditor.audit(live_hosts(target, previous_results))
+        except Exception as e:
+            self.log_activity(f"Header audit failed: {e}", "warning")
+            return [], {}
 
     async def _risk_assessment(self, results: Dict[str, Any]) -> Dict[str, Any]:
+        # same model the batch re-scorer applies to stored assessments:
+        # likely-exploited findings weigh more, x(1 + EPSS) and x2 when in CISA KEV
+        severities, epss, kev = finding_signals(results)
+        score, level = risk_model.score(severities, epss, kev)
+
         counts = {"critical": 0, "high": 0, "medium": 0, "low": 0, "info": 0}
-        for v in results["vulnerabilities"]:
-            counts[v.get("severity", "info").lower()] += 1
-        for s in results["security_issues"]:
-            counts[s.get("severity", "info").lower()] += 1
-
-        score = counts["critical"] * 10 + counts["high"] * 7 + counts["medium"] * 4 + counts["low"]
-        level = "low"
-        if score >= 50:
-            level = "critical"
-        elif score >= 25:
-            level = "high"
-        elif score >= 10:
-            level = "medium"
+        for sev in severities:
+            counts[sev] = counts.get(sev, 0) + 1
 
         return {
             "overall_risk_level": level,
             "risk_score": score,
             "severity_breakdown": counts,
             "total_issues": sum(counts.values()),
+            "exploitability": {"kev_findings": sum(kev), "max_epss": max(epss, default=0.0)},
             "assessment_date": datetime.now().isoformat()
         }
 
+    async def ingest_job_findings(self, results: Dict[str, Any], tool: str,
+                                  findings: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Merge a finished scan job's findings into a vulnerability phase result and re-score it."""
+        dedup = FindingDeduplicator.from_findings(results.get("vulnerabilities") or [])
+        dedup.add_all(tool, findings)
+        results["vulnerabilities"] = dedup.findings()
+        results["deduplication"] = dedup.stats()
+        results["cve_matches"] = await self._analyze_cves(results["vulnerabilities"])
+        results["risk_assessment"] = await self._risk_assessment(results)
+        results["recommendations"] = await self._generate_recommendations(results)
+        return results
+
     async def _generate_recommendations(self, results: Dict[str, Any]) -> List[Dict[str, Any]]:
         recs = []
         if results["risk_assessment"].get("overall_risk_level") in ("critical", "high"):
@@ -68,16 +68,10 @@ async def get_assessment_status(assessment_id: str):
     return assessment
 
 @router.get("/assessments")
-async def get_assessments(client_id: Optional[str] = None):
-    """Get ALL assessments (not just active ones)"""
+async def get_assessments(client_id: Optional[str] = None, limit: Optional[int] = None, offset: int = 0):
+    """Get ALL assessments (not just active ones), as index summaries"""
     try:
-        all_assessments = []
-        for file_path in file_storage.assessments_dir.glob("*.json"):
-            assessment = file_storage._load_json(file_path)
-            if assessment:
-                if not client_id or assessment.get("client_id") == client_id:
-                    all_assessments.append(assessment)
-        
+        all_assessments = await file_storage.list_assessments(client_id=client_id, limit=limit, offset=offset)
         return {"assessments": all_assessments, "count": len(all_assessments)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving assessments: {str(e)}")
@@ -92,12 +86,7 @@ async def get_active_assessments(client_id: Optional[str] = None):
 async def get_assessments_by_status(status: str):
     """Get assessments by specific status"""
     try:
-        all_assessments = []
-        for file_path in file_storage.assessments_dir.glob("*.json"):
-            assessment = file_storage._load_json(file_path)
-            if assessment and assessment.get("status") == status:
-                all_assessments.append(assessment)
-        
+        all_assessments = await file_storage.list_assessments(status=status)
         return {"assessments": all_assessments, "count": len(all_assessments), "status": status}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving assessments: {str(e)}")
@@ -106,12 +95,7 @@ async def get_assessments_by_status(status: str):
 async def get_assessments_by_target(target: str):
     """Get assessments by target"""
     try:
-        all_assessments = []
-        for file_path in file_storage.assessments_dir.glob("*.json"):
-            assessment = file_storage._load_json(file_path)
-            if assessment and assessment.get("target") == target:
-                all_assessments.append(assessment)
-        
+        all_assessments = await file_storage.list_assessments(target=target)
         return {"assessments": all_assessments, "count": len(all_assessments), "target": target}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving assessments: {str(e)}")
@@ -129,13 +113,12 @@ async def update_assessment_status(assessment_id: str, status: str):
 async def delete_assessment(assessment_id: str):
     """Delete assessment"""
     try:
-        import os
-        file_path = file_storage.assessments_dir / f"{assessment_id}.json"
-        if file_path.exists():
-            file_path.unlink()
+        if await file_storage.delete_assessment(assessment_id):
             return {"message": f"Assessment {assessment_id} deleted successfully"}
         else:
             raise HTTPException(status_code=404, detail="Assessment not found")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting assessment: {str(e)}")
 
@@ -0,0 +1,212 @@
+"""
+Local Ollama stand-in for RedStorm benchmarks and tests
+Speaks the subset of the Ollama HTTP API that agents.ollama_analyst uses
+(HEAD /, /api/tags, /api/ps, /api/pull, /api/generate streaming and not)
+with configurable load time, first-token latency, token rate, parallel
+slots and canned answers, so the LLM path runs without a model or a GPU.
+
+    python -m benchmarks.fake_ollama --port 11434 --latency 0.3 --rate 40
+    OLLAMA_URL=http://127.0.0.1:11434 python fastApi.py
+"""
+import re
+import json
+import time
+import asyncio
+import argparse
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+DEFAULT_MODEL = "llama3.1:8b"
+
+# (prompt regex, answer); first match wins, `default_answer` otherwise
+DEFAULT_ANSWERS: List[Tuple[str, str]] = [
+    (r"single word", "http"),
+    (r"valid JSON only", '{"risk": 5, "tip": "Patch exposed services"}'),
+    (r"phase of an assessment", "Two high-severity findings on exposed web services; "
+                                "outdated server software enables exploitation."),
+]
+
+
+@dataclass
+class FakeOllamaConfig:
+    model: str = DEFAULT_MODEL
+    load_time: float = 0.0          # first generation after start (cold model)
+    latency: float = 0.2            # prompt evaluation before the first token
+    token_rate: float = 50.0        # generated tokens per second
+    parallel: int = 1               # concurrent generations (OLLAMA_NUM_PARALLEL)
+    answers: List[Tuple[str, str]] = field(default_factory=lambda: list(DEFAULT_ANSWERS))
+    default_answer: str = ("Overall risk 7/10. Critical: exposed admin interface, outdated web server, "
+                           "weak TLS configuration. Recommendation: restrict management access and patch.")
+
+    def answer(self, prompt: str) -> str:
+        for pattern, text in self.answers:
+            if re.search(pattern, prompt, re.I):
+                return text
+        return self.default_answer
+
+
+def _tokens(text: str) -> List[str]:
+    # llama-sized pieces: words with their leading space
+    return re.findall(r"\s*\S+", text)
+
+
+def create_app(config: Optional[FakeOllamaConfig] = None) -> FastAPI:
+    config = config or FakeOllamaConfig()
+    app = FastAPI(title="fake-ollama")
+    state: Dict[str, Any] = {"loaded": False, "requests": 0, "active": 0, "peak_active": 0,
+                             "queued": 0, "tokens": 0}
+    slots: Dict[str, asyncio.Semaphore] = {}
+
+    def slot() -> asyncio.Semaphore:
+        # created lazily: must belong to the loop uvicorn serves on
+        if "sem" not in slots:
+            slots["sem"] = asyncio.Semaphore(max(1, config.parallel))
+        return slots["sem"]
+
+    def chunk(body: Dict[str, Any], **extra) -> Dict[str, Any]:
+        return {"model": body.get("model", config.model),
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), **extra}
+
+    async def generate(body: Dict[str, Any]):
+        """Yields response tokens; holds one parallel slot for the whole generation."""
+        state["queued"] += 1
+        async with slot():
+            state["queued"] -= 1
+            state["active"] += 1
+            state["peak_active"] = max(state["peak_active"], state["active"])
+            try:
+                if not state["loaded"]:
+                    await asyncio.sleep(config.load_time)
+                    state["loaded"] = True
+                if not body.get("prompt"):
+                    return                              # load-only request (warm-up)
+                await asyncio.sleep(config.latency)
+                delay = 1.0 / config.token_rate if config.token_rate > 0 else 0.0
+                for token in _tokens(config.answer(body["prompt"])):
+                    if delay:
+                        await asyncio.sleep(delay)
+                    state["tokens"] += 1
+                    yield token
+            finally:
+                state["active"] -= 1
+
+    @app.head("/")
+    @app.get("/")
+    async def root():
+        return Response("Ollama is running", media_type="text/plain")
+
+    @app.get("/api/tags")
+    async def tags():
+        return {"models": [{"name": config.model, "model": config.model, "size": 4_920_753_328}]}
+
+    @app.get("/api/ps")
+    async def ps():
+        return {"models": [{"name": config.model, "model": config.model}] if state["loaded"] else []}
+
+    @app.post("/api/pull")
+    async def pull():
+        return {"status": "success"}
+
+    @app.post("/api/generate")
+    async def api_generate(request: Request):
+        body = await request.json()
+        state["requests"] += 1
+        started = time.perf_counter()
+
+        def final(count: int) -> Dict[str, Any]:
+            reason = "load" if not body.get("prompt") else "stop"
+            return chunk(body, response="", done=True, done_reason=reason, eval_count=count,
+                         total_duration=int((time.perf_counter() - started) * 1e9))
+
+        if body.get("stream", True) is False:
+            parts = [t async for t in generate(body)]
+            return JSONResponse({**final(len(parts)), "response": "".join(parts)})
+
+        async def lines():
+            count = 0
+            async for token in generate(body):
+                count += 1
+                yield json.dumps(chunk(body, response=token, done=False)) + "\n"
+            yield json.dumps(final(count)) + "\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    @app.get("/_fake/stats")
+    async def stats():
+        return {**state, "config": {k: v for k, v in vars(config).items() if k != "answers"}}
+
+    return app
+
+
+class FakeOllamaServer:
+    """Runs the stand-in on its own thread and event loop (benchmarks, tests)."""
+
+    def __init__(self, config: Optional[FakeOllamaConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or FakeOllamaConfig()
+        self.host, self.port = host, port
+        self._server: Optional[uvicorn.Server] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self, timeout: float = 10.0) -> "FakeOllamaServer":
+        self._server = uvicorn.Server(uvicorn.Config(create_app(self.config), host=self.host, port=self.port,
+                                                     log_level="warning", lifespan="off"))
+        self._thread = threading.Thread(target=self._server.run, name="fake-ollama", daemon=True)
+        self._thread.start()
+        deadline = time.monotonic() + timeout
+        while not self._server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError("fake Ollama server did not start")
+            time.sleep(0.01)
+        if not self.port:                       # port 0: read back the bound port
+            self.port = self._server.servers[0].sockets[0].getsockname()[1]
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.should_exit = True
+            self._thread.join(timeout=10)
+            self._server = self._thread = None
+
+    def __enter__(self) -> "FakeOllamaServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def _load_answers(path: str) -> List[Tuple[str, str]]:
+    # {"regex": "answer", ...}, tried in file order before the built-in answers
+    with open(path, "r", encoding="utf-8") as f:
+        return list(json.load(f).items()) + list(DEFAULT_ANSWERS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Ollama stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--load-time", type=float, default=0.0, help="cold model load, seconds")
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds before the first token")
+    parser.add_argument("--rate", type=float, default=50.0, help="tokens per second (0 = instant)")
+    parser.add_argument("--parallel", type=int, default=1, help="concurrent generations")
+    parser.add_argument("--answers", help="JSON file mapping prompt regex -> canned answer")
+    args = parser.parse_args()
+
+    config = FakeOllamaConfig(model=args.model, load_time=args.load_time, latency=args.latency,
+                              token_rate=args.rate, parallel=args.parallel)
+    if args.answers:
+        config.answers = _load_answers(args.answers)
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="info")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+End-to-end AI report benchmark for RedStorm
+Runs the orchestrator's AI steps (service hint + final report) for N
+concurrent synthetic assessments against the local Ollama stand-in and
+reports per-assessment latency (first token, complete report) and
+event-loop responsiveness (lag of a 10 ms ticker) while they run.
+
+    python -m benchmarks.report_latency --assessments 1 4 8 --findings 800
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.fake_ollama import FakeOllamaConfig, FakeOllamaServer
+
+TICK = 0.01
+
+
+def synthetic_results(hosts: int, findings: int, seed: int) -> Dict[str, Any]:
+    """Phase results shaped like the agents' output, sized by hosts/findings."""
+    rnd = random.Random(seed)
+    severities = ("critical", "high", "medium", "low", "info")
+    ports = [{"host": f"10.0.{h // 250}.{h % 250}", "port": p, "service": s, "version": v}
+             for h in range(hosts)
+             for p, s, v in rnd.sample([(22, "ssh", "OpenSSH 8.2"), (80, "http", "nginx 1.18.0"),
+                                        (443, "https", "nginx 1.18.0"), (3306, "mysql", "MySQL 5.7"),
+                                        (8080, "http", "Apache Tomcat 9.0")], 3)]
+    vulns = [{"template_id": f"CVE-20{rnd.randint(15, 24)}-{rnd.randint(1000, 99999)}",
+              "name": f"Finding {i}", "severity": rnd.choice(severities),
+              "host": rnd.choice(ports)["host"], "description": "Lorem ipsum dolor sit amet " * 8,
+              "raw": "x" * 500}
+             for i in range(findings)]
+    return {
+        "preengagement": {"is_available": True, "response_time": 0.12},
+        "reconnaissance": {"subdomains": [f"s{i}.example.com" for i in range(hosts)],
+                           "technologies": [{"name": "WordPress", "category": "CMS", "confidence": "medium"},
+                                            {"name": "nginx/1.18.0", "category": "Web Server", "confidence": "high"}],
+                           "raw_tools": {"subfinder": {"stdout": "y" * 20000}}},
+        "scanning": {"open_ports": ports, "services": ports},
+        "vulnerability": {"vulnerabilities": vulns,
+                          "risk_assessment": {"overall_risk": "high", "risk_score": 7.4}},
+    }
+
+
+class _Recorder:
+    """websocket_manager stand-in: timestamps report tokens per client."""
+
+    def __init__(self):
+        self.first_token: Dict[str, float] = {}
+
+    async def send_personal_message(self, message: str, client_id: str):
+        if client_id not in self.first_token and '"report_token"' in message[:40]:
+            self.first_token[client_id] = time.perf_counter()
+
+
+async def _ticker(lags: List[float], stop: asyncio.Event):
+    while not stop.is_set():
+        expected = time.perf_counter() + TICK
+        await asyncio.sleep(TICK)
+        lags.append(max(0.0, time.perf_counter() - expected))
+
+
+def _pct(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def run_round(orchestrator, assessments: int, hosts: int, findings: int, round_id: int) -> Dict[str, Any]:
+    recorder = _Recorder()
+    lags: List[float] = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(_ticker(lags, stop))
+
+    async def one(i: int) -> Dict[str, float]:
+        assessment_id = client_id = f"bench-{round_id}-{i}"
+        orchestrator.active_assessments[assessment_id] = {
+            "target": f"bench{round_id}-{i}.example.com", "client_id": client_id, "status": "running",
+            "results": synthetic_results(hosts, findings, seed=round_id * 1000 + i),
+            "ai_service_hint": "http", "ai_final_report": "", "ai_prompt_stats": {}, "cancelled": False,
+        }
+        started = time.perf_counter()
+        await orchestrator._select_ai_service(assessment_id)
+        hinted = time.perf_counter()
+        await orchestrator._generate_final_report(assessment_id, client_id, recorder)
+        done = time.perf_counter()
+        assessment = orchestrator.active_assessments.pop(assessment_id)
+        return {"hint_s": hinted - started, "first_token_s": recorder.first_token.get(client_id, done) - started,
+                "report_s": done - started, "mode": assessment["ai_prompt_stats"].get("final_report", {}).get("mode"),
+                "hint_source": assessment.get("service_hint_decision", {}).get("source")}
+
+    started = time.perf_counter()
+    runs = await asyncio.gather(*(one(i) for i in range(assessments)))
+    wall = time.perf_counter() - started
+    stop.set()
+    await ticker
+
+    reports = [r["report_s"] for r in runs]
+    return {
+        "assessments": assessments,
+        "wall_s": round(wall, 3),
+        "report_s": {"p50": round(statistics.median(reports), 3), "max": round(max(reports), 3)},
+        "first_token_s": {"p50": round(statistics.median(r["first_token_s"] for r in runs), 3)},
+        "hint_s": {"max": round(max(r["hint_s"] for r in runs), 3)},
+        "modes": sorted({r["mode"] for r in runs if r["mode"]}),
+        "hint_sources": sorted({r["hint_source"] for r in runs if r["hint_source"]}),
+        "loop_lag_ms": {"p50": round(_pct(lags, 0.5) * 1000, 2), "p95": round(_pct(lags, 0.95) * 1000, 2),
+                        "p99": round(_pct(lags, 0.99) * 1000, 2), "max": round(max(lags, default=0.0) * 1000, 2)},
+    }
+
+
+async def main_async(args) -> List[Dict[str, Any]]:
+    # imported after OLLAMA_URL is set: the client reads it at import time
+    from agents.orchestrator import AgentOrchestrator
+    from agents import ollama_analyst
+    from utils.llm_cache import llm_cache
+    from utils.llm_scheduler import llm_scheduler
+
+    llm_cache.cache_dir = Path(args.cache_dir)
+    llm_scheduler.max_concurrency = args.parallel
+    orchestrator = AgentOrchestrator()
+    results = []
+    try:
+        for round_id, count in enumerate(args.assessments):
+            results.append(await run_round(orchestrator, count, args.hosts, args.findings, round_id))
+            results[-1]["scheduler"] = {k: v for k, v in llm_scheduler.metrics().items()
+                                        if k in ("wait_ms", "run_ms", "coalesced")}
+    finally:
+        await ollama_analyst.aclose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AI report latency under concurrent assessments")
+    parser.add_argument("--assessments", type=int, nargs="+", default=[1, 4, 8], help="concurrency levels")
+    parser.add_argument("--hosts", type=int, default=50)
+    parser.add_argument("--findings", type=int, default=400)
+    parser.add_argument("--latency", type=float, default=0.2, help="fake model first-token latency, s")
+    parser.add_argument("--rate", type=float, default=200.0, help="fake model tokens per second")
+    parser.add_argument("--parallel", type=int, default=2, help="model slots (fake server and scheduler)")
+    parser.add_argument("--cache-dir", default=None, help="LLM cache dir (default: fresh temp dir = cold cache)")
+    args = parser.parse_args()
+
+    server = FakeOllamaServer(FakeOllamaConfig(latency=args.latency, token_rate=args.rate,
+                                               parallel=args.parallel)).start()
+    os.environ["OLLAMA_URL"] = server.url
+    with tempfile.TemporaryDirectory() as tmp:
+        args.cache_dir = args.cache_dir or tmp
+        try:
+            results = asyncio.run(main_async(args))
+        finally:
+            server.stop()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Storage I/O benchmark for RedStorm
+Measures API latency (stored-assessment lookup and statistics through the
+FastAPI app, in-process) while large assessment reports are saved in the
+background: idle (no saves) as the baseline, saves done synchronously on the
+event loop (how every FileStorageManager write used to run), and saves
+through the storage I/O pool with write coalescing.
+
+    python -m benchmarks.storage_latency --seconds 5 --findings 5000
+"""
+import os
+import sys
+import json
+import time
+import logging
+import asyncio
+import argparse
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.report_latency import synthetic_results
+
+PROBE_INTERVAL = 0.02
+
+
+def _pct(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def run_mode(app, file_storage, mode: str, seconds: float, report: Dict[str, Any],
+                   writers: int, probe_id: str) -> Dict[str, Any]:
+    import httpx
+
+    stop = asyncio.Event()
+    saves: List[float] = []
+
+    async def writer(n: int):
+        # each writer keeps re-saving "its" growing assessment, like phase updates do
+        assessment_id = f"bench-{mode}-{n}"
+        while not stop.is_set():
+            doc = {**report, "assessment_id": assessment_id, "status": "running", "saved_at": time.time()}
+            started = time.perf_counter()
+            if mode == "blocking":
+                file_storage._write_assessment(doc)
+            else:
+                await file_storage.save_assessment(assessment_id, doc)
+            saves.append(time.perf_counter() - started)
+            await asyncio.sleep(0)
+
+    latencies: List[float] = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        paths = (f"/api/v1/assessments/{probe_id}", "/api/v1/statistics")
+        tasks = [asyncio.create_task(writer(n)) for n in range(writers if mode != "idle" else 0)]
+        deadline = time.perf_counter() + seconds
+        i = 0
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            resp = await client.get(paths[i % len(paths)])
+            resp.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+            i += 1
+            await asyncio.sleep(PROBE_INTERVAL)
+        stop.set()
+        await asyncio.gather(*tasks)
+    await file_storage.flush()
+
+    return {
+        "mode": mode,
+        "api_requests": len(latencies),
+        "api_latency_ms": {q: round(_pct(latencies, v) * 1000, 2)
+                           for q, v in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))}
+                          | {"max": round(max(latencies, default=0.0) * 1000, 2)},
+        "saves": len(saves),
+        "save_ms_p50": round(_pct(saves, 0.5) * 1000, 1),
+        "io": file_storage.io_stats() if mode == "pooled" else None,
+    }
+
+
+async def main_async(args) -> Dict[str, Any]:
+    # imported inside the temp data dir: the global managers use relative paths
+    from fastApi import app
+    from utils.file_storage import file_storage
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    report = {"target": "bench.example.com", "client_id": "bench",
+              "results": synthetic_results(args.hosts, args.findings, seed=7)}
+    size_mb = len(json.dumps(report, indent=2)) / 1e6
+    probe_id = await file_storage.create_assessment({"client_id": "bench", "target": "probe", "status": "completed"})
+
+    results = []
+    for mode in ("idle", "blocking", "pooled"):
+        results.append(await run_mode(app, file_storage, mode, args.seconds, report, args.writers, probe_id))
+    return {"report_mb": round(size_mb, 1), "writers": args.writers, "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API latency while large reports are saved")
+    parser.add_argument("--seconds", type=float, default=5.0, help="duration per mode")
+    parser.add_argument("--hosts", type=int, default=200)
+    parser.add_argument("--findings", type=int, default=5000)
+    parser.add_argument("--writers", type=int, default=2, help="concurrent assessments being saved")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            out = asyncio.run(main_async(args))
+        finally:
+            os.chdir(cwd)
+    print(json.dumps(out, indent=2))
+
+
+if __name__ == "__main__":
+    main()
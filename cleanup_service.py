@@ -30,6 +30,8 @@ class CleanupService:
         # Configuration
         self.data_retention_hours = 3  # Keep data for 3 hours
         self.log_retention_hours = 1   # Keep logs for 1 hour
+        # live state of the running API, never aged out (storage metadata index + its WAL)
+        self.preserved_prefixes = ("index.sqlite3",)
         
         logger.info(f"Cleanup service initialized")
         logger.info(f"Data directory: {self.data_dir}")
@@ -55,6 +57,10 @@ class CleanupService:
         age_hours = self.get_file_age(file_path)
         return age_hours > max_age_hours
     
+    def is_preserved(self, file_name: str) -> bool:
+        """Check if file belongs to live API state"""
+        return file_name.startswith(self.preserved_prefixes)
+    
     def safe_remove(self, path: Path) -> bool:
         """Safely remove file or directory"""
         try:
@@ -90,6 +96,8 @@ class CleanupService:
             # Check files
             for file in files:
                 file_path = root_path / file
+                if self.is_preserved(file):
+                    continue
                 if self.is_file_old(file_path, self.data_retention_hours):
                     file_size = file_path.stat().st_size if file_path.exists() else 0
                     if self.safe_remove(file_path):
@@ -162,6 +170,8 @@ class CleanupService:
                 root_path = Path(root)
                 for file in files:
                     file_path = root_path / file
+                    if self.is_preserved(file):
+                        continue
                     if self.is_file_old(file_path, self.data_retention_hours):
                         try:
                             size = file_path.stat().st_size
@@ -21,6 +21,13 @@ from utils.websocket_manager import WebSocketManager
 from utils.cache_manager import cache_manager
 from utils.ethical_boundaries import ethical_boundaries
 from utils.file_storage import file_storage
+from utils.exploit_intel import exploit_intel
+from utils.risk_scoring import RiskRescorer, ScoringModel, risk_model
+from utils.tool_timing import tool_timings
+from utils.scan_jobs import scan_jobs
+from utils.llm_cache import llm_cache
+from utils.llm_scheduler import llm_scheduler
+from agents import ollama_analyst
 
 # ---------------------------------------------------------------------------
 # Logging
@@ -50,6 +57,12 @@ class AssessmentStop(BaseModel):
     assessment_id: Optional[str] = None
     reason: Optional[str] = "user_requested"
 
+class RescoreRequest(BaseModel):
+    model: Optional[Dict[str, Any]] = None   # overrides on top of the current model
+    refresh_intel: bool = False              # re-read EPSS/KEV from the local store
+    dry_run: bool = False
+    save_model: bool = False                 # make the model the scan-time default
+
 # ---------------------------------------------------------------------------
 # FastAPI app
 # ---------------------------------------------------------------------------
@@ -95,6 +108,11 @@ async def startup():
     try:
         await cache_manager.connect()
         health = await file_storage.health_check()
+        if exploit_intel.open():
+            logger.info("✓ Exploit intel store mapped (%d CVEs)", exploit_intel.count)
+        scan_jobs.load()
+        scan_jobs.ensure_running()
+        ollama_analyst.start_monitor()          # background warm-up + readiness
         logger.info("✓ Redis cache connected")
         logger.info("✓ File-storage health: %s", health)
     except Exception as exc:
@@ -111,6 +129,9 @@ async def shutdown():
     for aid, data in orchestrator.active_assessments.items():
         if data.get("status") == "running":
             data["cancelled"] = True
+    await scan_jobs.stop()
+    await ollama_analyst.aclose()
+    await file_storage.close()              # queued assessment writes, event-log committers
     await cache_manager.disconnect()
     logger.info("✓ Shutdown complete")
 
@@ -236,13 +257,52 @@ async def list_assessments(client_id: Optional[str] = None, status: Optional[str
         if (not client_id or adata.get("client_id") == client_id)
         and (not status or adata.get("status") == status)
     ]
-    stored = await file_storage.get_active_assessments(client_id)
-    for s in stored:
-        s["source"] = "stored"
+    # stored summaries come from the storage index, not from parsing every file
+    if status:
+        stored = await file_storage.list_assessments(client_id=client_id, status=status)
+    else:
+        stored = await file_storage.get_active_assessments(client_id)
+    stored = [{"source": "stored", **s} for s in stored
+              if s["assessment_id"] not in orchestrator.active_assessments]
     merged = active + stored
-    merged.sort(key=lambda x: x.get("start_time", ""), reverse=True)
+    merged.sort(key=lambda x: str(x.get("start_time") or x.get("created_at") or ""), reverse=True)
     return {"assessments": merged, "count": len(merged)}
 
+@app.post("/api/v1/assessments/rescore")
+async def rescore_assessments(req: RescoreRequest):
+    try:
+        model = ScoringModel.from_dict(req.model or {}, base=risk_model)
+        summary = await RiskRescorer(file_storage).rescore(
+            model, refresh_intel=req.refresh_intel, write=not req.dry_run)
+        if req.save_model and not req.dry_run:
+            model.save()
+            risk_model.update(model)
+        return summary
+    except Exception as exc:
+        logger.exception("Re-scoring error")
+        return JSONResponse(status_code=500, content={"error": str(exc)})
+
+@app.get("/api/v1/scan-jobs")
+async def list_scan_jobs(assessment_id: Optional[str] = None):
+    """Long-running scanner jobs (OpenVAS) and their state."""
+    jobs = scan_jobs.list(assessment_id)
+    return {"jobs": jobs, "count": len(jobs)}
+
+@app.get("/api/v1/tools/timings")
+async def tool_timing_stats():
+    """Learned p95 durations, deadlines and kill counts per tool and target class."""
+    return {"timings": tool_timings.summary(), "timestamp": datetime.now().isoformat()}
+
+@app.get("/api/v1/llm/metrics")
+async def llm_metrics():
+    """LLM queue depth, wait/run latency percentiles, cache and model readiness."""
+    return {
+        "scheduler": llm_scheduler.metrics(),
+        "cache": llm_cache.stats(),
+        "model": ollama_analyst.status(),
+        "timestamp": datetime.now().isoformat(),
+    }
+
 @app.get("/api/v1/vulnerabilities")
 async def get_vulnerabilities(
     assessment_id: Optional[str] = None,
@@ -324,7 +384,7 @@ async def health():
         storage = cache = {"status": "unhealthy", "error": str(e)}
     return {
         "status": "healthy" if storage["status"] == "healthy" and cache["status"] == "healthy" else "degraded",
-        "components": {"file_storage": storage, "cache": cache},
+        "components": {"file_storage": storage, "cache": cache, "llm": ollama_analyst.status()},
         "active_assessments": len(orchestrator.active_assessments),
         "websocket_connections": len(active_connections),
         "timestamp": datetime.now().isoformat(),
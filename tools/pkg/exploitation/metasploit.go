@@ -51,6 +51,7 @@ func NewExploitCommand() *cobra.Command {
 	var (
 		target  string
 		service string
+		modules []string
 	)
 	cmd := &cobra.Command{
 		Use:   "exploit",
@@ -60,32 +61,37 @@ func NewExploitCommand() *cobra.Command {
 				fmt.Fprintln(os.Stderr, "❗  -t <target> required")
 				os.Exit(1)
 			}
-			res := performMetasploitAnalysis(target, service)
+			res := performMetasploitAnalysis(target, service, modules)
 			outputJSON(res)
 		},
 	}
 	cmd.Flags().StringVarP(&target, "target", "t", "", "target IP or domain")
 	cmd.Flags().StringVarP(&service, "service", "s", "http", "target service (ssh, http, smb, …)")
+	cmd.Flags().StringSliceVarP(&modules, "module", "m", nil, "explicit exploit modules (skips the service search)")
 	return cmd
 }
 
 /* ---------- business logic ---------- */
-func performMetasploitAnalysis(target, service string) MetasploitResult {
+func performMetasploitAnalysis(target, service string, modules []string) MetasploitResult {
 	res := MetasploitResult{
 		Target:    target,
 		Status:    "running",
 		Timestamp: time.Now().Format(time.RFC3339),
 	}
 
-	// 1. search exploits
-	allExploits := searchExploits(target, service)
-	var filtered []ExploitInfo
-	for _, e := range allExploits {
-		if e.Rank == "excellent" || e.Rank == "great" {
-			filtered = append(filtered, e)
+	// 1. explicit modules (pre-selected from the module index) or search exploits
+	if len(modules) > 0 {
+		res.Exploits = selectedExploits(modules)
+	} else {
+		allExploits := searchExploits(target, service)
+		var filtered []ExploitInfo
+		for _, e := range allExploits {
+			if e.Rank == "excellent" || e.Rank == "great" {
+				filtered = append(filtered, e)
+			}
 		}
+		res.Exploits = filtered
 	}
-	res.Exploits = filtered
 
 	// 2. search payloads
 	res.Payloads = searchPayloads(service)
@@ -156,6 +162,27 @@ func searchExploits(target, service string) []ExploitInfo {
 	return exploits
 }
 
+/* ---------- explicit modules ---------- */
+// selectedExploits describes modules chosen by the caller; rank and
+// references come from the caller's module index, so msfconsole is not run.
+func selectedExploits(modules []string) []ExploitInfo {
+	var exploits []ExploitInfo
+	for _, m := range modules {
+		name := strings.TrimPrefix(strings.TrimSpace(m), "exploit/")
+		if name == "" {
+			continue
+		}
+		name = "exploit/" + name
+		exploits = append(exploits, ExploitInfo{
+			Name:     name,
+			CVE:      findCVE(name),
+			Rank:     "selected",
+			Platform: extractPlatform(name),
+		})
+	}
+	return exploits
+}
+
 /* ---------- payload search ---------- */
 func searchPayloads(service string) []PayloadInfo {
 	// CI fallback
@@ -4,7 +4,9 @@ package vulnerability
 import (
 	"bufio"
 	"context"
+	"crypto/sha256"
 	"embed"
+	"encoding/hex"
 	"encoding/json"
 	"fmt"
 	"io"
@@ -12,6 +14,7 @@ import (
 	"os"
 	"os/exec"
 	"path/filepath"
+	"strconv"
 	"strings"
 	"time"
 
@@ -21,6 +24,11 @@ import (
 //go:embed all:templates
 var templatesFS embed.FS
 
+// TemplatesHash identifies the embedded template set. Release builds stamp it
+// at link time (see Makefile: -X redstorm-tools/pkg/vulnerability.TemplatesHash=…)
+// so no run has to read the embedded tree to find its cache directory.
+var TemplatesHash string
+
 /* ---------- data models ---------- */
 type NucleiResult struct {
 	Target          string        `json:"target"`
@@ -35,6 +43,7 @@ type NucleiVuln struct {
 	Severity    string `json:"severity"`
 	Description string `json:"description"`
 	MatchedAt   string `json:"matched_at"`
+	MatcherName string `json:"matcher_name,omitempty"`
 }
 
 type NucleiSummary struct {
@@ -44,8 +53,12 @@ type NucleiSummary struct {
 /* ---------- cobra command ---------- */
 func NewNucleiCommand() *cobra.Command {
 	var (
-		target  string
-		timeout time.Duration
+		target       string
+		timeout      time.Duration
+		cacheRoot    string
+		templateList string
+		concurrency  int
+		rateLimit    int
 	)
 	cmd := &cobra.Command{
 		Use:   "nuclei",
@@ -55,28 +68,32 @@ func NewNucleiCommand() *cobra.Command {
 				fmt.Fprintln(os.Stderr, "❗  -t <target> required")
 				os.Exit(1)
 			}
-			res := RunNuclei(target, timeout)
+			res := RunNuclei(target, timeout, cacheRoot, templateList, concurrency, rateLimit)
 			out, _ := json.MarshalIndent(res, "", "  ")
 			fmt.Println(string(out))
 		},
 	}
 	cmd.Flags().StringVarP(&target, "target", "t", "", "Target URL")
 	cmd.Flags().DurationVar(&timeout, "timeout", 3*time.Minute, "Max scan time (e.g. 2m, 30s)")
+	cmd.Flags().StringVar(&cacheRoot, "templates-cache", "", "Persistent dir for extracted templates (default: user cache dir)")
+	cmd.Flags().StringVar(&templateList, "template-list", "", "File with template paths (relative to the template root) to run instead of the full set")
+	// sharded runs split the per-target budget between their workers
+	cmd.Flags().IntVar(&concurrency, "concurrency", 25, "Templates run in parallel (nuclei -c)")
+	cmd.Flags().IntVar(&rateLimit, "rate-limit", 150, "Max requests per second (nuclei -rl)")
 	return cmd
 }
 
 /* ---------- runner ---------- */
-func RunNuclei(target string, timeout time.Duration) NucleiResult {
+func RunNuclei(target string, timeout time.Duration, cacheRoot, templateList string, concurrency, rateLimit int) NucleiResult {
 	res := NucleiResult{Target: target, Status: "running"}
 
-	// 1. extract embedded templates to temp dir
-	templatesDir, err := extractTemplates()
+	// 1. reuse (or extract once) the content-hashed template tree
+	templatesDir, err := ensureTemplates(cacheRoot)
 	if err != nil {
 		res.Status = "error"
 		res.Vulnerabilities = []NucleiVuln{{Name: "Embed Error", Severity: "info", Description: err.Error()}}
 		return res
 	}
-	defer os.RemoveAll(templatesDir)
 
 	// 2. locate nuclei binary
 	bin, _ := exec.LookPath("nuclei")
@@ -88,18 +105,40 @@ func RunNuclei(target string, timeout time.Duration) NucleiResult {
 	ctx, cancel := context.WithTimeout(context.Background(), timeout)
 	defer cancel()
 
+	selected, err := readTemplateList(templateList, templatesDir)
+	if err != nil {
+		res.Status = "error"
+		res.Vulnerabilities = []NucleiVuln{{Name: "Template List Error", Severity: "info", Description: err.Error()}}
+		return res
+	}
+
+	// a selection is handed over as one directory, never as one -t per
+	// template: a full-corpus shard would otherwise approach ARG_MAX
+	runDir := templatesDir
+	if len(selected) > 0 {
+		runDir, err = selectionDir(templatesDir, selected)
+		if err != nil {
+			res.Status = "error"
+			res.Vulnerabilities = []NucleiVuln{{Name: "Template List Error", Severity: "info", Description: err.Error()}}
+			return res
+		}
+		defer removeTree(runDir)
+	}
+
 	args := []string{
 		"-u", target,
 		"-jsonl", "-silent",
 		"-severity", "info,low,medium,high,critical",
-		"-t", templatesDir,
-		"-c", "25",
-		"-rl", "150",
+		"-t", runDir,
+	}
+	args = append(args,
+		"-c", strconv.Itoa(max(concurrency, 1)),
+		"-rl", strconv.Itoa(max(rateLimit, 1)),
 		"-timeout", "7",
 		"-no-interactsh",
 		"-disable-update-check",
 		"-no-stdin",
-	}
+	)
 
 	cmd := exec.CommandContext(ctx, bin, args...)
 	stdout, err := cmd.StdoutPipe()
@@ -136,6 +175,7 @@ func RunNuclei(target string, timeout time.Duration) NucleiResult {
 			Severity:    str(m["info.severity"]),
 			Description: str(m["info.description"]),
 			MatchedAt:   str(m["matched-at"]),
+			MatcherName: str(m["matcher-name"]),
 		}
 		// fallback for templates that leave fields empty
 		if v.Severity == "" {
@@ -183,17 +223,177 @@ func str(v interface{}) string {
 	return ""
 }
 
-func extractTemplates() (string, error) {
-	tmpDir, err := os.MkdirTemp("", "nuclei-templates-*")
+// readTemplateList resolves a technology-aware selection (one relative path
+// per line) against the extracted template root. Empty file name -> full set.
+func readTemplateList(listFile, templatesDir string) ([]string, error) {
+	if listFile == "" {
+		return nil, nil
+	}
+	f, err := os.Open(listFile)
+	if err != nil {
+		return nil, err
+	}
+	defer f.Close()
+
+	var out []string
+	sc := bufio.NewScanner(f)
+	for sc.Scan() {
+		rel := strings.TrimSpace(sc.Text())
+		if rel == "" || strings.HasPrefix(rel, "#") {
+			continue
+		}
+		p := filepath.Join(templatesDir, filepath.FromSlash(rel))
+		if !strings.HasPrefix(p, templatesDir+string(os.PathSeparator)) {
+			continue // refuse paths escaping the template root
+		}
+		out = append(out, p)
+	}
+	return out, sc.Err()
+}
+
+// selectionDir mirrors the selected templates (same relative layout) into a
+// fresh .select-* directory next to the extracted sets. Entries are hard
+// links into the read-only tree, so building it copies no template data;
+// symlinks are the fallback where hard links are refused.
+func selectionDir(templatesDir string, selected []string) (string, error) {
+	cacheRoot := filepath.Dir(filepath.Dir(templatesDir))
+	dir, err := os.MkdirTemp(cacheRoot, ".select-*")
 	if err != nil {
 		return "", err
 	}
-	// replicate embedded tree to disk
-	err = fs.WalkDir(templatesFS, "templates", func(path string, d fs.DirEntry, err error) error {
+	for _, src := range selected {
+		rel, err := filepath.Rel(templatesDir, src)
+		if err != nil {
+			removeTree(dir)
+			return "", err
+		}
+		dst := filepath.Join(dir, rel)
+		if err := os.MkdirAll(filepath.Dir(dst), 0755); err != nil {
+			removeTree(dir)
+			return "", err
+		}
+		if err := os.Link(src, dst); err != nil && !os.IsExist(err) {
+			if err := os.Symlink(src, dst); err != nil && !os.IsExist(err) {
+				removeTree(dir)
+				return "", err
+			}
+		}
+	}
+	return dir, nil
+}
+
+/* ---------- persistent template cache ---------- */
+
+// ensureTemplates returns a read-only extracted copy of the embedded templates.
+// The copy lives in <cacheRoot>/<content-hash>/templates and is shared by every
+// run; it is only rewritten when the embedded set changes.
+func ensureTemplates(cacheRoot string) (string, error) {
+	if cacheRoot == "" {
+		dir, err := os.UserCacheDir()
 		if err != nil {
+			dir = os.TempDir()
+		}
+		cacheRoot = filepath.Join(dir, "redstorm-tools", "nuclei-templates")
+	}
+	sum, err := templatesKey(cacheRoot)
+	if err != nil {
+		return "", err
+	}
+	dest := filepath.Join(cacheRoot, sum)
+	if _, err := os.Stat(filepath.Join(dest, ".complete")); err == nil {
+		return filepath.Join(dest, "templates"), nil
+	}
+
+	if err := os.MkdirAll(cacheRoot, 0755); err != nil {
+		return "", err
+	}
+	tmpDir, err := os.MkdirTemp(cacheRoot, ".extract-*")
+	if err != nil {
+		return "", err
+	}
+	if err := writeTemplates(tmpDir); err != nil {
+		removeTree(tmpDir)
+		return "", err
+	}
+	if err := os.WriteFile(filepath.Join(tmpDir, ".complete"), []byte(sum+"\n"), 0444); err != nil {
+		removeTree(tmpDir)
+		return "", err
+	}
+	if err := setReadOnly(filepath.Join(tmpDir, "templates")); err != nil {
+		removeTree(tmpDir)
+		return "", err
+	}
+
+	// atomic publish; a concurrent run may have won the race, which is fine
+	if err := os.Rename(tmpDir, dest); err != nil {
+		removeTree(tmpDir)
+		if _, statErr := os.Stat(filepath.Join(dest, ".complete")); statErr != nil {
+			return "", err
+		}
+	}
+	pruneTemplateCache(cacheRoot, sum)
+	return filepath.Join(dest, "templates"), nil
+}
+
+// templatesKey returns the cache key of the embedded set without hashing
+// ~54 MB per run: the link-time TemplatesHash when stamped, otherwise the
+// content hash computed once per executable (path, size, mtime) and kept
+// in <cacheRoot>/.builds.
+func templatesKey(cacheRoot string) (string, error) {
+	if TemplatesHash != "" {
+		return TemplatesHash, nil
+	}
+	var stamp string
+	if exe, err := os.Executable(); err == nil {
+		if st, err := os.Stat(exe); err == nil {
+			id := sha256.Sum256([]byte(fmt.Sprintf("%s|%d|%d", exe, st.Size(), st.ModTime().UnixNano())))
+			stamp = filepath.Join(cacheRoot, ".builds", hex.EncodeToString(id[:8]))
+			if data, err := os.ReadFile(stamp); err == nil && len(strings.TrimSpace(string(data))) == 16 {
+				return strings.TrimSpace(string(data)), nil
+			}
+		}
+	}
+	sum, err := templatesHash()
+	if err != nil {
+		return "", err
+	}
+	if stamp != "" && os.MkdirAll(filepath.Dir(stamp), 0755) == nil {
+		tmp := fmt.Sprintf("%s.%d.tmp", stamp, os.Getpid())
+		if os.WriteFile(tmp, []byte(sum+"\n"), 0644) == nil {
+			_ = os.Rename(tmp, stamp)
+		}
+	}
+	return sum, nil
+}
+
+// templatesHash fingerprints the embedded tree (paths + contents).
+func templatesHash() (string, error) {
+	h := sha256.New()
+	err := fs.WalkDir(templatesFS, "templates", func(path string, d fs.DirEntry, err error) error {
+		if err != nil || d.IsDir() {
 			return err
 		}
-		target := filepath.Join(tmpDir, path)
+		data, err := templatesFS.ReadFile(path)
+		if err != nil {
+			return err
+		}
+		h.Write([]byte(path))
+		h.Write([]byte{0})
+		h.Write(data)
+		return nil
+	})
+	if err != nil {
+		return "", err
+	}
+	return hex.EncodeToString(h.Sum(nil))[:16], nil
+}
+
+func writeTemplates(root string) error {
+	return fs.WalkDir(templatesFS, "templates", func(path string, d fs.DirEntry, err error) error {
+		if err != nil {
+			return err
+		}
+		target := filepath.Join(root, path)
 		if d.IsDir() {
 			return os.MkdirAll(target, 0755)
 		}
@@ -201,11 +401,62 @@ func extractTemplates() (string, error) {
 		if err != nil {
 			return err
 		}
-		return os.WriteFile(target, data, 0644)
+		return os.WriteFile(target, data, 0444)
+	})
+}
+
+// setReadOnly drops write permission on every directory below root
+// (files are already written 0444).
+func setReadOnly(root string) error {
+	var dirs []string
+	err := filepath.WalkDir(root, func(path string, d fs.DirEntry, err error) error {
+		if err == nil && d.IsDir() {
+			dirs = append(dirs, path)
+		}
+		return err
 	})
 	if err != nil {
-		os.RemoveAll(tmpDir)
-		return "", err
+		return err
 	}
-	return filepath.Join(tmpDir, "templates"), nil
-}
\ No newline at end of file
+	// children first so the walk above never hits a locked parent
+	for i := len(dirs) - 1; i >= 0; i-- {
+		if err := os.Chmod(dirs[i], 0555); err != nil {
+			return err
+		}
+	}
+	return nil
+}
+
+// removeTree restores write permission before deleting a read-only tree.
+func removeTree(root string) {
+	_ = filepath.WalkDir(root, func(path string, d fs.DirEntry, err error) error {
+		if err == nil && d.IsDir() {
+			_ = os.Chmod(path, 0755)
+		}
+		return nil
+	})
+	_ = os.RemoveAll(root)
+}
+
+// pruneTemplateCache deletes extracted sets from previous template versions.
+// Dot-prefixed entries are bookkeeping (.builds stamps, in-progress
+// .extract-* dirs of concurrent runs) and are left alone, except selection
+// dirs a killed run could not remove (older than a day).
+func pruneTemplateCache(cacheRoot, keep string) {
+	entries, err := os.ReadDir(cacheRoot)
+	if err != nil {
+		return
+	}
+	for _, e := range entries {
+		if e.IsDir() && strings.HasPrefix(e.Name(), ".select-") {
+			if info, err := e.Info(); err == nil && time.Since(info.ModTime()) > 24*time.Hour {
+				removeTree(filepath.Join(cacheRoot, e.Name()))
+			}
+			continue
+		}
+		if !e.IsDir() || e.Name() == keep || strings.HasPrefix(e.Name(), ".") {
+			continue
+		}
+		removeTree(filepath.Join(cacheRoot, e.Name()))
+	}
+}
@@ -27,23 +27,46 @@ type OpenVASResult struct {
 	Report string        `json:"report"` // base64 encoded XML when successful
 }
 
+// OpenVASJob is the handle printed by --start and --status: each call is a
+// few GMP round-trips, so the caller polls instead of holding a process for
+// the whole scan.
+type OpenVASJob struct {
+	Status   OpenVASStatus `json:"status"` // queued | running | done | error
+	TaskID   string        `json:"task_id"`
+	ReportID string        `json:"report_id,omitempty"`
+	Progress int           `json:"progress"`
+}
+
 /* ---------- public cobra command ---------- */
 func NewOpenVASCommand() *cobra.Command {
-	var target string
+	var target, statusTask, reportID string
+	var start bool
 	cmd := &cobra.Command{
 		Use:   "openvas",
 		Short: "OpenVAS fully-automated scan (Docker wrapper)",
 		Run: func(cmd *cobra.Command, args []string) {
-			if target == "" {
+			var res interface{}
+			switch {
+			case statusTask != "":
+				res = OpenVASTaskStatus(statusTask)
+			case reportID != "":
+				res = OpenVASReport(reportID)
+			case target == "":
 				fmt.Println("❗  -t <target> required")
 				os.Exit(1)
+			case start:
+				res = StartOpenVAS(target)
+			default:
+				res = RunOpenVAS(target)
 			}
-			res := RunOpenVAS(target)
 			out, _ := json.MarshalIndent(res, "", "  ")
 			fmt.Println(string(out))
 		},
 	}
 	cmd.Flags().StringVarP(&target, "target", "t", "", "hostname or IP to scan")
+	cmd.Flags().BoolVar(&start, "start", false, "start the scan and print its job handle instead of waiting")
+	cmd.Flags().StringVar(&statusTask, "status", "", "print the state of a started task (task id)")
+	cmd.Flags().StringVar(&reportID, "report", "", "print a finished report (report id)")
 	return cmd
 }
 
@@ -98,6 +121,90 @@ func RunOpenVAS(target string) OpenVASResult {
 	}
 }
 
+/* ---------- job-handle mode ---------- */
+
+// StartOpenVAS creates and starts the task, returning immediately.
+func StartOpenVAS(target string) OpenVASJob {
+	fmt.Println("OpenVAS: ensuring container …")
+	startContainer()
+	waitForServices()
+	setAdminPassword()
+
+	token := gmpLogin()
+	if token == "" {
+		return jobErr("", "login failed")
+	}
+	targetID := gmpCreateTarget(token, target)
+	if targetID == "" {
+		return jobErr("", "target creation failed")
+	}
+	taskID := gmpCreateTask(token, targetID, "auto-task-"+target)
+	if taskID == "" {
+		return jobErr("", "task creation failed")
+	}
+	gmpStartTask(token, taskID)
+	return OpenVASJob{Status: OpenVASStatus{State: "queued", Meaning: "task started"}, TaskID: taskID}
+}
+
+var (
+	reTaskStatus   = regexp.MustCompile(`<status>([^<]+)</status>`)
+	reTaskProgress = regexp.MustCompile(`<progress>(-?\d+)`)
+	reLastReport   = regexp.MustCompile(`<last_report><report id="([^"]+)"`)
+)
+
+// OpenVASTaskStatus is one non-blocking poll of a started task.
+func OpenVASTaskStatus(taskID string) OpenVASJob {
+	token := gmpLogin()
+	if token == "" {
+		return jobErr(taskID, "login failed")
+	}
+	b, err := gmpSend(fmt.Sprintf(`%s<get_tasks task_id="%s" details="1"/>`, token, taskID))
+	if err != nil {
+		return jobErr(taskID, err.Error())
+	}
+	job := OpenVASJob{TaskID: taskID}
+	status := ""
+	if m := reTaskStatus.FindSubmatch(b); len(m) >= 2 {
+		status = string(m[1])
+	}
+	if m := reTaskProgress.FindSubmatch(b); len(m) >= 2 {
+		fmt.Sscanf(string(m[1]), "%d", &job.Progress)
+	}
+	switch status {
+	case "Done":
+		if m := reLastReport.FindSubmatch(b); len(m) >= 2 {
+			job.ReportID = string(m[1])
+		}
+		job.Status, job.Progress = OpenVASStatus{State: "done", Meaning: status}, 100
+	case "New", "Requested", "Queued":
+		job.Status = OpenVASStatus{State: "queued", Meaning: status}
+	case "Running", "Processing":
+		job.Status = OpenVASStatus{State: "running", Meaning: status}
+	case "":
+		return jobErr(taskID, "task not found")
+	default: // Stopped, Interrupted, Delete Requested …
+		job.Status = OpenVASStatus{State: "error", Meaning: status}
+	}
+	return job
+}
+
+// OpenVASReport fetches a finished report (base64 XML).
+func OpenVASReport(reportID string) OpenVASResult {
+	token := gmpLogin()
+	if token == "" {
+		return ovasErr("login failed")
+	}
+	xmlB64 := gmpGetReport(token, reportID)
+	if xmlB64 == "" {
+		return ovasErr("report not available")
+	}
+	return OpenVASResult{Status: OpenVASStatus{State: "completed", Meaning: "report fetched"}, Report: xmlB64}
+}
+
+func jobErr(taskID, msg string) OpenVASJob {
+	return OpenVASJob{Status: OpenVASStatus{State: "error", Meaning: msg}, TaskID: taskID}
+}
+
 /* ---------- helpers ---------- */
 func ovasErr(msg string) OpenVASResult {
 	return OpenVASResult{
@@ -8,6 +8,8 @@ import (
 	"net/http"
 	"os/exec"
 	"os"
+	"regexp"
+	"strings"
 	"time"
 
 	"github.com/spf13/cobra"
@@ -19,8 +21,9 @@ type WPScanStatus struct {
 	Meaning string `json:"meaning"`
 }
 type WPScanResult struct {
-	Status   WPScanStatus `json:"status"`
-	Findings []string     `json:"findings"`
+	Status          WPScanStatus `json:"status"`
+	Findings        []string     `json:"findings"`
+	Vulnerabilities []NucleiVuln `json:"vulnerabilities"` // same finding schema as nuclei/zap
 }
 
 /* ---------- public command ---------- */
@@ -98,6 +101,7 @@ func RunWPScan(target string) WPScanResult {
 	if vulns, ok := m["vulnerabilities"].([]interface{}); ok && len(vulns) > 0 {
 		findings = append(findings, fmt.Sprintf("🔓 %d vulnerabilities found via API", len(vulns)))
 	}
+	vulns := wpscanVulns(target, m)
 	// users
 	if users, ok := m["users"].([]interface{}); ok && len(users) > 0 {
 		findings = append(findings, fmt.Sprintf("👤 %d users enumerated", len(users)))
@@ -107,11 +111,95 @@ func RunWPScan(target string) WPScanResult {
 	}
 	fmt.Printf("WPScan    : finished (%d findings)\n", len(findings))
 	return WPScanResult{
-		Status:   WPScanStatus{State: "completed", Meaning: fmt.Sprintf("WPScan finished (%d findings)", len(findings))},
-		Findings: findings,
+		Status:          WPScanStatus{State: "completed", Meaning: fmt.Sprintf("WPScan finished (%d findings)", len(findings))},
+		Findings:        findings,
+		Vulnerabilities: vulns,
 	}
 }
 
+/* ---------- finding schema ---------- */
+var wpSlug = regexp.MustCompile(`[^a-z0-9]+`)
+
+// wpscanVulns maps WPScan's JSON (core / theme / plugin vulnerabilities,
+// interesting findings) onto the template_id/name/severity/matched_at
+// schema, so the agent can merge it with nuclei and ZAP findings.
+func wpscanVulns(target string, m map[string]interface{}) []NucleiVuln {
+	var out []NucleiVuln
+	if m["version"] != nil || m["main_theme"] != nil || m["plugins"] != nil {
+		out = append(out, NucleiVuln{TemplateID: "wordpress-detect", Name: "WordPress Detection",
+			Severity: "info", MatchedAt: target})
+	}
+
+	addVulns := func(component string, v interface{}, location string) {
+		list, _ := v.([]interface{})
+		for _, item := range list {
+			vm, ok := item.(map[string]interface{})
+			if !ok {
+				continue
+			}
+			title := str(vm["title"])
+			id := "wpscan-" + strings.Trim(wpSlug.ReplaceAllString(strings.ToLower(title), "-"), "-")
+			if refs, ok := vm["references"].(map[string]interface{}); ok {
+				if cves, ok := refs["cve"].([]interface{}); ok && len(cves) > 0 {
+					id = "CVE-" + str(cves[0])
+				}
+			}
+			if location == "" {
+				location = target
+			}
+			out = append(out, NucleiVuln{TemplateID: id, Name: title, Severity: wpscanSeverity(vm),
+				Description: fmt.Sprintf("%s (fixed in %s)", component, str(vm["fixed_in"])), MatchedAt: location})
+		}
+	}
+	if version, ok := m["version"].(map[string]interface{}); ok {
+		addVulns("WordPress "+str(version["number"]), version["vulnerabilities"], "")
+	}
+	if theme, ok := m["main_theme"].(map[string]interface{}); ok {
+		addVulns("theme "+str(theme["slug"]), theme["vulnerabilities"], str(theme["location"]))
+	}
+	if plugins, ok := m["plugins"].(map[string]interface{}); ok {
+		for name, p := range plugins {
+			if pm, ok := p.(map[string]interface{}); ok {
+				addVulns("plugin "+name, pm["vulnerabilities"], str(pm["location"]))
+			}
+		}
+	}
+	if interesting, ok := m["interesting_findings"].([]interface{}); ok {
+		for _, item := range interesting {
+			im, ok := item.(map[string]interface{})
+			if !ok {
+				continue
+			}
+			out = append(out, NucleiVuln{TemplateID: "wpscan-" + strings.ToLower(str(im["type"])),
+				Name: str(im["to_s"]), Severity: "info", MatchedAt: str(im["url"])})
+		}
+	}
+	return out
+}
+
+// wpscanSeverity derives a severity from the CVSS score the API attaches (if any).
+func wpscanSeverity(v map[string]interface{}) string {
+	cvss, _ := v["cvss"].(map[string]interface{})
+	score, ok := cvss["score"].(float64)
+	if s := str(cvss["score"]); !ok && s != "" {
+		_, err := fmt.Sscanf(s, "%f", &score)
+		ok = err == nil
+	}
+	switch {
+	case !ok:
+		return "medium"
+	case score >= 9:
+		return "critical"
+	case score >= 7:
+		return "high"
+	case score >= 4:
+		return "medium"
+	case score > 0:
+		return "low"
+	}
+	return "info"
+}
+
 /* ---------- token validator ---------- */
 func isTokenValid(token string) bool {
 	if token == "" {
@@ -0,0 +1,227 @@
+"""
+Attack graph for RedStorm
+Hosts, services, vulnerabilities, credentials and access levels from the
+scanning and vulnerability phases become one directed graph; the most
+probable path to each high-value asset is a shortest path over -log(p)
+edge weights, the cheapest one a shortest path over attacker effort (hours).
+Credential reuse goes through one shared hub node, so lateral movement costs
+O(hosts) edges instead of O(hosts^2).
+"""
+import math
+import heapq
+import logging
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+logger = logging.getLogger("redstorm.attack_graph")
+
+ENTRY = "internet"
+CREDENTIAL_HUB = "credentials:harvested"
+
+# exploit success per finding severity; raised to EPSS and to 0.95 when in KEV
+SEVERITY_PROBABILITY = {"critical": 0.9, "high": 0.7, "medium": 0.4, "low": 0.15, "info": 0.02}
+SEVERITY_HOURS = {"critical": 1.0, "high": 2.0, "medium": 4.0, "low": 8.0, "info": 24.0}
+
+# services that take a login: (brute-force probability, hours)
+LOGIN_SERVICES = {
+    "ssh": (0.2, 6.0), "telnet": (0.5, 2.0), "ftp": (0.6, 1.0), "rdp": (0.2, 6.0),
+    "smb": (0.3, 4.0), "microsoft-ds": (0.3, 4.0), "vnc": (0.4, 2.0),
+    "mysql": (0.3, 4.0), "postgresql": (0.3, 4.0), "mssql": (0.3, 4.0), "ms-sql-s": (0.3, 4.0),
+    "mongodb": (0.4, 2.0), "redis": (0.5, 1.0), "oracle": (0.3, 4.0), "elasticsearch": (0.5, 1.0),
+}
+DATA_SERVICES = {"mysql", "postgresql", "mssql", "ms-sql-s", "mongodb", "redis", "oracle", "elasticsearch"}
+WELL_KNOWN_PORTS = {21: "ftp", 22: "ssh", 23: "telnet", 80: "http", 443: "https", 445: "smb", 1433: "mssql",
+                    3306: "mysql", 3389: "rdp", 5432: "postgresql", 5900: "vnc", 6379: "redis",
+                    8080: "http", 8443: "https", 9200: "elasticsearch", 27017: "mongodb"}
+
+PRIVESC = (0.4, 4.0)          # user -> root on the same host
+CREDENTIAL_DUMP = (0.6, 2.0)  # root -> reusable credentials
+CREDENTIAL_REUSE = (0.5, 1.0) # reusable credentials -> login elsewhere
+
+
+@dataclass
+class Edge:
+    target: int
+    weight: float         # -log(p)
+    cost: float           # attacker hours
+    probability: float
+    action: str
+
+
+class AttackGraph:
+    """Interned nodes + adjacency lists; Dijkstra over either edge weight."""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.names: List[str] = []
+        self.adj: List[List[Edge]] = []
+        self.assets: Dict[int, str] = {}          # node -> asset kind
+        self.edge_count = 0
+
+    def node(self, name: str) -> int:
+        idx = self.ids.get(name)
+        if idx is None:
+            idx = self.ids[name] = len(self.names)
+            self.names.append(name)
+            self.adj.append([])
+        return idx
+
+    def edge(self, src: str, dst: str, probability: float, cost: float, action: str):
+        probability = min(max(probability, 1e-6), 1.0)
+        self.adj[self.node(src)].append(Edge(self.node(dst), -math.log(probability), cost, probability, action))
+        self.edge_count += 1
+
+    def asset(self, name: str, kind: str):
+        self.assets[self.node(name)] = kind
+
+    # ------------------------------------------------------------------
+    # search
+    # ------------------------------------------------------------------
+    def shortest(self, source: str, by: str = "weight") -> Tuple[List[float], List[Optional[Tuple[int, Edge]]]]:
+        """Single-source Dijkstra -> (distance, predecessor edge) per node."""
+        dist = [math.inf] * len(self.names)
+        prev: List[Optional[Tuple[int, Edge]]] = [None] * len(self.names)
+        start = self.ids[source]
+        dist[start] = 0.0
+        heap = [(0.0, start)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            for e in self.adj[u]:
+                nd = d + getattr(e, by)
+                if nd < dist[e.target]:
+                    dist[e.target] = nd
+                    prev[e.target] = (u, e)
+                    heapq.heappush(heap, (nd, e.target))
+        return dist, prev
+
+    def _path(self, prev, node: int) -> Dict[str, Any]:
+        steps = []
+        while prev[node] is not None:
+            u, e = prev[node]
+            steps.append({"from": self.names[u], "to": self.names[node],
+                          "action": e.action, "probability": round(e.probability, 4),
+                          "hours": e.cost})
+            node = u
+        steps.reverse()
+        return {
+            "probability": round(math.prod(s["probability"] for s in steps), 4),
+            "cost_hours": round(sum(s["hours"] for s in steps), 2),
+            "steps": steps,
+        }
+
+    def top_paths(self, k: int = 5, by: str = "weight") -> List[Dict[str, Any]]:
+        """Best path to each reachable asset, the k best assets first."""
+        if ENTRY not in self.ids:
+            return []
+        dist, prev = self.shortest(ENTRY, by)
+        reachable = sorted((dist[n], n) for n in self.assets if dist[n] < math.inf)
+        return [{"asset": self.names[n], "asset_type": self.assets[n], **self._path(prev, n)}
+                for _, n in reachable[:k]]
+
+
+def _host_port(location: str, default_host: str) -> Tuple[str, Optional[int]]:
+    """matched_at (URL, host:port or host) -> (host, port)."""
+    location = (location or "").strip()
+    if "://" in location:
+        try:
+            parts = urlsplit(location)
+            hostname = parts.hostname
+        except ValueError:          # e.g. an unbalanced IPv6 bracket in scanner output
+            return default_host.lower(), None
+        try:
+            port = parts.port
+        except ValueError:          # malformed port ("http://h:abc/"): use the scheme default
+            port = None
+        return (hostname or default_host).lower(), port or {"https": 443, "http": 80}.get(parts.scheme)
+    host, _, port = location.rpartition(":") if location.count(":") == 1 else (location, "", "")
+    return (host or default_host).lower(), int(port) if port.isdigit() else None
+
+
+def build_attack_graph(target: str, previous_results: Dict[str, Any]) -> AttackGraph:
+    """Graph from the scanning and vulnerability phase results."""
+    graph = AttackGraph()
+    graph.node(ENTRY)
+    default_host = target.split("://")[-1].split("/")[0].lower()
+    scanning = previous_results.get("scanning") or {}
+    vulnerability = previous_results.get("vulnerability") or {}
+
+    services: Dict[Tuple[str, int], str] = {}
+    for port in (scanning.get("services") or []) + (scanning.get("open_ports") or []):
+        if port.get("state", "open") != "open" or not port.get("port"):
+            continue
+        host = (port.get("host") or port.get("ip") or default_host).lower()
+        name = (port.get("service") or "unknown").lower()
+        if name == "unknown":
+            name = WELL_KNOWN_PORTS.get(port["port"], name)
+        services.setdefault((host, int(port["port"])), name)
+
+    def host_node(host: str):
+        root = f"access:root@{host}"
+        if root not in graph.ids:
+            graph.edge(f"access:user@{host}", root, *PRIVESC, "privilege escalation")
+            graph.edge(root, CREDENTIAL_HUB, *CREDENTIAL_DUMP, "dump credentials")
+            graph.asset(root, "host_root")
+
+    def service_node(host: str, port: int, name: str) -> str:
+        node = f"service:{host}:{port}/{name}"
+        if node not in graph.ids:
+            host_node(host)
+            graph.edge(ENTRY, node, 1.0, 0.0, "reach")
+            user = f"access:user@{host}"
+            if name in LOGIN_SERVICES:
+                p, hours = LOGIN_SERVICES[name]
+                graph.edge(node, f"credentials:{name}@{host}:{port}", p, hours, f"brute force {name}")
+                graph.edge(f"credentials:{name}@{host}:{port}", user, 0.9, 0.5, f"log in to {name}")
+                graph.edge(CREDENTIAL_HUB, f"credentials:{name}@{host}:{port}", *CREDENTIAL_REUSE, "credential reuse")
+            if name in DATA_SERVICES:
+                graph.edge(f"credentials:{name}@{host}:{port}", f"data:{name}@{host}:{port}", 1.0, 0.5, "read data")
+                graph.asset(f"data:{name}@{host}:{port}", "data_store")
+        return node
+
+    for (host, port), name in services.items():
+        service_node(host, port, name)
+
+    # CVE intel from the vulnerability phase: template -> (epss, kev)
+    intel = {}
+    for m in vulnerability.get("cve_matches") or []:
+        tid = (m.get("affected_template") or "").upper()
+        old = intel.get(tid, (0.0, False))
+        intel[tid] = (max(old[0], float(m.get("epss_score") or 0.0)), old[1] or bool(m.get("kev")))
+
+    for vuln in vulnerability.get("vulnerabilities") or []:
+        severity = (vuln.get("severity") or "info").lower()
+        if severity == "info":
+            continue
+        host, port = _host_port(vuln.get("matched_at", ""), default_host)
+        port = port or 443
+        name = services.get((host, port)) or WELL_KNOWN_PORTS.get(port, "http")
+        services.setdefault((host, port), name)
+        svc = service_node(host, port, name)
+
+        tid = vuln.get("template_id") or vuln.get("name") or "finding"
+        epss, kev = intel.get(tid.upper(), (0.0, False))
+        p = 0.95 if kev else max(SEVERITY_PROBABILITY.get(severity, 0.1), epss)
+        vnode = f"vuln:{tid}@{host}:{port}"
+        graph.edge(svc, vnode, p, SEVERITY_HOURS.get(severity, 8.0), f"exploit {tid}")
+        access = "root" if severity == "critical" else "user"
+        graph.edge(vnode, f"access:{access}@{host}", 1.0, 0.0, f"{access} access")
+        text = f"{tid} {vuln.get('name', '')}".lower()
+        if name in DATA_SERVICES or "sql" in text:
+            graph.edge(vnode, f"data:{name}@{host}:{port}", 0.8, 1.0, "extract data")
+            graph.asset(f"data:{name}@{host}:{port}", "data_store")
+    return graph
+
+
+def attack_paths(target: str, previous_results: Dict[str, Any], k: int = 5) -> Dict[str, Any]:
+    """Most probable and cheapest top-k paths to high-value assets."""
+    graph = build_attack_graph(target, previous_results)
+    return {
+        "nodes": len(graph.names),
+        "edges": graph.edge_count,
+        "assets": len(graph.assets),
+        "most_probable_paths": graph.top_paths(k, by="weight"),
+        "cheapest_paths": graph.top_paths(k, by="cost"),
+    }
@@ -0,0 +1,210 @@
+"""
+Declarative attack-vector rules for RedStorm
+Rules are plain data (built-in table + optional data/attack_vector_rules.json),
+compiled once into dictionaries keyed by port, service name and vulnerability
+class, so every open port and finding is matched with a few dict lookups and
+a whole multi-host result is turned into vectors in one pass.
+"""
+import re
+import json
+import logging
+from dataclasses import dataclass, fields
+from pathlib import Path
+from typing import Dict, Any, List, Tuple, Iterable
+
+logger = logging.getLogger("redstorm.attack_vectors")
+
+RULES_FILE = Path("data") / "attack_vector_rules.json"
+
+WEB_PORTS = (80, 443, 8080, 8443)
+
+# finding-name / template-id tokens -> vulnerability class
+VULN_CLASS_KEYWORDS = {
+    "xss": "xss", "sql": "sqli", "sqli": "sqli", "csrf": "csrf", "xsrf": "csrf",
+    "lfi": "lfi", "traversal": "lfi", "rfi": "rfi", "ssrf": "ssrf",
+}
+
+# match keys: ports / services -> one vector per open port,
+# vuln_classes -> one vector per finding (named after the finding),
+# neither -> one vector per target ("requires": "web" = only with a web port)
+DEFAULT_RULES: List[Dict[str, Any]] = [
+    {"name": "SSH Brute Force", "type": "network_service", "severity": "high",
+     "description": "Brute force attack against SSH service on port {port}",
+     "attack_complexity": "medium", "success_probability": 0.2, "required_skills": "intermediate",
+     "detection_likelihood": "high", "ports": [22], "services": ["ssh"]},
+    {"name": "FTP Anonymous Access", "type": "network_service", "severity": "medium",
+     "description": "Check for anonymous FTP access on port {port}",
+     "attack_complexity": "low", "success_probability": 0.6, "required_skills": "beginner",
+     "detection_likelihood": "low", "ports": [21], "services": ["ftp"]},
+    {"name": "Database Brute Force", "type": "network_service", "severity": "high",
+     "description": "Brute force attack against {service} database",
+     "attack_complexity": "medium", "success_probability": 0.3, "required_skills": "intermediate",
+     "detection_likelihood": "high", "services": ["mysql", "postgresql", "mongodb"]},
+    {"name": "Injection", "type": "web_application", "severity": "high",
+     "description": "Injection flaw exploitable from user input",
+     "attack_complexity": "medium", "success_probability": 0.6, "required_skills": "intermediate",
+     "detection_likelihood": "medium", "vuln_classes": ["sqli"]},
+    {"name": "Cross-Site Scripting", "type": "web_application", "severity": "medium",
+     "description": "Script injection into pages served to other users",
+     "attack_complexity": "low", "success_probability": 0.5, "required_skills": "beginner",
+     "detection_likelihood": "low", "vuln_classes": ["xss"]},
+    {"name": "Cross-Site Request Forgery", "type": "web_application", "severity": "medium",
+     "description": "State-changing requests forged from another origin",
+     "attack_complexity": "medium", "success_probability": 0.4, "required_skills": "intermediate",
+     "detection_likelihood": "low", "vuln_classes": ["csrf"]},
+    {"name": "File Inclusion", "type": "web_application", "severity": "high",
+     "description": "Server reads or includes attacker-chosen files",
+     "attack_complexity": "low", "success_probability": 0.5, "required_skills": "intermediate",
+     "detection_likelihood": "medium", "vuln_classes": ["lfi", "rfi"]},
+    {"name": "Server-Side Request Forgery", "type": "web_application", "severity": "high",
+     "description": "Server issues requests to attacker-chosen destinations",
+     "attack_complexity": "medium", "success_probability": 0.4, "required_skills": "advanced",
+     "detection_likelihood": "low", "vuln_classes": ["ssrf"]},
+    {"name": "Brute Force Authentication", "type": "web_application", "severity": "medium",
+     "description": "Attempt to brute force login credentials",
+     "attack_complexity": "low", "success_probability": 0.3, "required_skills": "beginner",
+     "detection_likelihood": "high", "requires": "web"},
+    {"name": "Directory Traversal", "type": "web_application", "severity": "medium",
+     "description": "Attempt to access files outside web root",
+     "attack_complexity": "low", "success_probability": 0.4, "required_skills": "beginner",
+     "detection_likelihood": "medium", "requires": "web"},
+    {"name": "Phishing Campaign", "type": "social_engineering", "severity": "high",
+     "description": "Targeted phishing emails to employees",
+     "attack_complexity": "medium", "success_probability": 0.7, "required_skills": "intermediate",
+     "detection_likelihood": "medium"},
+    {"name": "Pretexting", "type": "social_engineering", "severity": "medium",
+     "description": "Phone-based social engineering attacks",
+     "attack_complexity": "high", "success_probability": 0.5, "required_skills": "advanced",
+     "detection_likelihood": "low"},
+]
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_VECTOR_FIELDS = ("type", "severity", "description", "attack_complexity",
+                  "success_probability", "required_skills", "detection_likelihood")
+
+
+@dataclass(frozen=True)
+class VectorRule:
+    name: str
+    type: str
+    severity: str
+    description: str
+    attack_complexity: str
+    success_probability: float
+    required_skills: str
+    detection_likelihood: str
+    ports: Tuple[int, ...] = ()
+    services: Tuple[str, ...] = ()
+    vuln_classes: Tuple[str, ...] = ()
+    requires: str = ""
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "VectorRule":
+        known = {f.name for f in fields(cls)}
+        data = {k: v for k, v in data.items() if k in known}
+        for key in ("ports", "services", "vuln_classes"):
+            data[key] = tuple(data.get(key) or ())
+        data["services"] = tuple(s.lower() for s in data["services"])
+        data["success_probability"] = float(data["success_probability"])
+        return cls(**data)
+
+    def vector(self, **context) -> Dict[str, Any]:
+        v = {"name": self.name}
+        v.update({k: getattr(self, k) for k in _VECTOR_FIELDS})
+        v["description"] = self.description.format_map(_Default(context))
+        return v
+
+
+class _Default(dict):
+    def __missing__(self, key):
+        return "{" + key + "}"
+
+
+def vuln_classes(finding: Dict[str, Any]) -> List[str]:
+    """Vulnerability classes named by a finding's name or template id."""
+    text = f"{finding.get('name', '')} {finding.get('template_id', '')}".lower()
+    return list(dict.fromkeys(VULN_CLASS_KEYWORDS[t] for t in _TOKEN.findall(text) if t in VULN_CLASS_KEYWORDS))
+
+
+class VectorRuleEngine:
+    """Rule table compiled into port / service / vulnerability-class indexes."""
+
+    def __init__(self, rules: Iterable[VectorRule]):
+        self.rules = list(rules)
+        self.by_port: Dict[int, List[VectorRule]] = {}
+        self.by_service: Dict[str, List[VectorRule]] = {}
+        self.by_class: Dict[str, List[VectorRule]] = {}
+        self.target_rules: List[VectorRule] = []
+        for rule in self.rules:
+            for port in rule.ports:
+                self.by_port.setdefault(int(port), []).append(rule)
+            for service in rule.services:
+                self.by_service.setdefault(service, []).append(rule)
+            for cls in rule.vuln_classes:
+                self.by_class.setdefault(cls, []).append(rule)
+            if not (rule.ports or rule.services or rule.vuln_classes):
+                self.target_rules.append(rule)
+
+    @classmethod
+    def load(cls, path: Path = RULES_FILE) -> "VectorRuleEngine":
+        """Built-in rules plus data/attack_vector_rules.json (same name replaces)."""
+        table = {r["name"]: r for r in DEFAULT_RULES}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                table.update({r["name"]: r for r in json.load(f)})
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"Invalid attack vector rules {path}, using built-in rules: {e}")
+        rules = []
+        for data in table.values():
+            try:
+                rules.append(VectorRule.from_dict(data))
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning(f"Skipping attack vector rule {data.get('name')}: {e}")
+        return cls(rules)
+
+    def _service_rules(self, service: str) -> List[VectorRule]:
+        # exact name first, then its leading token ("mysql-5.7" -> "mysql")
+        rules = self.by_service.get(service)
+        if rules is None:
+            head = _TOKEN.match(service)
+            rules = self.by_service.get(head.group(0), []) if head else []
+        return rules
+
+    def vectors(self, open_ports: List[Dict[str, Any]], vulnerabilities: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """All attack vectors for one result set, in a single pass over ports and findings."""
+        web, network = [], []
+        has_web = False
+        for port in open_ports:
+            number = port.get("port")
+            has_web = has_web or number in WEB_PORTS
+            if port.get("state") != "open":
+                continue
+            service = (port.get("service") or "unknown").lower()
+            matched = dict.fromkeys(self.by_port.get(number, []) + self._service_rules(service))
+            for rule in matched:
+                vector = rule.vector(port=number, service=port.get("service", "unknown"), host=port.get("host", ""))
+                if port.get("host"):
+                    vector["host"] = port["host"]
+                network.append(vector)
+
+        if has_web:
+            for finding in vulnerabilities:
+                classes = vuln_classes(finding)
+                rule = next((r for c in classes for r in self.by_class.get(c, ())), None)
+                if rule:
+                    vector = rule.vector()
+                    vector.update({"name": finding.get("name", "Unknown Web Vulnerability"),
+                                   "severity": finding.get("severity", "medium"),
+                                   "description": finding.get("description", "") or vector["description"],
+                                   "vuln_class": classes[0]})
+                    web.append(vector)
+
+        target = [r.vector() for r in self.target_rules if r.requires != "web" or has_web]
+        web += [v for v in target if v["type"] == "web_application"]
+        return web + network + [v for v in target if v["type"] != "web_application"]
+
+
+# Global rule engine used by the exploitation agent
+vector_rules = VectorRuleEngine.load()
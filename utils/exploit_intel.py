@@ -0,0 +1,255 @@
+"""
+Offline exploitability store for RedStorm (EPSS + CISA KEV)
+CVE -> EPSS score / percentile / KEV membership, packed into a binary
+open-addressing hash table that is memory-mapped at startup
+
+Refresh from local dumps:
+    python -m utils.exploit_intel --epss epss_scores-current.csv.gz \
+                                  --kev known_exploited_vulnerabilities.json
+"""
+import argparse
+import csv
+import gzip
+import io
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+import logging
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple, Iterable
+
+logger = logging.getLogger("redstorm.exploit_intel")
+
+STORE_FILE = Path(__file__).resolve().parent.parent / "tools" / ".cache" / "exploit-intel.bin"
+
+# header: magic, version, capacity (power of two), count
+_HEADER = struct.Struct("<4sIII")
+_MAGIC = b"RSEI"
+_VERSION = 1
+# slot: cve key (0 = empty), epss score and percentile as 1e-5 fixed point, flags
+_SLOT = struct.Struct("<QIIB3x")
+_SCALE = 100_000
+_FLAG_KEV = 0x01
+_OFFSET = _HEADER.size
+_SLOT_SIZE = _SLOT.size
+_FIB = 11400714819323198485      # 2**64 / golden ratio (Fibonacci hashing)
+_MASK64 = (1 << 64) - 1
+_MEMO_LIMIT = 65536               # hot CVEs skip the probe entirely
+
+_CVE = re.compile(r"CVE-(\d{4})-(\d{4,7})", re.I)
+
+
+def cve_key(cve_id: str) -> int:
+    """'CVE-2021-44228' -> 2021 * 10**7 + 44228 (0 if not a CVE id)"""
+    parts = cve_id.split("-") if cve_id else ()
+    if len(parts) == 3 and parts[0] in ("CVE", "cve") and parts[1].isdigit() and parts[2].isdigit():
+        return int(parts[1]) * 10_000_000 + int(parts[2])
+    m = _CVE.search(cve_id or "")
+    if not m:
+        return 0
+    return int(m.group(1)) * 10_000_000 + int(m.group(2))
+
+
+def _slot_of(key: int, bits: int) -> int:
+    return ((key * _FIB) & _MASK64) >> (64 - bits)
+
+
+class ExploitIntelStore:
+    """Read side: mmap the packed table, lookups are one hash + a short probe"""
+
+    def __init__(self, path: Path = STORE_FILE):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._mm: Optional[mmap.mmap] = None
+        self._capacity = 0
+        self._shift = 64
+        self._ident: Optional[Tuple[int, int, int]] = None
+        self._memo: Dict[str, Optional[Dict[str, Any]]] = {}
+        self.count = 0
+
+    def open(self) -> bool:
+        """
+        Map the store file, remapping it when it was rebuilt since the last call
+        (build_store swaps in a new inode); False when no usable store exists.
+        """
+        with self._lock:
+            try:
+                st = os.stat(self.path)
+            except FileNotFoundError:
+                return self._mm is not None
+            ident = (st.st_ino, st.st_mtime_ns, st.st_size)
+            if self._mm is not None and ident == self._ident:
+                return True
+            try:
+                with open(self.path, "rb") as f:
+                    mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (FileNotFoundError, ValueError):
+                return self._mm is not None
+            magic, version, capacity, count = _HEADER.unpack_from(mm, 0)
+            if magic != _MAGIC or version != _VERSION or capacity & (capacity - 1):
+                mm.close()
+                logger.warning(f"Ignoring incompatible exploit intel store {self.path}")
+                return self._mm is not None
+            # the old mapping is only dropped, not closed: a concurrent _probe may
+            # still hold it and it is released once that last reference goes away
+            self._capacity, self.count = capacity, count
+            self._shift = 64 - (capacity.bit_length() - 1)
+            self._mm, self._ident = mm, ident
+            self._memo = {}
+            logger.info(f"Mapped exploit intel store ({count} CVEs)")
+        return True
+
+    def close(self):
+        with self._lock:
+            if self._mm is not None:
+                self._mm.close()
+                self._mm, self._ident = None, None
+            self._memo = {}
+
+    def lookup(self, cve_id: str) -> Optional[Dict[str, Any]]:
+        """{'epss_score', 'epss_percentile', 'kev'} for a CVE id, None if unknown."""
+        try:
+            return self._memo[cve_id]
+        except KeyError:
+            pass
+        key = cve_key(cve_id)
+        if not key or (self._mm is None and not self.open()):
+            return None
+        memo = self._memo
+        result = self._probe(key)
+        if len(memo) >= _MEMO_LIMIT:
+            memo.clear()
+        memo[cve_id] = result
+        return result
+
+    def _probe(self, key: int) -> Optional[Dict[str, Any]]:
+        mm, mask, unpack = self._mm, self._capacity - 1, _SLOT.unpack_from
+        slot = ((key * _FIB) & _MASK64) >> self._shift
+        while True:
+            k, epss, pct, flags = unpack(mm, _OFFSET + slot * _SLOT_SIZE)
+            if k == key:
+                return {"epss_score": epss / _SCALE, "epss_percentile": pct / _SCALE,
+                        "kev": bool(flags & _FLAG_KEV)}
+            if k == 0:
+                return None
+            slot = (slot + 1) & mask
+
+
+# ----------------------------------------------------------
+# build side
+# ----------------------------------------------------------
+def _open_text(path: Path) -> io.TextIOBase:
+    if str(path).endswith(".gz"):
+        return io.TextIOWrapper(gzip.open(path, "rb"), encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def read_epss_csv(path: Path) -> Iterable[Tuple[str, float, float]]:
+    """FIRST daily dump: '#model_version…' comment line, then cve,epss,percentile."""
+    with _open_text(path) as f:
+        rows = csv.reader(line for line in f if not line.startswith("#"))
+        for row in rows:
+            if len(row) < 3 or row[0].lower() == "cve":
+                continue
+            try:
+                yield row[0], float(row[1]), float(row[2])
+            except ValueError:
+                continue
+
+
+def read_kev_json(path: Path) -> Iterable[str]:
+    """CISA known_exploited_vulnerabilities.json (or a plain JSON list of ids)."""
+    with _open_text(path) as f:
+        data = json.load(f)
+    items = data.get("vulnerabilities", []) if isinstance(data, dict) else data
+    for item in items:
+        cve = item.get("cveID") or item.get("cve") if isinstance(item, dict) else item
+        if cve:
+            yield str(cve)
+
+
+def read_template_intel() -> Iterable[Tuple[str, float, float, bool]]:
+    """EPSS + KEV tags shipped inside the nuclei templates (fallback source)."""
+    from .template_index import template_index
+    template_index.load()
+    for record in template_index.templates.values():
+        kev = "kev" in record["tags"] or "vkev" in record["tags"]
+        for cve in record["cve_ids"]:
+            yield cve, record["epss_score"], record["epss_percentile"], kev
+
+
+def build_store(records: Dict[int, Tuple[float, float, int]], path: Path = STORE_FILE) -> int:
+    """Write {cve_key: (epss, percentile, flags)} as a packed table (load factor <= 0.5)."""
+    capacity = 1024
+    while capacity < len(records) * 2:
+        capacity <<= 1
+    bits = capacity.bit_length() - 1
+
+    buf = bytearray(_OFFSET + capacity * _SLOT_SIZE)
+    _HEADER.pack_into(buf, 0, _MAGIC, _VERSION, capacity, len(records))
+    used = bytearray(capacity)
+    for key, (epss, pct, flags) in records.items():
+        slot = _slot_of(key, bits)
+        while used[slot]:
+            slot = (slot + 1) & (capacity - 1)
+        used[slot] = 1
+        _SLOT.pack_into(buf, _OFFSET + slot * _SLOT_SIZE, key,
+                        round(epss * _SCALE), round(pct * _SCALE), flags)
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "wb") as f:
+        f.write(buf)
+    os.replace(tmp, path)     # readers keep their old mapping until reopened
+    return len(records)
+
+
+def refresh(epss_path: Optional[Path] = None, kev_path: Optional[Path] = None,
+            include_templates: bool = True, path: Path = STORE_FILE) -> int:
+    """Merge the available local dumps (dumps win over template metadata) and rebuild."""
+    records: Dict[int, Tuple[float, float, int]] = {}
+
+    if include_templates:
+        for cve, epss, pct, kev in read_template_intel():
+            key = cve_key(cve)
+            if key:
+                records[key] = (epss, pct, _FLAG_KEV if kev else 0)
+
+    if epss_path:
+        for cve, epss, pct in read_epss_csv(Path(epss_path)):
+            key = cve_key(cve)
+            if key:
+                flags = records.get(key, (0.0, 0.0, 0))[2]
+                records[key] = (epss, pct, flags)
+
+    if kev_path:
+        for cve in read_kev_json(Path(kev_path)):
+            key = cve_key(cve)
+            if key:
+                epss, pct, flags = records.get(key, (0.0, 0.0, 0))
+                records[key] = (epss, pct, flags | _FLAG_KEV)
+
+    count = build_store(records, path)
+    logger.info(f"Built exploit intel store with {count} CVEs at {path}")
+    if Path(path) == exploit_intel.path:
+        exploit_intel.open()      # remap in this process; others remap on their next open()
+    return count
+
+
+# Global exploit intel store (mapped lazily on first lookup)
+exploit_intel = ExploitIntelStore()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Rebuild the offline EPSS/KEV store")
+    parser.add_argument("--epss", type=Path, help="EPSS CSV dump (.csv or .csv.gz)")
+    parser.add_argument("--kev", type=Path, help="CISA KEV JSON dump")
+    parser.add_argument("--no-templates", action="store_true", help="do not seed from nuclei template metadata")
+    parser.add_argument("--out", type=Path, default=STORE_FILE)
+    args = parser.parse_args()
+    refresh(args.epss, args.kev, include_templates=not args.no_templates, path=args.out)
@@ -0,0 +1,199 @@
+"""
+Offline exploit-module index for RedStorm
+Maps CVE ids, CPE vendor/product and service names/ports to Metasploit
+exploit modules, built from the framework's modules_metadata_base.json and
+pickled next to the template index. The exploitation phase asks for the
+exact candidate modules of each finding in one lookup instead of running a
+broad msfconsole search per service.
+"""
+import os
+import re
+import json
+import pickle
+import threading
+import logging
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Set, Iterable
+
+logger = logging.getLogger("redstorm.exploit_modules")
+
+CACHE_FILE = Path(__file__).resolve().parent.parent / "tools" / ".cache" / "exploit-module-index.pkl"
+_CACHE_VERSION = 1
+
+# where msfconsole keeps its module metadata (MSF_ROOT overrides)
+_METADATA_CANDIDATES = (
+    "/usr/share/metasploit-framework/db/modules_metadata_base.json",
+    "/opt/metasploit-framework/embedded/framework/db/modules_metadata_base.json",
+    "/opt/metasploit-framework/db/modules_metadata_base.json",
+)
+
+RANKS = {600: "excellent", 500: "great", 400: "good", 300: "normal", 200: "average", 100: "low", 0: "manual"}
+_MIN_RANK = 500          # same cut as the Go wrapper: excellent / great only
+
+_CVE = re.compile(r"CVE-\d{4}-\d{4,}", re.I)
+_WORD = re.compile(r"[a-z0-9]+")
+_GENERIC_WORDS = {"exploit", "exploits", "multi", "http", "https", "linux", "windows", "unix", "remote",
+                  "local", "rce", "exec", "code", "execution", "auth", "unauth", "upload", "file",
+                  "injection", "command", "cmd", "bypass", "login", "webapp", "misc", "admin"}
+
+
+def metadata_path() -> Optional[Path]:
+    root = os.environ.get("MSF_ROOT")
+    candidates = ([os.path.join(root, "db", "modules_metadata_base.json")] if root else []) + list(_METADATA_CANDIDATES)
+    for candidate in candidates:
+        if os.path.isfile(candidate):
+            return Path(candidate)
+    return None
+
+
+class ExploitModuleIndex:
+    """
+    CVE / CPE / service / port -> exploit module records.
+    Rebuilt only when the metadata file changes (size + mtime signature).
+    """
+
+    def __init__(self, cache_file: Path = CACHE_FILE):
+        self.cache_file = Path(cache_file)
+        self._lock = threading.Lock()
+        self._loaded = False
+        self.source: Optional[Path] = None
+        self.modules: Dict[str, Dict[str, Any]] = {}       # fullname -> record
+        self.by_cve: Dict[str, Set[str]] = {}
+        self.by_service: Dict[str, Set[str]] = {}
+        self.by_port: Dict[int, Set[str]] = {}
+        self.by_word: Dict[str, Set[str]] = {}              # product/vendor words of module paths
+
+    # ------------------------------------------------------------------
+    # build
+    # ------------------------------------------------------------------
+    def load(self) -> "ExploitModuleIndex":
+        """Load once per process (thread-safe, blocking). Empty when Metasploit is absent."""
+        if self._loaded:
+            return self
+        with self._lock:
+            if not self._loaded:
+                self.source = metadata_path()
+                if self.source is not None:
+                    st = self.source.stat()
+                    signature = (_CACHE_VERSION, str(self.source), st.st_size, st.st_mtime_ns)
+                    if not self._load_cache(signature):
+                        self._build(self.source)
+                        self._save_cache(signature)
+                self._loaded = True
+        return self
+
+    def _load_cache(self, signature: tuple) -> bool:
+        try:
+            with open(self.cache_file, "rb") as f:
+                cached = pickle.load(f)
+            if cached.get("signature") != signature:
+                return False
+            self.modules = cached["modules"]
+            for key in ("by_cve", "by_service", "by_port", "by_word"):
+                setattr(self, key, cached[key])
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable exploit module cache: {e}")
+            return False
+        logger.info(f"Loaded exploit module index from cache ({len(self.modules)} modules)")
+        return True
+
+    def _save_cache(self, signature: tuple):
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.cache_file.with_suffix(".tmp")
+            with open(tmp, "wb") as f:
+                pickle.dump({"signature": signature, "modules": self.modules, "by_cve": self.by_cve,
+                             "by_service": self.by_service, "by_port": self.by_port, "by_word": self.by_word},
+                            f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self.cache_file)
+        except Exception as e:
+            logger.warning(f"Could not write exploit module cache: {e}")
+
+    def _build(self, source: Path):
+        with open(source, "r", encoding="utf-8") as f:
+            metadata = json.load(f)
+        self.modules, self.by_cve, self.by_service, self.by_port, self.by_word = {}, {}, {}, {}, {}
+        for meta in metadata.values():
+            if meta.get("type") != "exploit":
+                continue
+            name = meta.get("fullname") or ""
+            rank = int(meta.get("rank") or 0)
+            cves = sorted({c.upper() for ref in meta.get("references") or [] for c in _CVE.findall(str(ref))})
+            services = {str(s).split("/")[0].lower() for s in meta.get("autofilter_services") or []}
+            ports = {int(p) for p in meta.get("autofilter_ports") or [] if str(p).isdigit()}
+            if str(meta.get("rport") or "").isdigit():
+                ports.add(int(meta["rport"]))
+            self.modules[name] = {
+                "module": name,
+                "title": meta.get("name", ""),
+                "rank": RANKS.get(rank, str(rank)),
+                "rank_value": rank,
+                "cves": cves,
+                "platform": meta.get("platform", ""),
+                "check": bool(meta.get("check")),
+            }
+            for cve in cves:
+                self.by_cve.setdefault(cve, set()).add(name)
+            for service in services:
+                self.by_service.setdefault(service, set()).add(name)
+            for port in ports:
+                self.by_port.setdefault(port, set()).add(name)
+            words = set(_WORD.findall(name.rsplit("/", 1)[-1].lower()))
+            words |= {w.rstrip("0123456789") for w in words}      # struts2 -> struts
+            for word in words - _GENERIC_WORDS:
+                if len(word) > 3:
+                    self.by_word.setdefault(word, set()).add(name)
+        logger.info(f"Built exploit module index: {len(self.modules)} modules, {len(self.by_cve)} CVEs")
+
+    # ------------------------------------------------------------------
+    # lookup
+    # ------------------------------------------------------------------
+    def for_cve(self, cve: str) -> Set[str]:
+        return self.by_cve.get(cve.upper(), set())
+
+    def for_cpe(self, cpe: str) -> Set[str]:
+        """cpe:2.3:a:vendor:product:... -> modules named after the product (and vendor when both match)."""
+        parts = cpe.lower().split(":")
+        offset = 2 if len(parts) > 1 and parts[1] == "2.3" else 1
+        vendor, product = (parts[offset + 1:offset + 3] + ["", ""])[:2]
+        hits = self.by_word.get(product.replace("_", ""), set()) | self.by_word.get(product, set())
+        narrowed = hits & self.by_word.get(vendor, set())
+        return narrowed or hits
+
+    def for_service(self, service: str, port: Optional[int] = None) -> Set[str]:
+        hits = set(self.by_service.get(service.lower(), set()))
+        return hits & self.by_port.get(port, hits) if port else hits
+
+    def select(self, findings: Iterable[Dict[str, Any]], services: Iterable[Dict[str, Any]] = (),
+               limit: int = 25) -> List[Dict[str, Any]]:
+        """
+        Candidate modules for the given findings (CVE, then CPE) and services
+        (name/port, only used when no finding matched). Best rank first.
+        """
+        self.load()
+        matched: Dict[str, Dict[str, Any]] = {}
+
+        def take(names: Set[str], why: str, source: str):
+            for name in names:
+                record = self.modules.get(name)
+                if record and record["rank_value"] >= _MIN_RANK and name not in matched:
+                    matched[name] = {**record, "matched_by": why, "finding": source}
+
+        for finding in findings:
+            text = f"{finding.get('template_id', '')} {finding.get('cve_id', '')} {finding.get('name', '')}"
+            for cve in set(_CVE.findall(text)):
+                take(self.for_cve(cve), "cve", cve.upper())
+            for cpe in finding.get("cpe") or []:
+                take(self.for_cpe(cpe), "cpe", cpe)
+        if not matched:
+            for svc in services:
+                name = (svc.get("service") or "").lower()
+                if name and name != "unknown":
+                    take(self.for_service(name, svc.get("port")), "service", f"{name}/{svc.get('port')}")
+        return sorted(matched.values(), key=lambda m: (-m["rank_value"], m["module"]))[:limit]
+
+
+# Global module index (built lazily, cached on disk)
+exploit_modules = ExploitModuleIndex()
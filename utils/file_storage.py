@@ -1,21 +1,41 @@
 """
 File-based storage manager for RedStorm
-Saves all assessment data, results, and logs to local files
+Saves all assessment data, results, and logs to local files.
+Assessment and finding metadata is mirrored into a SQLite index
+(utils.storage_index) on every write; list, filter and statistics calls are
+answered from the index instead of parsing every file; a stat-only reconcile
+re-runs every reconcile_interval seconds so files removed out of process
+(cleanup service) drop out of it.
+File I/O never runs on the event loop: it goes through a small dedicated
+thread pool behind a bounded queue, and repeated saves of the same
+assessment that arrive while one is pending are written once (latest wins).
+Documents are replaced atomically (temp file + fsync + rename), and audit,
+consent and metric events are appended to hourly JSON-lines segments whose
+fsyncs are group-committed (utils.durable_io).
 """
 import json
 import os
 import uuid
-from datetime import datetime
-from typing import Dict, Any, List, Optional
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Callable
 import logging
 from pathlib import Path
 
+from utils.durable_io import GroupCommitLog, atomic_write_json
+from utils.storage_index import StorageIndex
+
 logger = logging.getLogger("redstorm.file_storage")
 
 class FileStorageManager:
     """File-based storage for all RedStorm data"""
     
-    def __init__(self, base_dir: str = "data"):
+    def __init__(self, base_dir: str = "data", io_workers: int = 4, max_pending: int = 64,
+                 coalesce_delay: float = 0.02, durable: bool = True, group_commit_window: float = 0.005,
+                 reconcile_interval: float = 60.0):
         self.base_dir = Path(base_dir)
         self.assessments_dir = self.base_dir / "assessments"
         self.scans_dir = self.base_dir / "scans"
@@ -27,6 +47,42 @@ class FileStorageManager:
         for dir_path in [self.base_dir, self.assessments_dir, self.scans_dir, 
                         self.vulnerabilities_dir, self.logs_dir, self.metrics_dir]:
             dir_path.mkdir(parents=True, exist_ok=True)
+
+        self._index = StorageIndex(self.base_dir / "index.sqlite3")
+        self._index_lock = threading.Lock()
+        self.reconcile_interval = reconcile_interval
+        self._reconciled_at: Optional[float] = None
+
+        # I/O pool + bounded queue (created per event loop) + write coalescing
+        self._executor = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="redstorm-storage")
+        self.max_pending = max_pending
+        self.coalesce_delay = coalesce_delay
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._slots_loop = None
+        self._pending: Dict[str, Dict[str, Any]] = {}           # assessment_id -> newest unwritten doc
+        self._pending_done: Dict[str, asyncio.Future] = {}      # resolves when that doc is on disk
+        self._flushing: Dict[str, asyncio.Task] = {}
+        self.io_counters = {"writes_requested": 0, "writes_flushed": 0, "writes_coalesced": 0}
+
+        # small event records: append-only segments, one fsync per batch
+        self.durable = durable
+        self._audit_log = GroupCommitLog(self.logs_dir, "audit", group_commit_window, durable=durable)
+        self._consent_log = GroupCommitLog(self.logs_dir, "consent", group_commit_window, durable=durable)
+        self._metric_log = GroupCommitLog(self.metrics_dir, "metrics", group_commit_window, durable=durable)
+    
+    @property
+    def index(self) -> StorageIndex:
+        """Metadata index, reconciled with the directories on first use and then periodically."""
+        if self._index_stale():
+            with self._index_lock:
+                if self._index_stale():
+                    self._index.reconcile(self.assessments_dir, self.vulnerabilities_dir)
+                    self._reconciled_at = time.monotonic()
+        return self._index
+    
+    def _index_stale(self) -> bool:
+        return (self._reconciled_at is None
+                or time.monotonic() - self._reconciled_at > self.reconcile_interval)
     
     def _generate_id(self) -> str:
         """Generate unique ID"""
@@ -37,10 +93,9 @@ class FileStorageManager:
         return datetime.now().isoformat()
     
     def _save_json(self, file_path: Path, data: Dict[str, Any]):
-        """Save data to JSON file"""
+        """Save data to JSON file (atomic replace; readers never see a partial file)"""
         try:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, default=str)
+            atomic_write_json(file_path, data, durable=self.durable)
         except Exception as e:
             logger.error(f"Error saving JSON to {file_path}: {e}")
             raise
@@ -56,6 +111,84 @@ class FileStorageManager:
             logger.error(f"Error loading JSON from {file_path}: {e}")
             return None
     
+    def _write_assessment(self, assessment: Dict[str, Any]):
+        """Write the document, then its index row (a crash in between is fixed by reconcile)."""
+        file_path = self.assessments_dir / f"{assessment['assessment_id']}.json"
+        self._save_json(file_path, assessment)
+        self.index.put_assessment(assessment, file_path.stat())
+    
+    # Off-loop I/O
+    async def _run(self, fn: Callable, *args):
+        """Run blocking storage work on the I/O pool; at most max_pending queued or running."""
+        loop = asyncio.get_running_loop()
+        if self._slots_loop is not loop:
+            self._slots, self._slots_loop = asyncio.Semaphore(self.max_pending), loop
+        async with self._slots:
+            return await loop.run_in_executor(self._executor, fn, *args)
+    
+    async def _submit_assessment(self, assessment: Dict[str, Any]):
+        """
+        Queue a full-document write and wait until it (or a newer version of
+        the same assessment) is on disk. The document must not be mutated
+        after it is handed over.
+        """
+        assessment_id = str(assessment["assessment_id"])
+        self.io_counters["writes_requested"] += 1
+        if assessment_id in self._pending:
+            self.io_counters["writes_coalesced"] += 1       # replaces a version not yet written
+        self._pending[assessment_id] = assessment
+        done = self._pending_done.get(assessment_id)
+        if done is None:
+            done = self._pending_done[assessment_id] = asyncio.get_running_loop().create_future()
+        if assessment_id not in self._flushing:
+            self._flushing[assessment_id] = asyncio.get_running_loop().create_task(
+                self._flush_assessment(assessment_id))
+        await asyncio.shield(done)
+    
+    async def _flush_assessment(self, assessment_id: str):
+        """Writes the newest pending version until none is left; one writer per assessment."""
+        try:
+            while assessment_id in self._pending:
+                if self.coalesce_delay:
+                    await asyncio.sleep(self.coalesce_delay)   # let a burst of saves settle
+                doc = self._pending.pop(assessment_id)
+                done = self._pending_done.pop(assessment_id)
+                try:
+                    await self._run(self._write_assessment, doc)
+                    self.io_counters["writes_flushed"] += 1
+                    done.set_result(None)
+                except asyncio.CancelledError:
+                    done.cancel()
+                    raise
+                except Exception as e:
+                    done.set_exception(e)
+                    done.exception()            # waiters re-raise it; mark retrieved
+        except asyncio.CancelledError:
+            self._pending.pop(assessment_id, None)
+            waiting = self._pending_done.pop(assessment_id, None)
+            if waiting is not None:
+                waiting.cancel()
+            raise
+        finally:
+            del self._flushing[assessment_id]
+    
+    async def flush(self):
+        """Wait for every queued assessment write (shutdown)."""
+        while self._flushing:
+            await asyncio.gather(*self._flushing.values(), return_exceptions=True)
+    
+    async def close(self):
+        """Flush queued writes and stop the event-log committers (shutdown)."""
+        await self.flush()
+        for log in (self._audit_log, self._consent_log, self._metric_log):
+            await asyncio.get_running_loop().run_in_executor(None, log.close)
+    
+    def io_stats(self) -> Dict[str, Any]:
+        return {**self.io_counters, "pending_writes": len(self._pending), "max_pending": self.max_pending,
+                "durable": self.durable,
+                "group_commit": {log.prefix: dict(log.stats)
+                                 for log in (self._audit_log, self._consent_log, self._metric_log)}}
+    
     # Assessment operations
     async def create_assessment(self, assessment_data: Dict[str, Any]) -> str:
         """Create new assessment"""
@@ -65,8 +198,7 @@ class FileStorageManager:
             assessment_data["created_at"] = self._get_timestamp()
             assessment_data["updated_at"] = self._get_timestamp()
             
-            file_path = self.assessments_dir / f"{assessment_id}.json"
-            self._save_json(file_path, assessment_data)
+            await self._submit_assessment(assessment_data)
             
             logger.info(f"Created assessment: {assessment_id}")
             return assessment_id
@@ -79,12 +211,13 @@ class FileStorageManager:
                                      results: Optional[Dict] = None):
         """Update assessment status"""
         try:
-            file_path = self.assessments_dir / f"{assessment_id}.json"
-            assessment = self._load_json(file_path)
+            assessment = await self.get_assessment(assessment_id)
             
             if not assessment:
                 raise ValueError(f"Assessment {assessment_id} not found")
             
+            assessment = self._pending.get(assessment_id, assessment)       # queued during the read: newer
+            assessment = {**assessment, "assessment_id": assessment_id}     # pending docs are not mutated
             assessment["status"] = status
             assessment["updated_at"] = self._get_timestamp()
             
@@ -93,33 +226,88 @@ class FileStorageManager:
             if results:
                 assessment["results"] = results
             
-            self._save_json(file_path, assessment)
+            await self._submit_assessment(assessment)
             logger.debug(f"Updated assessment {assessment_id} status to {status}")
         except Exception as e:
             logger.error(f"Update assessment status error: {e}")
             raise
     
     async def get_assessment(self, assessment_id: str) -> Optional[Dict[str, Any]]:
-        """Get assessment by ID"""
+        """Get assessment by ID (a queued, not yet written version counts)"""
         try:
+            if assessment_id in self._pending:
+                return self._pending[assessment_id]
             file_path = self.assessments_dir / f"{assessment_id}.json"
-            return self._load_json(file_path)
+            return await self._run(self._load_json, file_path)
         except Exception as e:
             logger.error(f"Get assessment error: {e}")
             return None
     
+    async def save_assessment(self, assessment_id: str, assessment_data: Dict[str, Any]) -> str:
+        """Create or replace the stored assessment document"""
+        try:
+            assessment_data["assessment_id"] = assessment_id
+            assessment_data.setdefault("created_at", self._get_timestamp())
+            assessment_data["updated_at"] = self._get_timestamp()
+            await self._submit_assessment(assessment_data)
+            return assessment_id
+        except Exception as e:
+            logger.error(f"Save assessment error: {e}")
+            raise
+    
+    async def patch_assessment(self, assessment_id: str,
+                               patch: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]) -> bool:
+        """
+        Apply `patch` to the newest version of the assessment (a queued one
+        included) and queue the result. `patch` runs on the event loop and
+        returns a new document, or None to leave the assessment unchanged.
+        """
+        try:
+            assessment = await self.get_assessment(assessment_id)
+            # a save queued while the file was read is newer; no await from here to the submit
+            assessment = self._pending.get(assessment_id, assessment)
+            patched = patch(assessment) if assessment else None
+            if patched is None:
+                return False
+            await self._submit_assessment({**patched, "assessment_id": assessment_id})
+            return True
+        except Exception as e:
+            logger.error(f"Patch assessment error: {e}")
+            raise
+    
+    async def delete_assessment(self, assessment_id: str) -> bool:
+        """Delete assessment; False when it does not exist"""
+        if assessment_id in self._flushing:             # a queued write would re-create it
+            await asyncio.gather(self._flushing[assessment_id], return_exceptions=True)
+        return await self._run(self._delete_assessment, assessment_id)
+    
+    def _delete_assessment(self, assessment_id: str) -> bool:
+        file_path = self.assessments_dir / f"{assessment_id}.json"
+        try:
+            file_path.unlink()
+        except FileNotFoundError:
+            self.index.delete_assessment(assessment_id)
+            return False
+        self.index.delete_assessment(assessment_id)
+        return True
+    
+    async def list_assessments(self, client_id: Optional[str] = None, status: Optional[str] = None,
+                               target: Optional[str] = None, limit: Optional[int] = None,
+                               offset: int = 0) -> List[Dict[str, Any]]:
+        """Assessment summaries (ids, target, status, timestamps, severity counts), newest first"""
+        try:
+            return await self._run(lambda: self.index.assessments(
+                statuses=[status] if status else None, client_id=client_id,
+                target=target, limit=limit, offset=offset))
+        except Exception as e:
+            logger.error(f"List assessments error: {e}")
+            return []
+    
     async def get_active_assessments(self, client_id: Optional[str] = None) -> List[Dict[str, Any]]:
-        """Get active assessments"""
+        """Get active assessments (summaries)"""
         try:
-            active_assessments = []
-            
-            for file_path in self.assessments_dir.glob("*.json"):
-                assessment = self._load_json(file_path)
-                if assessment and assessment.get("status") in ["running", "paused"]:
-                    if not client_id or assessment.get("client_id") == client_id:
-                        active_assessments.append(assessment)
-            
-            return active_assessments
+            return await self._run(lambda: self.index.assessments(statuses=("running", "paused"),
+                                                                  client_id=client_id))
         except Exception as e:
             logger.error(f"Get active assessments error: {e}")
             return []
@@ -133,7 +321,7 @@ class FileStorageManager:
             scan_data["created_at"] = self._get_timestamp()
             
             file_path = self.scans_dir / f"{scan_id}.json"
-            self._save_json(file_path, scan_data)
+            await self._run(self._save_json, file_path, scan_data)
             
             logger.info(f"Saved scan results: {scan_id}")
             return scan_id
@@ -145,7 +333,7 @@ class FileStorageManager:
         """Get scan results by ID"""
         try:
             file_path = self.scans_dir / f"{scan_id}.json"
-            return self._load_json(file_path)
+            return await self._run(self._load_json, file_path)
         except Exception as e:
             logger.error(f"Get scan results error: {e}")
             return None
@@ -163,7 +351,7 @@ class FileStorageManager:
             
             # Save individual finding
             file_path = self.vulnerabilities_dir / f"{finding_id}.json"
-            self._save_json(file_path, finding_data)
+            await self._run(self._write_finding, file_path, finding_data)
             
             logger.info(f"Saved vulnerability finding: {finding_id}")
             return finding_id
@@ -176,37 +364,31 @@ class FileStorageManager:
                                        severity: Optional[str] = None) -> List[Dict[str, Any]]:
         """Get vulnerability findings"""
         try:
-            findings = []
-            
-            for file_path in self.vulnerabilities_dir.glob("*.json"):
-                finding = self._load_json(file_path)
-                if finding:
-                    # Apply filters
-                    if assessment_id and finding.get("assessment_id") != assessment_id:
-                        continue
-                    if target and finding.get("target") != target:
-                        continue
-                    if severity and finding.get("severity") != severity:
-                        continue
-                    
-                    findings.append(finding)
-            
-            return sorted(findings, key=lambda x: x.get("created_at", ""), reverse=True)
+            return await self._run(self._find_findings, assessment_id, target, severity)
         except Exception as e:
             logger.error(f"Get vulnerability findings error: {e}")
             return []
     
+    def _write_finding(self, file_path: Path, finding_data: Dict[str, Any]):
+        self._save_json(file_path, finding_data)
+        self.index.put_finding(finding_data, file_path.stat())
+    
+    def _find_findings(self, assessment_id: Optional[str], target: Optional[str],
+                       severity: Optional[str]) -> List[Dict[str, Any]]:
+        # filter in the index, read only the matching files (already newest first)
+        findings = []
+        for finding_id in self.index.finding_ids(assessment_id=assessment_id, target=target, severity=severity):
+            finding = self._load_json(self.vulnerabilities_dir / f"{finding_id}.json")
+            if finding:
+                findings.append(finding)
+        return findings
+    
     # Audit logging
     async def log_audit_event(self, event_data: Dict[str, Any]):
         """Log audit event"""
         try:
             event_data["timestamp"] = self._get_timestamp()
-            event_id = hash(event_data.get("event_type", "") + 
-                          event_data.get("action", "") + 
-                          self._get_timestamp())
-            
-            file_path = self.logs_dir / f"audit_{event_id}.json"
-            self._save_json(file_path, event_data)
+            await self._audit_log.aappend(event_data)
         except Exception as e:
             logger.error(f"Log audit event error: {e}")
     
@@ -221,8 +403,7 @@ class FileStorageManager:
                 "timestamp": self._get_timestamp()
             }
             
-            file_path = self.logs_dir / f"consent_{hash(target + self._get_timestamp())}.json"
-            self._save_json(file_path, consent_data)
+            await self._consent_log.aappend(consent_data)
         except Exception as e:
             logger.error(f"Log consent validation error: {e}")
     
@@ -239,8 +420,7 @@ class FileStorageManager:
                 "timestamp": self._get_timestamp()
             }
             
-            file_path = self.metrics_dir / f"metric_{hash(metric_name + self._get_timestamp())}.json"
-            self._save_json(file_path, metric_data)
+            await self._metric_log.aappend(metric_data)
         except Exception as e:
             logger.error(f"Save metric error: {e}")
     
@@ -248,26 +428,36 @@ class FileStorageManager:
                                 time_range: str = "1h") -> List[Dict[str, Any]]:
         """Get system metrics"""
         try:
-            metrics = []
-            
-            for file_path in self.metrics_dir.glob("*.json"):
-                metric = self._load_json(file_path)
-                if metric:
-                    # Apply filters
-                    if metric_name and metric.get("metric_name") != metric_name:
-                        continue
-                    
-                    # Time range filter (simplified)
-                    metrics.append(metric)
-            
-            return sorted(metrics, key=lambda x: x.get("timestamp", ""), reverse=True)
+            return await self._run(self._load_metrics, metric_name)
         except Exception as e:
             logger.error(f"Get system metrics error: {e}")
             return []
     
+    def _load_metrics(self, metric_name: Optional[str]) -> List[Dict[str, Any]]:
+        metrics = []
+        
+        # hourly segments, plus one-file-per-metric records written by older versions
+        legacy = (self._load_json(file_path) for file_path in self.metrics_dir.glob("*.json"))
+        for metric in (*self._metric_log.read(), *legacy):
+            if metric:
+                # Apply filters
+                if metric_name and metric.get("metric_name") != metric_name:
+                    continue
+                
+                # Time range filter (simplified)
+                metrics.append(metric)
+        
+        return sorted(metrics, key=lambda x: x.get("timestamp", ""), reverse=True)
+    
     # Health check
     async def health_check(self) -> Dict[str, Any]:
         """Health check for file storage"""
+        try:
+            return {**await self._run(self._health_check), "io": self.io_stats()}
+        except Exception as e:
+            return {"status": "unhealthy", "error": str(e), "storage_type": "file_system"}
+    
+    def _health_check(self) -> Dict[str, Any]:
         try:
             # Check if directories are accessible
             test_file = self.base_dir / "health_check.txt"
@@ -276,9 +466,9 @@ class FileStorageManager:
             test_file.unlink()  # Remove test file
             
             # Count files
-            assessment_count = len(list(self.assessments_dir.glob("*.json")))
-            scan_count = len(list(self.scans_dir.glob("*.json")))
-            vuln_count = len(list(self.vulnerabilities_dir.glob("*.json")))
+            assessment_count, vuln_count = self.index.counts()
+            with os.scandir(self.scans_dir) as entries:
+                scan_count = sum(1 for e in entries if e.name.endswith(".json"))
             
             return {
                 "status": "healthy",
@@ -295,36 +485,10 @@ class FileStorageManager:
     async def get_system_statistics(self) -> Dict[str, Any]:
         """Get system statistics"""
         try:
-            # Count assessments by status
-            assessments_by_status = {}
-            for file_path in self.assessments_dir.glob("*.json"):
-                assessment = self._load_json(file_path)
-                if assessment:
-                    status = assessment.get("status", "unknown")
-                    assessments_by_status[status] = assessments_by_status.get(status, 0) + 1
-            
-            # Count vulnerabilities by severity
-            vulns_by_severity = {}
-            for file_path in self.vulnerabilities_dir.glob("*.json"):
-                finding = self._load_json(file_path)
-                if finding and not finding.get("false_positive", False):
-                    severity = finding.get("severity", "unknown")
-                    vulns_by_severity[severity] = vulns_by_severity.get(severity, 0) + 1
-            
-            # Recent activity (last 24 hours)
-            recent_assessments = 0
-            recent_targets = set()
-            
-            for file_path in self.assessments_dir.glob("*.json"):
-                assessment = self._load_json(file_path)
-                if assessment:
-                    created_at = assessment.get("created_at")
-                    if created_at:
-                        # Simple check - in production, parse the timestamp properly
-                        recent_assessments += 1
-                        target = assessment.get("target")
-                        if target:
-                            recent_targets.add(target)
+            since = (datetime.now() - timedelta(hours=24)).isoformat()
+            stats = await self._run(self.index.statistics, since)
+            assessments_by_status = stats["assessments_by_status"]
+            vulns_by_severity = stats["findings_by_severity"]
             
             return {
                 "assessments": {
@@ -336,37 +500,13 @@ class FileStorageManager:
                     **vulns_by_severity
                 },
                 "recent_activity": {
-                    "assessments_24h": recent_assessments,
-                    "unique_targets_24h": len(recent_targets)
+                    "assessments_24h": stats["assessments_since"],
+                    "unique_targets_24h": stats["targets_since"]
                 }
             }
         except Exception as e:
             logger.error(f"Get system statistics error: {e}")
             return {}
-    # ----------  NEW  ----------
-    async def health_check(self) -> dict:
-        """Health check for file storage."""
-        try:
-            # write + delete test file
-            test_file = self.base_dir / "health_check.txt"
-            with open(test_file, "w") as f:
-                f.write("health_check")
-            test_file.unlink()  # remove test file
 
-            # counts
-            assessment_count = len(list(self.assessments_dir.glob("*.json")))
-            scan_count       = len(list(self.scans_dir.glob("*.json")))
-            vuln_count       = len(list(self.vulnerabilities_dir.glob("*.json")))
-
-            return {
-                "status": "healthy",
-                "storage_type": "file_system",
-                "assessments_count": assessment_count,
-                "scans_count": scan_count,
-                "vulnerabilities_count": vuln_count,
-                "data_directory": str(self.base_dir),
-            }
-        except Exception as e:
-            return {"status": "unhealthy", "error": str(e), "storage_type": "file_system"}
 # Global file storage instance
 file_storage = FileStorageManager()
\ No newline at end of file
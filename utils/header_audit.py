@@ -0,0 +1,256 @@
+"""
+HTTP security header audit for RedStorm
+Audits every live host in one async pass over a shared connection pool and
+evaluates the responses against a precompiled rule table (HSTS, CSP,
+framing, MIME sniffing, cookies, CORS, server disclosure, HTTPS redirect)
+"""
+import re
+import time
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Dict, Any, List, Iterable, Callable, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger("redstorm.header_audit")
+
+# reflected-origin probe for the CORS rules
+PROBE_ORIGIN = "https://redstorm-cors-probe.invalid"
+_HSTS_MIN_AGE = 15552000        # 180 days
+
+_VERSION = re.compile(r"\d+(?:\.\d+)+")
+_MAX_AGE = re.compile(r"max-age\s*=\s*\"?(\d+)", re.I)
+_UNSAFE_SCRIPT = re.compile(r"(?:^|;)\s*(?:script-src|default-src)[^;]*'unsafe-(?:inline|eval)'", re.I)
+_FRAME_ANCESTORS = re.compile(r"(?:^|;)\s*frame-ancestors\s", re.I)
+_COOKIE_NAME = re.compile(r"^\s*([^=;\s]+)")
+
+
+@dataclass
+class Response:
+    """What the rules see of one host: lower-cased headers, Set-Cookie list, redirect outcome."""
+    host: str
+    url: str
+    https: bool
+    headers: Dict[str, str]
+    cookies: List[str]
+    http_redirects_to_https: Optional[bool]      # None: plain HTTP not reachable
+
+
+@dataclass(frozen=True)
+class Rule:
+    issue_key: str            # canonical key, same namespace as utils.finding_dedup
+    type: str
+    issue: str
+    severity: str
+    description: str
+    https_only: bool
+    check: Callable[[Response], Optional[str]]     # -> evidence when the rule fires
+
+
+def _missing(header: str) -> Callable[[Response], Optional[str]]:
+    return lambda r: None if r.headers.get(header) else f"{header} header not set"
+
+
+def _hsts_weak(r: Response) -> Optional[str]:
+    value = r.headers.get("strict-transport-security")
+    if not value:
+        return None
+    m = _MAX_AGE.search(value)
+    age = int(m.group(1)) if m else 0
+    return f"max-age={age}" if age < _HSTS_MIN_AGE else None
+
+
+def _csp_unsafe(r: Response) -> Optional[str]:
+    value = r.headers.get("content-security-policy", "")
+    return value[:200] if _UNSAFE_SCRIPT.search(value) else None
+
+
+def _no_framing_protection(r: Response) -> Optional[str]:
+    if r.headers.get("x-frame-options") or _FRAME_ANCESTORS.search(r.headers.get("content-security-policy", "")):
+        return None
+    return "neither X-Frame-Options nor CSP frame-ancestors set"
+
+
+def _nosniff(r: Response) -> Optional[str]:
+    value = r.headers.get("x-content-type-options", "")
+    return None if value.strip().lower() == "nosniff" else f"x-content-type-options: {value or 'not set'}"
+
+
+def _cookies_without(flag: str) -> Callable[[Response], Optional[str]]:
+    pattern = re.compile(rf";\s*{flag}\b", re.I)
+
+    def check(r: Response) -> Optional[str]:
+        names = [m.group(1) for c in r.cookies if not pattern.search(c) and (m := _COOKIE_NAME.match(c))]
+        return ", ".join(names[:10]) if names else None
+    return check
+
+
+def _cors_reflects(r: Response) -> Optional[str]:
+    allow = r.headers.get("access-control-allow-origin", "")
+    if allow == PROBE_ORIGIN or allow == "null":
+        return f"access-control-allow-origin: {allow}"
+    return None
+
+
+def _cors_wildcard_credentials(r: Response) -> Optional[str]:
+    if r.headers.get("access-control-allow-origin") == "*" and \
+            r.headers.get("access-control-allow-credentials", "").lower() == "true":
+        return "wildcard origin with credentials"
+    return None
+
+
+def _server_version(r: Response) -> Optional[str]:
+    value = r.headers.get("server", "")
+    return f"server: {value}" if _VERSION.search(value) else None
+
+
+def _disclosure(header: str) -> Callable[[Response], Optional[str]]:
+    return lambda r: f"{header}: {r.headers[header]}" if r.headers.get(header) else None
+
+
+def _no_https_redirect(r: Response) -> Optional[str]:
+    return "plain HTTP is served without redirect" if r.http_redirects_to_https is False else None
+
+
+# evaluated in order for every host; built once at import
+RULES: Tuple[Rule, ...] = (
+    Rule("ssl:no-https-redirect", "ssl_config", "No HTTPS redirect", "medium",
+         "Site does not redirect HTTP to HTTPS", False, _no_https_redirect),
+    Rule("missing-header:strict-transport-security", "missing_header", "Missing Strict-Transport-Security", "medium",
+         "HSTS not set; clients can be downgraded to plain HTTP", True, _missing("strict-transport-security")),
+    Rule("weak-header:strict-transport-security", "weak_header", "Short HSTS max-age", "low",
+         "HSTS max-age below 180 days", True, _hsts_weak),
+    Rule("missing-header:content-security-policy", "missing_header", "Missing Content-Security-Policy", "medium",
+         "No CSP to restrict script sources", False, _missing("content-security-policy")),
+    Rule("weak-header:content-security-policy", "weak_header", "Unsafe Content-Security-Policy", "low",
+         "CSP allows 'unsafe-inline' or 'unsafe-eval' scripts", False, _csp_unsafe),
+    Rule("missing-header:x-frame-options", "missing_header", "Missing X-Frame-Options", "medium",
+         "Click-jacking protection absent", False, _no_framing_protection),
+    Rule("missing-header:x-content-type-options", "missing_header", "Missing X-Content-Type-Options", "low",
+         "MIME sniffing not disabled (nosniff)", False, _nosniff),
+    Rule("cookie:no-secure", "cookie_config", "Cookie without Secure flag", "medium",
+         "Cookies can be sent over plain HTTP", True, _cookies_without("secure")),
+    Rule("cookie:no-httponly", "cookie_config", "Cookie without HttpOnly flag", "low",
+         "Cookies are readable from JavaScript", False, _cookies_without("httponly")),
+    Rule("cookie:no-samesite", "cookie_config", "Cookie without SameSite attribute", "low",
+         "Cookies are sent on cross-site requests", False, _cookies_without("samesite")),
+    Rule("cors:misconfiguration", "cors_config", "CORS reflects arbitrary origin", "high",
+         "Any origin may read authenticated responses", False, _cors_reflects),
+    Rule("cors:wildcard-credentials", "cors_config", "CORS wildcard with credentials", "medium",
+         "Access-Control-Allow-Origin * combined with credentials", False, _cors_wildcard_credentials),
+    Rule("disclosure:server-version", "information_disclosure", "Server version disclosed", "low",
+         "Server header reveals the software version", False, _server_version),
+    Rule("disclosure:x-powered-by", "information_disclosure", "X-Powered-By disclosed", "low",
+         "X-Powered-By reveals the application stack", False, _disclosure("x-powered-by")),
+    Rule("disclosure:x-aspnet-version", "information_disclosure", "ASP.NET version disclosed", "low",
+         "X-AspNet-Version reveals the framework version", False, _disclosure("x-aspnet-version")),
+)
+
+
+def evaluate(response: Response, rules: Tuple[Rule, ...] = RULES) -> List[Dict[str, Any]]:
+    """Security issues for one host response."""
+    issues = []
+    for rule in rules:
+        if rule.https_only and not response.https:
+            continue
+        evidence = rule.check(response)
+        if evidence:
+            issues.append({
+                "type": rule.type,
+                "issue": rule.issue,
+                "severity": rule.severity,
+                "description": rule.description,
+                "issue_key": rule.issue_key,
+                "host": response.host,
+                "matched_at": response.url,
+                "evidence": evidence,
+            })
+    return issues
+
+
+def live_hosts(target: str, previous_results: Dict[str, Any]) -> List[str]:
+    """Apex target plus every active subdomain from reconnaissance, de-duplicated."""
+    hosts = [target.split("://")[-1].split("/")[0].lower()]
+    recon = previous_results.get("reconnaissance") or {}
+    for sub in recon.get("subdomains") or []:
+        name = sub.get("subdomain") if isinstance(sub, dict) else sub
+        status = sub.get("status", "active") if isinstance(sub, dict) else "active"
+        if isinstance(name, str) and name and status == "active":
+            hosts.append(name.strip().lower().rstrip("."))
+    return list(dict.fromkeys(h for h in hosts if h))
+
+
+class HeaderAuditor:
+    """
+    Async multi-host audit. One pooled client per audit; a process-wide
+    semaphore caps in-flight requests so concurrent assessments share the
+    budget instead of each opening thousands of sockets.
+    Header rules run on the final page (redirects followed); a second,
+    non-following plain-HTTP request only answers the HTTPS-redirect rule.
+    """
+
+    def __init__(self, max_in_flight: int = 100, timeout: float = 8.0):
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def audit(self, hosts: Iterable[str]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """(issues, stats) for all hosts."""
+        hosts = list(hosts)
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+
+        started = time.perf_counter()
+        limits = httpx.Limits(max_connections=self.max_in_flight, max_keepalive_connections=self.max_in_flight)
+        async with httpx.AsyncClient(verify=False, limits=limits, max_redirects=5,
+                                     timeout=httpx.Timeout(self.timeout, connect=min(self.timeout, 3.0)),
+                                     headers={"Origin": PROBE_ORIGIN}) as client:
+            responses = await asyncio.gather(*(self._probe(client, h) for h in hosts))
+
+        issues: List[Dict[str, Any]] = []
+        reachable = 0
+        for response in responses:
+            if response is not None:
+                reachable += 1
+                issues.extend(evaluate(response))
+        return issues, {
+            "hosts": len(hosts),
+            "reachable": reachable,
+            "issues": len(issues),
+            "rules": len(RULES),
+            "duration_s": round(time.perf_counter() - started, 2),
+        }
+
+    async def _get(self, client: httpx.AsyncClient, url: str, follow: bool) -> Optional[httpx.Response]:
+        async with self._slots:
+            try:
+                return await client.get(url, follow_redirects=follow)
+            except (httpx.HTTPError, OSError):
+                return None
+
+    async def _probe(self, client: httpx.AsyncClient, host: str) -> Optional[Response]:
+        page, plain = await asyncio.gather(self._get(client, f"https://{host}/", True),
+                                           self._get(client, f"http://{host}/", False))
+        if page is None and plain is not None:
+            page = await self._get(client, f"http://{host}/", True)
+        if page is None:
+            return None
+
+        redirects = None
+        if plain is not None:
+            location = plain.headers.get("location", "")
+            redirects = plain.is_redirect and location.lower().startswith("https://")
+
+        return Response(
+            host=host,
+            url=str(page.url),
+            https=page.url.scheme == "https",
+            headers={k.lower(): v for k, v in page.headers.items() if k.lower() != "set-cookie"},
+            cookies=page.headers.get_list("set-cookie"),
+            http_redirects_to_https=redirects,
+        )
+
+
+# Global auditor shared by all assessments
+header_auditor = HeaderAuditor()
@@ -0,0 +1,154 @@
+"""
+Persistent LLM response cache for RedStorm
+Responses are stored one file per key (sha256 of model, prompt, canonical
+input and temperature) under data/llm_cache with a size-bounded LRU index;
+concurrent identical requests share one in-flight generation.
+"""
+import os
+import json
+import time
+import asyncio
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger("redstorm.llm_cache")
+
+CACHE_DIR = Path("data") / "llm_cache"
+
+
+def cache_key(model: str, prompt: str, data: Any, temperature: float) -> str:
+    """Same model + instructions + input (key order ignored) + temperature -> same key."""
+    canonical = json.dumps([model, prompt, data, round(float(temperature), 3)],
+                           sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """Disk-backed LRU; recency is the file mtime, so it survives restarts."""
+
+    def __init__(self, cache_dir: Path = CACHE_DIR, max_bytes: int = 64 * 1024 * 1024, max_entries: int = 5000):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._index: Optional["OrderedDict[str, int]"] = None     # key -> size, oldest first
+        self._bytes = 0
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = self.misses = self.shared = 0
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def _load_index(self):
+        if self._index is not None:
+            return
+        entries = []
+        if self.cache_dir.exists():
+            for path in self.cache_dir.glob("*.json"):
+                try:
+                    st = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, path.stem, st.st_size))
+        entries.sort()
+        self._index = OrderedDict((key, size) for _, key, size in entries)
+        self._bytes = sum(self._index.values())
+
+    # sync API (blocking file I/O) ---------------------------------------
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            self._load_index()
+            if key not in self._index:
+                return None
+            self._index.move_to_end(key)
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                text = json.load(f)["response"]
+            os.utime(self._path(key))
+            return text
+        except (FileNotFoundError, ValueError, KeyError):
+            with self._lock:
+                self._bytes -= self._index.pop(key, 0)
+            return None
+
+    def put(self, key: str, response: str, meta: Optional[Dict[str, Any]] = None):
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            path = self._path(key)
+            tmp = path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"response": response, "created": time.time(), **(meta or {})}, f)
+            size = tmp.stat().st_size
+            os.replace(tmp, path)
+        except Exception as e:
+            logger.warning(f"Could not write LLM cache entry: {e}")
+            return
+        with self._lock:
+            self._load_index()
+            self._bytes += size - self._index.pop(key, 0)
+            self._index[key] = size
+            evicted = []
+            while self._index and (self._bytes > self.max_bytes or len(self._index) > self.max_entries):
+                old, old_size = self._index.popitem(last=False)
+                self._bytes -= old_size
+                evicted.append(old)
+        for old in evicted:
+            try:
+                self._path(old).unlink()
+            except FileNotFoundError:
+                pass
+
+    # async API ------------------------------------------------------------
+    async def get_or_generate(self, key: str, generate: Callable[[], Awaitable[str]],
+                              meta: Optional[Dict[str, Any]] = None) -> Tuple[str, str]:
+        """(response, 'hit' | 'shared' | 'miss'); file I/O runs in the default executor."""
+        loop = asyncio.get_running_loop()
+        cached = await loop.run_in_executor(None, self.get, key)
+        if cached is not None:
+            self.hits += 1
+            return cached, "hit"
+        pending = self._inflight.get(key)
+        while pending is not None:
+            try:
+                response = await asyncio.shield(pending)
+                self.shared += 1
+                return response, "shared"
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise               # this caller was cancelled, not the generation
+                pending = self._inflight.get(key)    # leader cancelled: take over
+
+        self.misses += 1
+        future = loop.create_future()
+        self._inflight[key] = future
+        try:
+            try:
+                response = await generate()
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as e:
+                future.set_exception(e)
+                future.exception()          # mark retrieved; followers re-raise it
+                raise
+            future.set_result(response)
+            # stay registered until the entry is on disk, so late callers share it too
+            await loop.run_in_executor(None, self.put, key, response, meta)
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+        return response, "miss"
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._load_index()
+            return {"entries": len(self._index), "bytes": self._bytes, "hits": self.hits,
+                    "misses": self.misses, "shared": self.shared, "in_flight": len(self._inflight)}
+
+
+# Global response cache used by agents.ollama_analyst
+llm_cache = LLMResponseCache()
@@ -0,0 +1,130 @@
+"""
+LLM request scheduler for RedStorm
+All generations against the local model go through one priority queue:
+concurrency is bounded to what the model host sustains (OLLAMA_NUM_PARALLEL),
+interactive requests are served before batch reports, and identical
+requests already queued or running are merged into one generation.
+"""
+import os
+import time
+import heapq
+import asyncio
+import itertools
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+logger = logging.getLogger("redstorm.llm_scheduler")
+
+INTERACTIVE = 0       # blocks a running phase (service hint)
+BATCH = 10            # final reports, summaries
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class LLMScheduler:
+    """Priority queue + concurrency gate + in-flight coalescing."""
+
+    def __init__(self, max_concurrency: int = int(os.environ.get("OLLAMA_NUM_PARALLEL", 1)), window: int = 500):
+        self.max_concurrency = max(1, max_concurrency)
+        self._queue: List[tuple] = []                    # (priority, seq, gate future)
+        self._seq = itertools.count()
+        self._running = 0
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._waits: Deque[float] = deque(maxlen=window)
+        self._runs: Deque[float] = deque(maxlen=window)
+        self.counters = {"submitted": 0, "coalesced": 0, "completed": 0, "failed": 0}
+
+    async def run(self, generate: Callable[[], Awaitable[Any]], priority: int = BATCH,
+                  key: Optional[str] = None) -> Any:
+        """Run `generate` when a slot is free; same key while in flight -> same result."""
+        self.counters["submitted"] += 1
+        while key is not None and key in self._inflight:
+            pending = self._inflight[key]
+            try:
+                value = await asyncio.shield(pending)
+                self.counters["coalesced"] += 1
+                return value
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise               # this caller was cancelled
+                # the leading request was cancelled: take over
+
+        result = asyncio.get_running_loop().create_future() if key is not None else None
+        if result is not None:
+            self._inflight[key] = result
+        try:
+            await self._acquire(priority)
+            started = time.perf_counter()
+            try:
+                value = await generate()
+            finally:
+                self._runs.append(time.perf_counter() - started)
+                self._release()
+        except asyncio.CancelledError:
+            if result is not None:
+                result.cancel()
+            raise
+        except Exception as e:
+            self.counters["failed"] += 1
+            if result is not None:
+                result.set_exception(e)
+                result.exception()      # followers re-raise; mark retrieved
+            raise
+        finally:
+            if key is not None and self._inflight.get(key) is result:
+                del self._inflight[key]
+        self.counters["completed"] += 1
+        if result is not None:
+            result.set_result(value)
+        return value
+
+    async def _acquire(self, priority: int):
+        queued = time.perf_counter()
+        if self._running < self.max_concurrency and not self._waiting():
+            self._running += 1
+        else:
+            gate = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._queue, (priority, next(self._seq), gate))
+            try:
+                await gate              # slot handed over by _release
+            except asyncio.CancelledError:
+                if gate.done() and not gate.cancelled():
+                    self._release()     # got the slot while being cancelled: pass it on
+                raise
+        self._waits.append(time.perf_counter() - queued)
+
+    def _release(self):
+        while self._queue:
+            _, _, gate = heapq.heappop(self._queue)
+            if not gate.done():
+                gate.set_result(None)   # slot moves to the waiter, _running unchanged
+                return
+        self._running -= 1
+
+    def _waiting(self) -> int:
+        return sum(1 for _, _, gate in self._queue if not gate.done())
+
+    def metrics(self) -> Dict[str, Any]:
+        waits, runs = list(self._waits), list(self._runs)
+        return {
+            "max_concurrency": self.max_concurrency,
+            "running": self._running,
+            "queue_depth": self._waiting(),
+            "in_flight_keys": len(self._inflight),
+            **self.counters,
+            "wait_ms": {"p50": round(_percentile(waits, 0.5) * 1000, 1),
+                        "p95": round(_percentile(waits, 0.95) * 1000, 1),
+                        "max": round(max(waits, default=0.0) * 1000, 1)},
+            "run_ms": {"p50": round(_percentile(runs, 0.5) * 1000, 1),
+                       "p95": round(_percentile(runs, 0.95) * 1000, 1)},
+        }
+
+
+# Global scheduler in front of agents.ollama_analyst
+llm_scheduler = LLMScheduler()
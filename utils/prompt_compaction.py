@@ -0,0 +1,98 @@
+"""
+Prompt compaction for RedStorm LLM calls
+Projects assessment results onto the fields a summary needs (raw tool output,
+banners and bookkeeping are dropped), orders finding lists by severity and
+truncates them, collapses whitespace, and tightens the limits until the
+serialised input fits a token budget.
+"""
+import re
+import json
+import logging
+from typing import Any, Dict, List, Tuple
+
+logger = logging.getLogger("redstorm.prompt_compaction")
+
+CHARS_PER_TOKEN = 4           # llama-family BPE averages ~4 chars/token on JSON
+
+# raw output and bookkeeping that never helps a summary
+DROP_KEYS = frozenset({
+    "raw_tools", "raw", "raw_output", "stdout", "stderr", "banner", "payloads",
+    "template_selection", "deduplication", "header_audit", "module_selection",
+    "ethical_disclaimer", "timestamp", "assessment_date", "references", "cvss_metrics",
+    "tools_required", "countermeasures", "steps", "websocket_manager", "client_id",
+})
+
+_SEVERITY_RANK = {"critical": 0, "high": 1, "medium": 2, "low": 3, "info": 4}
+_WHITESPACE = re.compile(r"\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _severity_key(item: Any) -> int:
+    if isinstance(item, dict):
+        sev = item.get("severity") or item.get("risk_level") or item.get("impact_level")
+        return _SEVERITY_RANK.get(str(sev).lower(), 5)
+    return 5
+
+
+def _project(value: Any, max_items: int, max_chars: int, cuts: List[int]) -> Any:
+    # cuts[0] counts truncated lists and strings
+    if isinstance(value, dict):
+        out = {}
+        for key, item in value.items():
+            if key in DROP_KEYS or item in (None, "", [], {}):
+                continue
+            out[key] = _project(item, max_items, max_chars, cuts)
+        return out
+    if isinstance(value, (list, tuple)):
+        items = sorted(value, key=_severity_key) if any(isinstance(i, dict) for i in value[:50]) else list(value)
+        kept = [_project(i, max_items, max_chars, cuts) for i in items[:max_items]]
+        if len(items) > max_items:
+            kept.append(f"... {len(items) - max_items} more")
+            cuts[0] += 1
+        return kept
+    if isinstance(value, str):
+        text = _WHITESPACE.sub(" ", value).strip()
+        if len(text) <= max_chars:
+            return text
+        cuts[0] += 1
+        return text[:max_chars] + "…"
+    if isinstance(value, float):
+        return round(value, 3)
+    return value
+
+
+def dumps(data: Any) -> str:
+    """Whitespace-free JSON for prompts."""
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def compact(data: Any, budget_tokens: int = 3000, max_items: int = 25,
+            max_chars: int = 300) -> Tuple[Any, Dict[str, Any]]:
+    """
+    (compacted data, stats). Lists and strings are cut shorter until the
+    serialised result fits `budget_tokens`; severity-ranked lists lose their
+    least severe entries first.
+    """
+    original = estimate_tokens(dumps(data))
+    items, chars = max_items, max_chars
+    while True:
+        cuts = [0]
+        result = _project(data, items, chars, cuts)
+        tokens = estimate_tokens(dumps(result))
+        if tokens <= budget_tokens or (items <= 1 and chars <= 40):
+            break
+        items, chars = max(1, items // 2), max(40, chars // 2)
+    stats = {
+        "original_tokens": original,
+        "compacted_tokens": tokens,
+        "budget_tokens": budget_tokens,
+        "compression_ratio": round(original / max(tokens, 1), 1),
+        "max_items": items,
+        "truncated": cuts[0],
+        "within_budget": tokens <= budget_tokens,
+    }
+    logger.info(f"Prompt compacted {original} -> {tokens} tokens (x{stats['compression_ratio']})")
+    return result, stats
@@ -0,0 +1,237 @@
+"""
+Risk scoring model for RedStorm
+One configurable model shared by the vulnerability agent (scan time) and the
+batch re-scorer, which re-applies it to every stored assessment with NumPy
+instead of re-running scans
+"""
+import json
+import time
+import asyncio
+import logging
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger("redstorm.risk_scoring")
+
+SEVERITIES = ("critical", "high", "medium", "low", "info")
+_SEV_INDEX = {s: i for i, s in enumerate(SEVERITIES)}
+MODEL_FILE = Path("data") / "risk_model.json"
+
+
+@dataclass
+class ScoringModel:
+    """finding score = weight[severity] * (1 + epss_factor * EPSS) * (kev_multiplier if KEV)"""
+    weights: Dict[str, float] = field(default_factory=lambda: {
+        "critical": 10, "high": 7, "medium": 4, "low": 1, "info": 0})
+    epss_factor: float = 1.0
+    kev_multiplier: float = 2.0
+    # lower bounds, checked from the top
+    thresholds: Dict[str, float] = field(default_factory=lambda: {
+        "critical": 50, "high": 25, "medium": 10})
+
+    @classmethod
+    def load(cls, path: Path = MODEL_FILE) -> "ScoringModel":
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return cls.from_dict(json.load(f))
+        except FileNotFoundError:
+            return cls()
+        except Exception as e:
+            logger.error(f"Invalid risk model {path}, using defaults: {e}")
+            return cls()
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], base: Optional["ScoringModel"] = None) -> "ScoringModel":
+        """Build a model from (partial) overrides on top of base (defaults if None)."""
+        model = cls.from_dict(base.to_dict()) if base else cls()
+        model.weights.update({k: float(v) for k, v in (data.get("weights") or {}).items() if k in _SEV_INDEX})
+        model.thresholds.update({k: float(v) for k, v in (data.get("thresholds") or {}).items()})
+        model.epss_factor = float(data.get("epss_factor", model.epss_factor))
+        model.kev_multiplier = float(data.get("kev_multiplier", model.kev_multiplier))
+        return model
+
+    def save(self, path: Path = MODEL_FILE):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def update(self, other: "ScoringModel"):
+        """Adopt other's parameters in place (the global model is shared by reference)."""
+        self.weights = dict(other.weights)
+        self.thresholds = dict(other.thresholds)
+        self.epss_factor = other.epss_factor
+        self.kev_multiplier = other.kev_multiplier
+
+    # ------------------------------------------------------------------
+    # vectorised scoring
+    # ------------------------------------------------------------------
+    def finding_scores(self, severity: np.ndarray, epss: np.ndarray, kev: np.ndarray) -> np.ndarray:
+        """Per-finding scores; severity is an index array into SEVERITIES."""
+        weight_table = np.array([self.weights.get(s, 0.0) for s in SEVERITIES], dtype=np.float64)
+        return (weight_table[severity]
+                * (1.0 + self.epss_factor * epss)
+                * np.where(kev, self.kev_multiplier, 1.0))
+
+    def levels(self, scores: np.ndarray) -> np.ndarray:
+        """Risk level names for rounded scores."""
+        out = np.full(scores.shape, "low", dtype=object)
+        # apply lowest threshold first so higher levels overwrite
+        for level in ("medium", "high", "critical"):
+            out[scores >= self.thresholds.get(level, np.inf)] = level
+        return out
+
+    def score(self, severities: List[str], epss: List[float], kev: List[bool]) -> Tuple[int, str]:
+        """(risk_score, level) for a single assessment."""
+        sev = np.fromiter((_SEV_INDEX.get(s, _SEV_INDEX["info"]) for s in severities), dtype=np.int8, count=len(severities))
+        total = np.rint(self.finding_scores(sev, np.asarray(epss, dtype=np.float64),
+                                            np.asarray(kev, dtype=bool)).sum())
+        return int(total), str(self.levels(np.array([total]))[0])
+
+
+def finding_signals(vuln_results: Dict[str, Any], intel=None) -> Tuple[List[str], List[float], List[bool]]:
+    """(severities, epss, kev) for every vulnerability + security issue of a vulnerability phase result."""
+    exploitability = {}
+    for m in vuln_results.get("cve_matches") or []:
+        epss, kev = m.get("epss_score", 0.0), m.get("kev", False)
+        if intel is not None:
+            fresh = intel.lookup(m.get("cve_id", ""))
+            if fresh:
+                epss, kev = fresh["epss_score"], fresh["kev"]
+        exploitability[m.get("affected_template", "")] = (epss, kev)
+
+    severities, epss_list, kev_list = [], [], []
+    for v in vuln_results.get("vulnerabilities") or []:
+        epss, kev = exploitability.get(str(v.get("template_id", "")).upper(), (0.0, False))
+        severities.append(str(v.get("severity", "info")).lower())
+        epss_list.append(epss)
+        kev_list.append(kev)
+    # configuration issues count once per issue however many hosts show them
+    # (header hygiene across 200 subdomains is one finding, not 200)
+    config: Dict[Any, str] = {}
+    for i, s in enumerate(vuln_results.get("security_issues") or []):
+        key = s.get("issue_key") or i
+        sev = str(s.get("severity", "info")).lower()
+        if _SEV_INDEX.get(sev, 4) < _SEV_INDEX.get(config.get(key, "info"), 4):
+            config[key] = sev
+        else:
+            config.setdefault(key, sev)
+    severities.extend(config.values())
+    epss_list.extend([0.0] * len(config))
+    kev_list.extend([False] * len(config))
+    return severities, epss_list, kev_list
+
+
+class RiskRescorer:
+    """Batch re-scoring of every stored assessment with one vectorised pass"""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    @staticmethod
+    def _vuln_results(assessment: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        phases = assessment.get("results") or assessment.get("phases") or {}
+        vuln = phases.get("vulnerability") if isinstance(phases, dict) else None
+        return vuln if isinstance(vuln, dict) and "risk_assessment" in vuln else None
+
+    @classmethod
+    def _patched(cls, assessment: Dict[str, Any], risk_update: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Copy of the assessment with only its risk_assessment subtree updated
+        (the path to it is copied, the rest is shared; stored docs are not mutated).
+        """
+        vuln = cls._vuln_results(assessment)
+        if vuln is None:
+            return None
+        section = "results" if assessment.get("results") else "phases"
+        phases = {**assessment[section],
+                  "vulnerability": {**vuln, "risk_assessment": {**vuln["risk_assessment"], **risk_update}}}
+        return {**assessment, section: phases}
+
+    async def rescore(self, model: Optional[ScoringModel] = None, refresh_intel: bool = False,
+                      write: bool = True) -> Dict[str, Any]:
+        """
+        Score on the storage I/O pool, then write back through the storage
+        write queue: each change patches the assessment as it is *then*
+        (a queued version included), never the possibly stale snapshot scored.
+        """
+        await self.storage.flush()          # score what has been saved so far
+        summary, updates = await self.storage._run(self._score, model, refresh_intel)
+        started = time.perf_counter()
+        if write:
+            written = await asyncio.gather(*(
+                self.storage.patch_assessment(assessment_id, lambda doc, u=risk_update: self._patched(doc, u))
+                for assessment_id, risk_update in updates))
+            summary["written"] = sum(written)
+        summary["timing"]["write_s"] = round(time.perf_counter() - started, 3)
+        return summary
+
+    def _score(self, model: Optional[ScoringModel], refresh_intel: bool
+               ) -> Tuple[Dict[str, Any], List[Tuple[str, Dict[str, Any]]]]:
+        """Blocking: load and score every stored assessment -> (summary, risk updates to write)."""
+        model = model or ScoringModel.load()
+        intel = None
+        if refresh_intel:
+            from .exploit_intel import exploit_intel
+            intel = exploit_intel if exploit_intel.open() else None
+
+        started = time.perf_counter()
+        docs: List[Tuple[Path, Dict[str, Any]]] = []
+        owner, severity, epss, kev = [], [], [], []
+        for path in self.storage.assessments_dir.glob("*.json"):
+            assessment = self.storage._load_json(path)
+            vuln = self._vuln_results(assessment) if assessment else None
+            if vuln is None:
+                continue
+            sev, e, k = finding_signals(vuln, intel)
+            owner.extend([len(docs)] * len(sev))
+            severity.extend(_SEV_INDEX.get(s, _SEV_INDEX["info"]) for s in sev)
+            epss.extend(e)
+            kev.extend(k)
+            docs.append((path, assessment))
+        loaded = time.perf_counter()
+
+        scores = np.rint(np.bincount(
+            np.asarray(owner, dtype=np.int64),
+            weights=model.finding_scores(np.asarray(severity, dtype=np.int8),
+                                         np.asarray(epss, dtype=np.float64),
+                                         np.asarray(kev, dtype=bool)),
+            minlength=len(docs)))
+        levels = model.levels(scores)
+        scored = time.perf_counter()
+
+        changed = 0
+        distribution: Dict[str, int] = {}
+        now = datetime.now().isoformat()
+        updates: List[Tuple[str, Dict[str, Any]]] = []
+        update = {"scoring_model": model.to_dict(), "rescored_at": now}
+        for (path, assessment), score, level in zip(docs, scores.tolist(), levels.tolist()):
+            distribution[level] = distribution.get(level, 0) + 1
+            risk = self._vuln_results(assessment)["risk_assessment"]
+            if risk.get("risk_score") == int(score) and risk.get("overall_risk_level") == level:
+                continue
+            changed += 1
+            updates.append((path.stem, {**update, "risk_score": int(score), "overall_risk_level": level}))
+
+        return {
+            "assessments": len(docs),
+            "findings": len(severity),
+            "changed": changed,
+            "written": 0,
+            "risk_levels": distribution,
+            "timing": {
+                "load_s": round(loaded - started, 3),
+                "score_s": round(scored - loaded, 4),
+            },
+            "model": model.to_dict(),
+        }, updates
+
+
+# Global scoring model used at scan time (data/risk_model.json overrides defaults)
+risk_model = ScoringModel.load()
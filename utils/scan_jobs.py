@@ -0,0 +1,285 @@
+"""
+Asynchronous scan jobs for RedStorm
+Long-running scanners (OpenVAS) are started once, their handle is persisted,
+one background poller checks every open job with short non-blocking calls,
+and finished reports are ingested into the assessment they belong to.
+No agent coroutine or subprocess slot is held while the scan runs.
+"""
+import os
+import json
+import time
+import uuid
+import base64
+import asyncio
+import logging
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Callable, Awaitable, Tuple
+
+from .tool_timing import run_tool
+
+logger = logging.getLogger("redstorm.scan_jobs")
+
+JOBS_DIR = Path("data") / "scan_jobs"
+_REDSTORM_TOOLS = Path(__file__).resolve().parent.parent / "tools" / "redstorm-tools"
+
+# pending = not started yet, done = finished but not yet ingested
+ACTIVE_STATES = ("pending", "queued", "running", "done")
+TERMINAL_STATES = ("ingested", "failed")
+
+
+@dataclass
+class ScanJob:
+    job_id: str
+    tool: str
+    target: str
+    assessment_id: Optional[str]
+    state: str = "pending"
+    handle: Dict[str, Any] = field(default_factory=dict)     # backend specific (task/report ids)
+    progress: int = 0
+    polls: int = 0
+    error: str = ""
+    findings: int = 0
+    created: float = field(default_factory=time.time)
+    updated: float = field(default_factory=time.time)
+    next_poll: float = 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        return {k: v for k, v in asdict(self).items() if k not in ("handle", "next_poll")}
+
+
+# ----------------------------------------------------------
+# backends: start / poll / fetch, each call short-lived
+# ----------------------------------------------------------
+class OpenVASBackend:
+    """Go wrapper in handle mode: openvas --start / --status / --report"""
+
+    poll_interval = 60.0
+
+    async def _call(self, target: str, *args: str, timeout: float = 120) -> Dict[str, Any]:
+        run = await run_tool([str(_REDSTORM_TOOLS), "openvas", *args], f"openvas:{args[0].lstrip('-')}", target, timeout)
+        start = run.stdout.find(b"{")
+        if start == -1:
+            raise RuntimeError(f"openvas {args[0]}: no JSON ({run.outcome})")
+        return json.loads(run.stdout[start:])
+
+    async def start(self, target: str) -> Dict[str, Any]:
+        data = await self._call(target, "--start", "-t", target, timeout=900)
+        if data.get("status", {}).get("state") == "error":
+            raise RuntimeError(data["status"].get("meaning", "start failed"))
+        return {"task_id": data["task_id"]}
+
+    async def poll(self, job: ScanJob) -> Tuple[str, int]:
+        data = await self._call(job.target, "--status", job.handle["task_id"])
+        status = data.get("status", {})
+        if status.get("state") == "error":
+            raise RuntimeError(status.get("meaning", "task failed"))
+        if data.get("report_id"):
+            job.handle["report_id"] = data["report_id"]
+        return status.get("state", "running"), int(data.get("progress") or 0)
+
+    async def fetch(self, job: ScanJob) -> List[Dict[str, Any]]:
+        data = await self._call(job.target, "--report", job.handle["report_id"])
+        if not data.get("report"):
+            raise RuntimeError(data.get("status", {}).get("meaning", "empty report"))
+        return parse_openvas_report(data["report"], job.target)
+
+
+class FakeScannerBackend:
+    """
+    Local stand-in that walks queued -> running -> done on a clock, for
+    exercising the job pipeline without a GVM container.
+    """
+
+    poll_interval = 0.2
+
+    def __init__(self, queued_s: float = 0.5, running_s: float = 1.0,
+                 findings: Optional[List[Dict[str, Any]]] = None, fail: bool = False):
+        self.queued_s, self.running_s, self.fail = queued_s, running_s, fail
+        self.findings = findings if findings is not None else [
+            {"template_id": "openvas-1.3.6.1.4.1.25623.1.0.108440", "name": "SSL/TLS: Deprecated TLSv1.0 Protocol",
+             "severity": "medium", "description": "Deprecated TLS protocol versions are enabled."},
+        ]
+
+    async def start(self, target: str) -> Dict[str, Any]:
+        return {"task_id": uuid.uuid4().hex, "started": time.time()}
+
+    async def poll(self, job: ScanJob) -> Tuple[str, int]:
+        elapsed = time.time() - job.handle["started"]
+        if elapsed < self.queued_s:
+            return "queued", 0
+        if self.fail:
+            raise RuntimeError("fake scanner failure")
+        if elapsed < self.queued_s + self.running_s:
+            return "running", int(100 * (elapsed - self.queued_s) / self.running_s)
+        job.handle["report_id"] = job.handle["task_id"]
+        return "done", 100
+
+    async def fetch(self, job: ScanJob) -> List[Dict[str, Any]]:
+        return [{**f, "matched_at": job.target} for f in self.findings]
+
+
+def parse_openvas_report(report_b64: str, target: str) -> List[Dict[str, Any]]:
+    """GMP XML report -> findings in the nuclei/ZAP schema."""
+    root = ET.fromstring(base64.b64decode(report_b64))
+    findings = []
+    for result in root.iter("result"):
+        nvt = result.find("nvt")
+        threat = (result.findtext("threat") or "").lower()
+        severity = {"high": "high", "medium": "medium", "low": "low"}.get(threat, "info")
+        try:
+            if float(result.findtext("severity") or 0) >= 9.0:
+                severity = "critical"
+        except ValueError:
+            pass
+        cves = [r.get("id") for r in nvt.iter("ref") if r.get("type") == "cve"] if nvt is not None else []
+        oid = nvt.get("oid", "") if nvt is not None else ""
+        host = (result.findtext("host") or target).strip()
+        port = (result.findtext("port") or "").split("/")[0]
+        findings.append({
+            "template_id": cves[0] if cves else f"openvas-{oid}",
+            "name": result.findtext("name") or oid,
+            "severity": severity,
+            "description": " ".join((result.findtext("description") or "").split())[:500],
+            "matched_at": f"{host}:{port}" if port.isdigit() else host,
+        })
+    return findings
+
+
+# ----------------------------------------------------------
+# manager
+# ----------------------------------------------------------
+IngestCallback = Callable[[ScanJob, List[Dict[str, Any]]], Awaitable[None]]
+
+
+class ScanJobManager:
+    """Persists job handles and drives them with one background poller."""
+
+    def __init__(self, jobs_dir: Path = JOBS_DIR, tick: float = 5.0, max_poll_failures: int = 5):
+        self.jobs_dir = Path(jobs_dir)
+        self.tick = tick
+        self.max_poll_failures = max_poll_failures
+        self.backends: Dict[str, Any] = {"openvas": OpenVASBackend(), "fake": FakeScannerBackend()}
+        self.jobs: Dict[str, ScanJob] = {}
+        self._callbacks: List[IngestCallback] = []
+        self._failures: Dict[str, int] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._advancing: Dict[str, asyncio.Task] = {}      # job_id -> start/poll/fetch in flight
+        self._wake = asyncio.Event()
+
+    # persistence --------------------------------------------------------
+    def _path(self, job_id: str) -> Path:
+        return self.jobs_dir / f"{job_id}.json"
+
+    def _save(self, job: ScanJob):
+        job.updated = time.time()
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self._path(job.job_id).with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(asdict(job), f, indent=2)
+        os.replace(tmp, self._path(job.job_id))
+
+    def load(self):
+        """Resume jobs persisted by a previous process."""
+        for path in self.jobs_dir.glob("*.json"):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    job = ScanJob(**json.load(f))
+            except Exception as e:
+                logger.warning(f"Skipping unreadable scan job {path.name}: {e}")
+                continue
+            job.next_poll = 0.0
+            self.jobs[job.job_id] = job
+        resumed = sum(1 for j in self.jobs.values() if j.state in ACTIVE_STATES)
+        if resumed:
+            logger.info(f"Resumed {resumed} scan jobs")
+
+    # public API ---------------------------------------------------------
+    def on_ingest(self, callback: IngestCallback):
+        """Register an async callback(job, findings) run when a report is ingested."""
+        self._callbacks.append(callback)
+
+    async def submit(self, tool: str, target: str, assessment_id: Optional[str] = None) -> ScanJob:
+        """Queue a scan; it is started by the poller, so this returns immediately."""
+        if tool not in self.backends:
+            raise ValueError(f"Unknown scan backend: {tool}")
+        job = ScanJob(job_id=uuid.uuid4().hex[:12], tool=tool, target=target, assessment_id=assessment_id)
+        self.jobs[job.job_id] = job
+        await asyncio.get_running_loop().run_in_executor(None, self._save, job)
+        self.ensure_running()
+        self._wake.set()
+        return job
+
+    def list(self, assessment_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        return [j.summary() for j in self.jobs.values()
+                if not assessment_id or j.assessment_id == assessment_id]
+
+    def ensure_running(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._poll_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for task in list(self._advancing.values()):
+            task.cancel()
+        await asyncio.gather(*self._advancing.values(), return_exceptions=True)
+        self._advancing.clear()
+
+    # poller -------------------------------------------------------------
+    async def _poll_loop(self):
+        while True:
+            now = time.time()
+            waiting = [j for j in self.jobs.values() if j.state in ACTIVE_STATES and j.job_id not in self._advancing]
+            # each job advances in its own task: a slow --start must not hold up other jobs' polls
+            for job in waiting:
+                if job.next_poll <= now:
+                    task = asyncio.get_running_loop().create_task(self._advance(job))
+                    self._advancing[job.job_id] = task
+                    task.add_done_callback(lambda _t, job_id=job.job_id: self._advanced(job_id))
+            pending = [j.next_poll for j in waiting if j.job_id not in self._advancing]
+            wait = max(0.05, min(pending) - time.time()) if pending else None
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=min(wait, self.tick) if wait else None)
+            except asyncio.TimeoutError:
+                pass
+
+    def _advanced(self, job_id: str):
+        self._advancing.pop(job_id, None)
+        self._wake.set()                # reschedule around the job's new next_poll
+
+    async def _advance(self, job: ScanJob):
+        backend = self.backends[job.tool]
+        try:
+            if job.state == "pending":
+                job.handle = await backend.start(job.target)
+                job.state = "queued"
+            elif job.state != "done":
+                job.state, job.progress = await backend.poll(job)
+                job.polls += 1
+            if job.state == "done":
+                findings = await backend.fetch(job)
+                for callback in self._callbacks:
+                    await callback(job, findings)
+                job.state, job.findings = "ingested", len(findings)
+            self._failures.pop(job.job_id, None)
+        except Exception as e:
+            failures = self._failures.get(job.job_id, 0) + 1
+            self._failures[job.job_id] = failures
+            job.error = str(e)
+            if failures >= self.max_poll_failures:
+                job.state = "failed"
+                logger.error(f"Scan job {job.job_id} ({job.tool}) failed: {e}")
+        job.next_poll = time.time() + backend.poll_interval
+        await asyncio.get_running_loop().run_in_executor(None, self._save, job)
+
+
+# Global job manager (poller started with the API)
+scan_jobs = ScanJobManager()
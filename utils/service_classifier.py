@@ -0,0 +1,135 @@
+"""
+Deterministic service-hint classifier for RedStorm
+Derives the exploitation service hint from what earlier phases already
+fingerprinted (technologies, service names/versions, open ports, finding
+template ids). Every piece of evidence votes for a hint with a weight;
+votes for the same hint combine as independent evidence (noisy-OR) and a
+competing application hint lowers the confidence. Only a low-confidence
+result needs the LLM.
+"""
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+from utils.template_index import fingerprint_tokens
+
+logger = logging.getLogger("redstorm.service_classifier")
+
+GENERIC_HINTS = ("http", "https")
+
+# fingerprint tokens that name a hint differently
+ALIASES = {
+    "wp": "wordpress", "wp-content": "wordpress", "woocommerce": "wordpress",
+    "nextjs": "next-js", "next.js": "next-js", "nuxt": "nuxt-js", "nuxtjs": "nuxt-js",
+    "craft": "craftcms", "concrete": "concrete5", "october": "octobercms",
+    "tiki": "tiki-wiki", "vanilla": "vanilla-forums", "swagger-ui": "swagger",
+    "expression": "expressionengine", "bitrix24": "bitrix",
+    "ssl/http": "https", "http-proxy": "http", "http-alt": "http", "https-alt": "https",
+}
+
+PORT_HINTS = {80: "http", 8000: "http", 8008: "http", 8080: "http", 8888: "http",
+              443: "https", 8443: "https", 9443: "https"}
+
+# evidence weights, by source
+TECH_CONFIDENCE = {"high": 0.9, "medium": 0.7, "low": 0.4}
+SERVICE_WEIGHT = 0.6
+VERSION_WEIGHT = 0.5
+PORT_WEIGHT = 0.5
+FINDING_WEIGHT = 0.5
+
+
+class ServiceClassifier:
+    """previous phase results -> {'hint', 'confidence', 'evidence', 'scores'}."""
+
+    def __init__(self, threshold: float = 0.6):
+        self.threshold = threshold
+
+    def classify(self, previous_results: Dict[str, Any], valid_hints: Iterable[str]) -> Dict[str, Any]:
+        valid = set(valid_hints)
+        misses: Dict[str, float] = {}           # hint -> P(all evidence wrong)
+        evidence: List[Dict[str, Any]] = []
+
+        def vote(names: Iterable[str], weight: float, source: str):
+            for hint in self._hints(names, valid):
+                misses[hint] = misses.get(hint, 1.0) * (1.0 - weight)
+                evidence.append({"hint": hint, "source": source, "weight": weight})
+
+        recon = previous_results.get("reconnaissance") or {}
+        for tech in recon.get("technologies") or []:
+            if isinstance(tech, dict):
+                weight = TECH_CONFIDENCE.get(str(tech.get("confidence", "")).lower(), 0.6)
+                vote([tech.get("name", "")], weight, f"technology:{tech.get('name', '')}")
+            elif isinstance(tech, str):
+                vote([tech], 0.6, f"technology:{tech}")
+
+        scan = previous_results.get("scanning") or {}
+        seen = set()            # services are enriched open_ports: count each port once
+        for svc in (scan.get("services") or []) + (scan.get("open_ports") or []):
+            if not isinstance(svc, dict) or (svc.get("host"), svc.get("port")) in seen:
+                continue
+            seen.add((svc.get("host"), svc.get("port")))
+            port, name = svc.get("port"), str(svc.get("service") or "").lower()
+            if name and name != "unknown":
+                vote([name], SERVICE_WEIGHT, f"service:{name}/{port}")
+            if svc.get("version"):
+                vote([svc["version"]], VERSION_WEIGHT, f"version:{svc['version']}")
+            if PORT_HINTS.get(_as_port(port)) in valid:
+                hint = PORT_HINTS[_as_port(port)]
+                misses[hint] = misses.get(hint, 1.0) * (1.0 - PORT_WEIGHT)
+                evidence.append({"hint": hint, "source": f"port:{port}", "weight": PORT_WEIGHT})
+
+        vuln = previous_results.get("vulnerability") or {}
+        for finding in vuln.get("vulnerabilities") or []:
+            if isinstance(finding, dict) and finding.get("template_id"):
+                vote([str(finding["template_id"]).split("-")[0]], FINDING_WEIGHT,
+                     f"finding:{finding['template_id']}")
+
+        scores = {hint: 1.0 - miss for hint, miss in misses.items()}
+        hint, confidence = self._decide(scores)
+        return {
+            "hint": hint,
+            "confidence": round(confidence, 3),
+            "confident": hint is not None and confidence >= self.threshold,
+            "scores": {h: round(s, 3) for h, s in sorted(scores.items(), key=lambda kv: -kv[1])},
+            "evidence": evidence[:50],
+        }
+
+    @staticmethod
+    def _hints(names: Iterable[str], valid: set) -> set:
+        hints = set()
+        for name in names:
+            lowered = str(name or "").lower().strip()
+            if not lowered:
+                continue
+            for token in fingerprint_tokens([lowered]) | {lowered}:
+                hint = ALIASES.get(token, token)
+                if hint in valid:
+                    hints.add(hint)
+        return hints
+
+    @staticmethod
+    def _decide(scores: Dict[str, float]) -> tuple:
+        """
+        Application hints refine the generic web hints, so they only compete
+        with each other; the runner-up costs half its score in confidence.
+        """
+        specific = sorted(((s, h) for h, s in scores.items() if h not in GENERIC_HINTS), reverse=True)
+        if specific:
+            runner_up = specific[1][0] if len(specific) > 1 else 0.0
+            return specific[0][1], specific[0][0] - 0.5 * runner_up
+        generic = {h: scores[h] for h in GENERIC_HINTS if h in scores}
+        if not generic:
+            return None, 0.0
+        # a web root on both ports is one site, not two candidates: prefer TLS
+        best = "https" if "https" in generic else "http"
+        return best, max(generic.values())
+
+
+def _as_port(value: Any) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+# Global classifier used by the orchestrator before exploitation
+service_classifier = ServiceClassifier()
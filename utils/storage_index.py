@@ -0,0 +1,253 @@
+"""
+SQLite metadata index for RedStorm file storage
+One row per stored assessment (id, client, target, status, phase,
+timestamps, severity counts) and per vulnerability finding, kept next to
+the JSON files and updated on every write, so listing, filtering and
+statistics never open the documents themselves. Files changed behind the
+storage manager's back are picked up by a stat-only reconcile on open.
+"""
+import os
+import json
+import sqlite3
+import threading
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger("redstorm.storage_index")
+
+SEVERITIES = ("critical", "high", "medium", "low", "info")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS assessments (
+    id TEXT PRIMARY KEY,
+    client_id TEXT,
+    target TEXT,
+    status TEXT,
+    current_phase TEXT,
+    created_at TEXT,
+    updated_at TEXT,
+    critical INTEGER NOT NULL DEFAULT 0,
+    high INTEGER NOT NULL DEFAULT 0,
+    medium INTEGER NOT NULL DEFAULT 0,
+    low INTEGER NOT NULL DEFAULT 0,
+    info INTEGER NOT NULL DEFAULT 0,
+    mtime_ns INTEGER,
+    size INTEGER
+);
+CREATE INDEX IF NOT EXISTS assessments_status ON assessments (status, created_at);
+CREATE INDEX IF NOT EXISTS assessments_client ON assessments (client_id, created_at);
+CREATE INDEX IF NOT EXISTS assessments_target ON assessments (target, created_at);
+CREATE INDEX IF NOT EXISTS assessments_created ON assessments (created_at);
+CREATE TABLE IF NOT EXISTS findings (
+    id TEXT PRIMARY KEY,
+    assessment_id TEXT,
+    target TEXT,
+    severity TEXT,
+    false_positive INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT,
+    mtime_ns INTEGER,
+    size INTEGER
+);
+CREATE INDEX IF NOT EXISTS findings_assessment ON findings (assessment_id);
+CREATE INDEX IF NOT EXISTS findings_target ON findings (target);
+CREATE INDEX IF NOT EXISTS findings_severity ON findings (severity);
+"""
+
+_SUMMARY_COLUMNS = ("id", "client_id", "target", "status", "current_phase", "created_at", "updated_at") + SEVERITIES
+
+
+def severity_counts(assessment: Dict[str, Any]) -> Dict[str, int]:
+    """Finding counts of the vulnerability phase, whichever layout the document uses."""
+    counts = dict.fromkeys(SEVERITIES, 0)
+    for section in ("results", "phases"):
+        vuln = (assessment.get(section) or {}).get("vulnerability")
+        if isinstance(vuln, dict):
+            for finding in vuln.get("vulnerabilities") or []:
+                sev = str(finding.get("severity", "info") if isinstance(finding, dict) else "info").lower()
+                counts[sev if sev in counts else "info"] += 1
+            break
+    return counts
+
+
+class StorageIndex:
+    """Thread-safe (one connection + lock); all methods are blocking and fast."""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # ------------------------------------------------------------------
+    # writes
+    # ------------------------------------------------------------------
+    def put_assessment(self, assessment: Dict[str, Any], stat: Optional[os.stat_result] = None):
+        self._put("assessments", [_assessment_row(assessment, stat)])
+
+    def put_finding(self, finding: Dict[str, Any], stat: Optional[os.stat_result] = None):
+        self._put("findings", [_finding_row(finding, stat)])
+
+    def _put(self, table: str, rows: List[tuple]):
+        if not rows:
+            return
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN")
+            try:
+                db.executemany(f"INSERT OR REPLACE INTO {table} VALUES ({','.join('?' * len(rows[0]))})", rows)
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+
+    def delete_assessment(self, assessment_id: str):
+        with self._lock:
+            self._db().execute("DELETE FROM assessments WHERE id = ?", (assessment_id,))
+
+    # ------------------------------------------------------------------
+    # queries
+    # ------------------------------------------------------------------
+    def assessments(self, statuses: Optional[Iterable[str]] = None, client_id: Optional[str] = None,
+                    target: Optional[str] = None, limit: Optional[int] = None,
+                    offset: int = 0) -> List[Dict[str, Any]]:
+        """Summary rows, newest first."""
+        where, args = self._where(statuses=statuses, client_id=client_id, target=target)
+        sql = f"SELECT {','.join(_SUMMARY_COLUMNS)} FROM assessments{where} ORDER BY created_at DESC"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            args += [int(limit), int(offset)]
+        with self._lock:
+            rows = self._db().execute(sql, args).fetchall()
+        return [_summary(row) for row in rows]
+
+    def finding_ids(self, assessment_id: Optional[str] = None, target: Optional[str] = None,
+                    severity: Optional[str] = None) -> List[str]:
+        """Matching finding ids, newest first."""
+        where, args = self._where(assessment_id=assessment_id, target=target, severity=severity)
+        with self._lock:
+            rows = self._db().execute(f"SELECT id FROM findings{where} ORDER BY created_at DESC", args).fetchall()
+        return [row[0] for row in rows]
+
+    def statistics(self, since: str) -> Dict[str, Any]:
+        with self._lock:
+            db = self._db()
+            by_status = dict(db.execute("SELECT COALESCE(status, 'unknown'), COUNT(*) FROM assessments "
+                                        "GROUP BY 1").fetchall())
+            by_severity = dict(db.execute("SELECT COALESCE(severity, 'unknown'), COUNT(*) FROM findings "
+                                          "WHERE false_positive = 0 GROUP BY 1").fetchall())
+            recent, targets = db.execute("SELECT COUNT(*), COUNT(DISTINCT target) FROM assessments "
+                                         "WHERE created_at >= ?", (since,)).fetchone()
+        return {"assessments_by_status": by_status, "findings_by_severity": by_severity,
+                "assessments_since": recent, "targets_since": targets}
+
+    def counts(self) -> Tuple[int, int]:
+        with self._lock:
+            db = self._db()
+            return (db.execute("SELECT COUNT(*) FROM assessments").fetchone()[0],
+                    db.execute("SELECT COUNT(*) FROM findings").fetchone()[0])
+
+    @staticmethod
+    def _where(statuses: Optional[Iterable[str]] = None, **equals) -> Tuple[str, list]:
+        clauses, args = [], []
+        if statuses is not None:
+            statuses = list(statuses)
+            clauses.append(f"status IN ({','.join('?' * len(statuses))})")
+            args += statuses
+        for column, value in equals.items():
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                args.append(value)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), args
+
+    # ------------------------------------------------------------------
+    # reconcile with the directories (startup)
+    # ------------------------------------------------------------------
+    def reconcile(self, assessments_dir: Path, findings_dir: Path) -> Dict[str, int]:
+        """
+        Stat every file, re-read only those whose (mtime, size) differ from
+        the index, drop rows whose file is gone. Parsing cost is proportional
+        to what changed, not to what is stored.
+        """
+        stats = {}
+        for table, directory, id_key, to_row in (("assessments", assessments_dir, "assessment_id", _assessment_row),
+                                                 ("findings", findings_dir, "id", _finding_row)):
+            with self._lock:
+                known = {row[0]: (row[1], row[2]) for row in
+                         self._db().execute(f"SELECT id, mtime_ns, size FROM {table}").fetchall()}
+            seen, rows, reindexed = set(), [], 0
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if not entry.name.endswith(".json") or not entry.is_file():
+                        continue
+                    key = entry.name[:-5]
+                    seen.add(key)
+                    st = entry.stat()
+                    if known.get(key) != (st.st_mtime_ns, st.st_size):
+                        doc = _read(Path(entry.path))
+                        if doc is not None:
+                            rows.append(to_row({**doc, id_key: key}, st))     # the file name is the id
+                    if len(rows) >= 1000:           # one transaction per batch
+                        self._put(table, rows)
+                        reindexed, rows = reindexed + len(rows), []
+            self._put(table, rows)
+            reindexed += len(rows)
+            gone = [(k,) for k in known if k not in seen]
+            with self._lock:
+                self._db().executemany(f"DELETE FROM {table} WHERE id = ?", gone)
+            stats[table] = {"indexed": len(seen), "reindexed": reindexed, "removed": len(gone)}
+        if any(s["reindexed"] or s["removed"] for s in stats.values()):
+            logger.info(f"Storage index reconciled: {stats}")
+        return stats
+
+
+def _read(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            doc = json.load(f)
+        return doc if isinstance(doc, dict) else None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Not indexing unreadable {path}: {e}")
+        return None
+
+
+def _assessment_row(assessment: Dict[str, Any], stat: Optional[os.stat_result]) -> tuple:
+    counts = severity_counts(assessment)
+    return (str(assessment.get("assessment_id")), assessment.get("client_id"), assessment.get("target"),
+            assessment.get("status"), assessment.get("current_phase"),
+            _text(assessment.get("created_at")), _text(assessment.get("updated_at")),
+            *(counts[s] for s in SEVERITIES),
+            stat.st_mtime_ns if stat else None, stat.st_size if stat else None)
+
+
+def _finding_row(finding: Dict[str, Any], stat: Optional[os.stat_result]) -> tuple:
+    return (str(finding.get("id")), finding.get("assessment_id"), finding.get("target"),
+            finding.get("severity"), int(bool(finding.get("false_positive", False))),
+            _text(finding.get("created_at")),
+            stat.st_mtime_ns if stat else None, stat.st_size if stat else None)
+
+
+def _text(value: Any) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+def _summary(row: tuple) -> Dict[str, Any]:
+    out = dict(zip(_SUMMARY_COLUMNS, row))
+    out["assessment_id"] = out.pop("id")
+    out["severity_counts"] = {s: out.pop(s) for s in SEVERITIES}
+    return out
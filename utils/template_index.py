@@ -0,0 +1,323 @@
+"""
+Nuclei template index for RedStorm
+Maps technology fingerprints (tags, vendor, product) to template files
+so the vulnerability phase only runs what is relevant to the target,
+and template ids to their metadata for O(1) finding enrichment
+"""
+import os
+import re
+import heapq
+import pickle
+import threading
+import logging
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Iterable, Set
+
+import yaml
+
+logger = logging.getLogger("redstorm.template_index")
+
+TEMPLATES_DIR = Path(__file__).resolve().parent.parent / "tools" / "pkg" / "vulnerability" / "templates"
+CACHE_FILE = Path(__file__).resolve().parent.parent / "tools" / ".cache" / "template-index.pkl"
+_CACHE_VERSION = 3
+_DESCRIPTION_LIMIT = 500
+
+# libyaml is ~10x faster than the pure-python loader
+_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# template trees that cannot run against a plain URL target
+# (local files, code/headless/dast protocols, workflows, user-input OSINT)
+_EXCLUDED_DIRS = (
+    "file/", "code/", "headless/", "dast/", "workflows/", "helpers/",
+    "profiles/", "cloud/", "http/osint/", "http/token-spray/",
+)
+
+# generic checks always included, whatever the fingerprint
+_BASELINE_DIRS = ("ssl/", "dns/", "http/takeovers/")
+_BASELINE_SEVERITIES = {"medium", "high", "critical"}
+_BASELINE_GENERIC_DIRS = ("http/misconfiguration/", "http/exposures/")
+
+# tokens too generic to identify a technology
+_STOP_TOKENS = {
+    "http", "https", "tcp", "udp", "ssl", "tls", "web", "server", "unknown",
+    "open", "service", "version", "linux", "unix", "ubuntu", "debian", "centos",
+    "cve", "panel", "detect", "tech", "login", "cms", "api", "html", "json",
+}
+
+_TOP_LEVEL_KEY = re.compile(r"^[A-Za-z_-]+:", re.M)
+_TOKEN = re.compile(r"[a-z][a-z0-9_.+-]*[a-z0-9]")
+_SEPARATORS = re.compile(r"[-_.+]")
+
+
+def _header(text: str) -> str:
+    """Keep only the `id:` / `info:` part of a template (skip the request bodies)."""
+    for m in _TOP_LEVEL_KEY.finditer(text):
+        if m.group(0)[:-1] not in ("id", "info"):
+            return text[:m.start()]
+    return text
+
+
+def _as_list(value: Any) -> List[str]:
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [v.strip() for v in value.split(",") if v.strip()]
+    if isinstance(value, (list, tuple)):
+        return [str(v).strip() for v in value if str(v).strip()]
+    return [str(value)]
+
+
+def _as_float(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def fingerprint_tokens(names: Iterable[str]) -> Set[str]:
+    """'nginx/1.18.0' -> {'nginx'}; 'Microsoft-IIS/10.0' -> {'microsoft-iis', 'microsoft', 'iis'}"""
+    tokens: Set[str] = set()
+    for name in names:
+        if not name:
+            continue
+        words = [w.rstrip(".") for w in _TOKEN.findall(str(name).lower())]
+        words = [w for w in words if len(w) > 2 and not w[0].isdigit()]
+        tokens.update(words)
+        for w in words:
+            tokens.update(p for p in _SEPARATORS.split(w) if len(p) > 2)
+        if len(words) > 1:
+            tokens.add("_".join(words))
+            tokens.add("-".join(words))
+    return {t for t in tokens if t not in _STOP_TOKENS}
+
+
+class TemplateIndex:
+    """
+    Index over the embedded nuclei templates:
+    - template_id -> compact metadata (name, severity, CVSS, CWE, EPSS, references)
+    - tag / vendor / product -> runnable template paths (technology-aware selection)
+    Parsed once with the libyaml loader and pickled; the pickle is rebuilt
+    whenever a template file is added, removed or modified (mtime signature).
+    """
+
+    def __init__(self, templates_dir: Path = TEMPLATES_DIR, cache_file: Path = CACHE_FILE):
+        self.templates_dir = Path(templates_dir)
+        self.cache_file = Path(cache_file)
+        self._lock = threading.Lock()
+        self._loaded = False
+        self.templates: Dict[str, Dict[str, Any]] = {}     # rel path -> record
+        self.by_id: Dict[str, Dict[str, Any]] = {}          # lower-cased template id -> record
+        self.by_key: Dict[str, Set[str]] = {}               # tag/vendor/product -> runnable rel paths
+        self.baseline: Set[str] = set()
+        self.runnable: List[str] = []                       # rel paths usable against a URL target
+        self.tech_aliases: Dict[str, List[str]] = {}
+
+    # ------------------------------------------------------------------
+    # build
+    # ------------------------------------------------------------------
+    def load(self) -> "TemplateIndex":
+        """Load the index once per process (thread-safe, blocking)."""
+        if self._loaded:
+            return self
+        with self._lock:
+            if not self._loaded:
+                files = self._template_files()
+                signature = self._signature(files)
+                if not self._load_cache(signature):
+                    self._build(files)
+                    self._save_cache(signature)
+                self._loaded = True
+        return self
+
+    def _template_files(self) -> List[Path]:
+        return [p for p in self.templates_dir.rglob("*.yaml")
+                if not p.relative_to(self.templates_dir).as_posix().startswith(".")]
+
+    def _signature(self, files: List[Path]) -> tuple:
+        latest = 0
+        # the wappalyzer mapping feeds tech_aliases, so its edits invalidate too
+        mapping = self.templates_dir / "wappalyzer-mapping.yml"
+        for path in (*files, *([mapping] if mapping.exists() else [])):
+            mtime = path.stat().st_mtime_ns
+            if mtime > latest:
+                latest = mtime
+        return (_CACHE_VERSION, len(files), latest)
+
+    def _load_cache(self, signature: tuple) -> bool:
+        try:
+            with open(self.cache_file, "rb") as f:
+                cached = pickle.load(f)
+            if cached.get("signature") != signature:
+                return False
+            self.templates = cached["templates"]
+            self.by_key = cached["by_key"]
+            self.baseline = cached["baseline"]
+            self.tech_aliases = cached["tech_aliases"]
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable template index cache: {e}")
+            return False
+        self._index_ids()
+        logger.info(f"Loaded template index from cache ({len(self.templates)} templates)")
+        return True
+
+    def _save_cache(self, signature: tuple):
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.cache_file.with_suffix(".tmp")
+            with open(tmp, "wb") as f:
+                pickle.dump({
+                    "signature": signature,
+                    "templates": self.templates,
+                    "by_key": self.by_key,
+                    "baseline": self.baseline,
+                    "tech_aliases": self.tech_aliases,
+                }, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self.cache_file)
+        except Exception as e:
+            logger.warning(f"Could not write template index cache: {e}")
+
+    def _build(self, files: List[Path]):
+        self.templates, self.by_key, self.baseline = {}, {}, set()
+        for path in files:
+            rel = path.relative_to(self.templates_dir).as_posix()
+            try:
+                doc = yaml.load(_header(path.read_text(encoding="utf-8", errors="ignore")), Loader=_LOADER)
+            except Exception as e:
+                logger.debug(f"Skipping unparsable template {rel}: {e}")
+                continue
+            if not isinstance(doc, dict) or not isinstance(doc.get("info"), dict):
+                continue
+            self._add(rel, doc)
+
+        mapping = self.templates_dir / "wappalyzer-mapping.yml"
+        try:
+            raw = yaml.load(mapping.read_text(encoding="utf-8"), Loader=_LOADER) or {}
+            self.tech_aliases = {str(k).lower(): _as_list(v) for k, v in raw.items()}
+        except Exception as e:
+            logger.warning(f"Could not read {mapping.name}: {e}")
+
+        self._index_ids()
+        logger.info(f"Indexed {len(self.templates)} nuclei templates, {len(self.by_key)} keys")
+
+    def _index_ids(self):
+        self.by_id = {r["id"].lower(): r for r in self.templates.values() if r["id"]}
+        self.runnable = sorted(p for p in self.templates if not p.startswith(_EXCLUDED_DIRS))
+
+    def _add(self, rel: str, doc: Dict[str, Any]):
+        info = doc["info"]
+        meta = info.get("metadata") if isinstance(info.get("metadata"), dict) else {}
+        cls = info.get("classification") if isinstance(info.get("classification"), dict) else {}
+        record = {
+            "id": str(doc.get("id", "")),
+            "path": rel,
+            "name": str(info.get("name", "")),
+            "severity": str(info.get("severity", "info")).lower(),
+            "description": " ".join(str(info.get("description") or "").split())[:_DESCRIPTION_LIMIT],
+            "references": _as_list(info.get("reference")),
+            "cve_ids": [c.upper() for c in _as_list(cls.get("cve-id"))],
+            "cwe_ids": [c.upper() for c in _as_list(cls.get("cwe-id"))],
+            "cvss_score": _as_float(cls.get("cvss-score")),
+            "cvss_metrics": str(cls.get("cvss-metrics") or ""),
+            "epss_score": _as_float(cls.get("epss-score")),
+            "epss_percentile": _as_float(cls.get("epss-percentile")),
+            "max_request": int(_as_float(meta.get("max-request")) or 1),     # shard cost
+            "tags": [t.lower() for t in _as_list(info.get("tags"))],
+            "vendor": [v.lower() for v in _as_list(meta.get("vendor"))],
+            "product": [p.lower() for p in _as_list(meta.get("product"))],
+        }
+        self.templates[rel] = record
+        if rel.startswith(_EXCLUDED_DIRS):
+            return  # metadata only, never selected for a URL scan
+
+        for key in (*record["tags"], *record["vendor"], *record["product"]):
+            self.by_key.setdefault(key, set()).add(rel)
+
+        generic = not record["vendor"] and not record["product"]
+        if rel.startswith(_BASELINE_DIRS) or (
+            generic and rel.startswith(_BASELINE_GENERIC_DIRS) and record["severity"] in _BASELINE_SEVERITIES
+        ):
+            self.baseline.add(rel)
+
+    # ------------------------------------------------------------------
+    # enrichment
+    # ------------------------------------------------------------------
+    def lookup(self, template_id: str) -> Optional[Dict[str, Any]]:
+        """O(1) metadata for a finding's template id (case-insensitive)."""
+        if not template_id:
+            return None
+        self.load()
+        return self.by_id.get(template_id.lower())
+
+    # ------------------------------------------------------------------
+    # query
+    # ------------------------------------------------------------------
+    def select(self, fingerprints: Iterable[str]) -> Optional[List[str]]:
+        """
+        Return the relative template paths relevant to the given technology
+        names plus the generic baseline, or None when nothing was fingerprinted
+        (caller should then fall back to the full corpus).
+        """
+        tokens = fingerprint_tokens(fingerprints)
+        if not tokens:
+            return None
+        self.load()
+
+        keys = set(tokens)
+        for token in tokens:
+            keys.update(self.tech_aliases.get(token, ()))
+
+        selected = set(self.baseline)
+        matched = False
+        for key in keys:
+            paths = self.by_key.get(key)
+            if paths:
+                matched = True
+                selected |= paths
+        if not matched:
+            return None
+        return sorted(selected)
+
+    # ------------------------------------------------------------------
+    # sharding
+    # ------------------------------------------------------------------
+    def shard(self, paths: Optional[List[str]], shards: int) -> List[List[str]]:
+        """
+        Split templates into `shards` lists of near-equal cost (max-request per
+        template), largest first onto the least loaded shard (LPT).
+        paths=None shards the whole runnable corpus.
+        """
+        self.load()
+        paths = self.runnable if paths is None else paths
+        shards = max(1, min(shards, len(paths)))
+        cost = lambda p: (self.templates.get(p) or {}).get("max_request", 1)
+        heap = [(0, i) for i in range(shards)]
+        out: List[List[str]] = [[] for _ in range(shards)]
+        for path in sorted(paths, key=cost, reverse=True):
+            load, i = heapq.heappop(heap)
+            out[i].append(path)
+            heapq.heappush(heap, (load + cost(path), i))
+        return [sorted(s) for s in out if s]
+
+
+def collect_fingerprints(previous_results: Dict[str, Any]) -> List[str]:
+    """Technology names from reconnaissance + scanning phase results."""
+    names: List[str] = []
+    recon = previous_results.get("reconnaissance") or {}
+    for tech in recon.get("technologies") or []:
+        if isinstance(tech, dict):
+            names.append(tech.get("name", ""))
+        elif isinstance(tech, str):
+            names.append(tech)
+
+    scan = previous_results.get("scanning") or {}
+    for svc in (scan.get("services") or []) + (scan.get("open_ports") or []):
+        if isinstance(svc, dict):
+            names.append(svc.get("service", ""))
+            names.append(svc.get("version", ""))
+    return [n for n in names if n]
+
+
+# Global template index instance (built lazily on first selection)
+template_index = TemplateIndex()
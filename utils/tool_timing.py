@@ -0,0 +1,222 @@
+"""
+Adaptive tool deadlines for RedStorm
+Every wrapper run is recorded per (tool, target class) with its duration,
+output size and longest output silence; deadlines are derived from the p95
+of past runs instead of hard-coded constants. A tool that is past its
+deadline is only killed early when it has produced output and then gone
+silent; most wrappers print their JSON only on exit, so a tool that never
+wrote anything runs until the hard limit.
+"""
+import os
+import json
+import signal
+import time
+import asyncio
+import ipaddress
+import threading
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Sequence
+
+logger = logging.getLogger("redstorm.tool_timing")
+
+TIMINGS_FILE = Path("data") / "tool_timings.json"
+
+
+def target_class(target: str) -> str:
+    """'ip', 'cidr', 'url' or 'domain' – tools scale very differently across them."""
+    target = (target or "").strip()
+    if "://" in target:
+        return "url"
+    try:
+        if "/" in target:
+            ipaddress.ip_network(target, strict=False)
+            return "cidr"
+        ipaddress.ip_address(target)
+        return "ip"
+    except ValueError:
+        return "domain"
+
+
+def _p95(values: List[float]) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+
+@dataclass
+class Limits:
+    deadline: float        # past this, a tool that went silent after output is killed
+    hard_limit: float      # killed regardless of output
+    stall: float           # silence that counts as hung once past the deadline
+    learned: bool
+
+
+@dataclass
+class ToolRun:
+    stdout: bytes
+    stderr: bytes
+    returncode: Optional[int]
+    duration: float
+    outcome: str           # ok | error | killed
+    limits: Limits
+
+
+class ToolTimings:
+    """Rolling per-(tool, target class) history persisted as JSON"""
+
+    def __init__(self, path: Path = TIMINGS_FILE, window: int = 200, min_samples: int = 5,
+                 margin: float = 1.5, hard_factor: float = 4.0, min_stall: float = 30.0):
+        self.path = Path(path)
+        self.window = window
+        self.min_samples = min_samples
+        self.margin = margin
+        self.hard_factor = hard_factor
+        self.min_stall = min_stall
+        self._lock = threading.Lock()
+        self._runs: Dict[str, List[Dict[str, Any]]] = self._load()
+
+    def _load(self) -> Dict[str, List[Dict[str, Any]]]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable tool timings {self.path}: {e}")
+            return {}
+
+    def _save(self):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._runs, f)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            logger.warning(f"Could not persist tool timings: {e}")
+
+    @staticmethod
+    def _key(tool: str, cls: str) -> str:
+        return f"{tool}:{cls}"
+
+    def record(self, tool: str, cls: str, duration: float, output_bytes: int, max_gap: float, outcome: str):
+        with self._lock:
+            runs = self._runs.setdefault(self._key(tool, cls), [])
+            runs.append({"duration": round(duration, 3), "output_bytes": output_bytes,
+                         "max_gap": round(max_gap, 3), "outcome": outcome, "at": time.time()})
+            del runs[:-self.window]
+            self._save()
+
+    def limits(self, tool: str, cls: str, default: float) -> Limits:
+        """Learned limits once min_samples completed runs exist, else the caller's default."""
+        with self._lock:
+            runs = [r for r in self._runs.get(self._key(tool, cls), []) if r["outcome"] != "killed"]
+        if len(runs) < self.min_samples:
+            return Limits(default, default * self.hard_factor, max(self.min_stall, default / 4), False)
+        deadline = max(_p95([r["duration"] for r in runs]) * self.margin, 5.0)
+        stall = max(_p95([r["max_gap"] for r in runs]) * self.margin, self.min_stall)
+        return Limits(deadline, deadline * self.hard_factor, stall, True)
+
+    def summary(self) -> Dict[str, Any]:
+        """Learned values per tool and target class (for the API)."""
+        with self._lock:
+            snapshot = {k: list(v) for k, v in self._runs.items()}
+        out = {}
+        for key, runs in snapshot.items():
+            tool, _, cls = key.partition(":")
+            done = [r for r in runs if r["outcome"] != "killed"]
+            limits = self.limits(tool, cls, default=0.0)
+            out[key] = {
+                "tool": tool,
+                "target_class": cls,
+                "runs": len(runs),
+                "killed": len(runs) - len(done),
+                "p95_duration": round(_p95([r["duration"] for r in done]), 2) if done else None,
+                "p95_output_bytes": _p95([r["output_bytes"] for r in done]) if done else None,
+                "deadline": round(limits.deadline, 1) if limits.learned else None,
+                "stall": round(limits.stall, 1) if limits.learned else None,
+            }
+        return out
+
+
+def _kill_group(proc):
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+async def _pump(proc, chunks: List[bytes], limits: Limits, started: float, loop) -> tuple:
+    """Read stdout until EOF or a kill decision -> (max_gap, killed, last output time)."""
+    last, max_gap = started, 0.0
+    while True:
+        now = loop.time()
+        if now < started + limits.deadline:
+            wait = started + limits.deadline - now
+        else:
+            # silence only means "hung" once the tool has shown it reports progress;
+            # wrappers that print only on exit are silent until the very end
+            kill_at = started + limits.hard_limit
+            if chunks:
+                kill_at = min(last + limits.stall, kill_at)
+            wait = kill_at - now
+            if wait <= 0:
+                return max_gap, True, last
+        try:
+            chunk = await asyncio.wait_for(proc.stdout.read(65536), timeout=wait)
+        except asyncio.TimeoutError:
+            continue
+        now = loop.time()
+        if not chunk:
+            return max_gap, False, last
+        max_gap = max(max_gap, now - last)
+        last = now
+        chunks.append(chunk)
+
+
+async def run_tool(cmd: Sequence[str], tool: str, target: str, default_timeout: float,
+                   cwd: Optional[str] = None, capture_stderr: bool = False,
+                   timings: Optional[ToolTimings] = None) -> ToolRun:
+    """
+    Run a wrapper under its learned limits and record the run.
+    Stdout is read incrementally so silence (a hung tool) can be told apart
+    from a long scan that is still reporting progress.
+    """
+    timings = timings or tool_timings
+    cls = target_class(target)
+    limits = timings.limits(tool, cls, default_timeout)
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    proc = await asyncio.create_subprocess_exec(
+        *cmd, cwd=cwd, stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE if capture_stderr else asyncio.subprocess.DEVNULL,
+        start_new_session=True,     # own process group: a kill also reaps nuclei/docker children
+    )
+    stderr_task = asyncio.ensure_future(proc.stderr.read()) if capture_stderr else None
+
+    chunks: List[bytes] = []
+    try:
+        max_gap, killed, last = await _pump(proc, chunks, limits, started, loop)
+    except asyncio.CancelledError:
+        _kill_group(proc)         # a cancelled assessment must not leave the tool running
+        raise
+
+    if killed:
+        _kill_group(proc)
+        logger.warning(f"{tool} killed after {loop.time() - started:.0f}s "
+                       f"(deadline {limits.deadline:.0f}s, silent {loop.time() - last:.0f}s)")
+    await proc.wait()
+    stderr = await stderr_task if stderr_task else b""
+
+    duration = loop.time() - started
+    max_gap = max(max_gap, loop.time() - last)
+    stdout = b"".join(chunks)
+    outcome = "killed" if killed else ("ok" if proc.returncode == 0 else "error")
+    await loop.run_in_executor(None, timings.record, tool, cls, duration, len(stdout), max_gap, outcome)
+    return ToolRun(stdout, stderr, proc.returncode, duration, outcome, limits)
+
+
+# Global timing history shared by all agents
+tool_timings = ToolTimings()